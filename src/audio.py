@@ -4,53 +4,82 @@ import asyncio
 import re
 from pathlib import Path
 import aioconsole
+import tempfile
 from math import ceil
+from concurrent.futures import ThreadPoolExecutor
 from configs import *
 from menu import Menu
 from files_utils import filesUtils
-import edge_tts
+from audio_cache import cacheAudio
+from tts_backend import backendTTS
+from metricas import metricasJob
+from mp3_quadros import quadrosMP3, concatenadorMP3
+from capitulos import capitulosAudio
 import shutil
 
 
 class Audio:
 
+    @staticmethod
+    async def sintetizar_bytes(
+        texto: str,
+        voz: str,
+        velocidade: str = VELOCIDADE_TTS,
+        tom: str = TOM_TTS,
+        cache: cacheAudio = None,
+        backend: backendTTS = None,
+    ) -> bytes:
+        """
+        Sintetiza o texto consumindo o stream do backend de TTS (Edge TTS por padrão)
+        e retorna o áudio (MP3) em memória.
+        Retorna None se o texto ou o áudio gerado estiverem vazios. Erros do serviço são
+        propagados sem alteração para que a política de novas tentativas os classifique.
+        Se um cache for informado, trechos já sintetizados são reaproveitados.
+        """
+        if not texto.strip():
+            print("⚠️ Texto vazio detectado")
+            return None
+
+        backend = backend or backendTTS.padrao()
+        chave = None
+        if cache is not None:
+            chave = cacheAudio.gerar_chave(
+                texto, voz, velocidade, tom, backend=backend.nome
+            )
+            dados = cache.obter(chave)
+            if dados is not None:
+                return dados
+
+        dados = await backend.sintetizar(texto, voz, velocidade, tom)
+
+        # Verifica se o áudio tem tamanho mínimo
+        if len(dados) <= 1024:
+            print("⚠️ Arquivo de áudio vazio ou muito pequeno")
+            return None
+        if chave is not None:
+            cache.guardar(chave, dados)
+        return dados
+
     @staticmethod
     async def converter_texto_para_audio(
-        texto: str, voz: str, caminho_saida: str
+        texto: str,
+        voz: str,
+        caminho_saida: str,
+        velocidade: str = VELOCIDADE_TTS,
+        tom: str = TOM_TTS,
+        cache: cacheAudio = None,
+        backend: backendTTS = None,
     ) -> bool:
-        """Converte texto para áudio usando Edge TTS."""
-        tentativas = 0
-        while tentativas < MAX_TENTATIVAS:
-            try:
-                if not texto.strip():
-                    print("⚠️ Texto vazio detectado")
-                    return False
-
-                communicate = edge_tts.Communicate(texto, voz)
-                await communicate.save(caminho_saida)
-
-                # Verifica se o arquivo foi criado e tem tamanho mínimo
-                if (
-                    os.path.exists(caminho_saida)
-                    and os.path.getsize(caminho_saida) > 1024
-                ):
-                    return True
-                else:
-                    print("⚠️ Arquivo de áudio vazio ou muito pequeno")
-                    print(texto)
-                    if os.path.exists(caminho_saida):
-                        os.remove(caminho_saida)
-                    return False
-            except Exception as e:
-                tentativas += 1
-                
-                raise Exception(
-                    f"\n❌ Erro na conversão (tentativa {tentativas}/{MAX_TENTATIVAS}): {str(e)}"
-                )
-
-        return False
+        """Converte texto para áudio usando o backend de TTS e salva em `caminho_saida`."""
+        dados = await Audio.sintetizar_bytes(texto, voz, velocidade, tom, cache, backend)
+        if dados is None:
+            return False
+        with open(caminho_saida, "wb") as f:
+            f.write(dados)
+        return True
 
     @staticmethod
+    @metricasJob.etapa("ffprobe")
     def obter_duracao_ffprobe(caminho_arquivo):
         """Obtém a duração de um arquivo de mídia usando ffprobe."""
         comando = [
@@ -69,72 +98,255 @@ class Audio:
         return float(resultado.stdout.strip())
 
     @staticmethod
-    def acelerar_audio(input_path, output_path, velocidade):
-        """Acelera um arquivo de áudio usando o filtro atempo do FFmpeg."""
+    def obter_duracao(caminho_arquivo) -> float:
+        """
+        Duração de um arquivo de mídia. MP3 é lido direto dos cabeçalhos (quadrosMP3),
+        sem subprocesso; os demais formatos usam o ffprobe.
+        """
+        if caminho_arquivo.lower().endswith(".mp3"):
+            return quadrosMP3.duracao_arquivo(caminho_arquivo)
+        return Audio.obter_duracao_ffprobe(caminho_arquivo)
+
+    @staticmethod
+    def _silencio_proximo(arquivo: str, alvo: float) -> float:
+        """
+        Procura, numa janela de ATEMPO_JANELA_SILENCIO segundos em torno de `alvo`,
+        o silêncio mais próximo e retorna o meio dele (ou o próprio alvo, se não houver).
+        """
+        inicio = max(0.0, alvo - ATEMPO_JANELA_SILENCIO / 2)
         comando = [
             FFMPEG_BIN,
-            "-y",
+            "-hide_banner",
+            "-nostats",
+            "-ss",
+            f"{inicio:.3f}",
+            "-t",
+            str(ATEMPO_JANELA_SILENCIO),
             "-i",
-            input_path,
-            "-filter:a",
-            f"atempo={velocidade}",
-            "-vn",
-            output_path,
+            arquivo,
+            "-map",
+            "0:a:0",
+            "-af",
+            f"silencedetect=noise={ATEMPO_RUIDO_SILENCIO}:d=0.2",
+            "-f",
+            "null",
+            "-",
         ]
-        subprocess.run(comando, check=True)
+        saida = subprocess.run(
+            comando, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+        ).stderr
+        # Os tempos do silencedetect são relativos ao início da janela
+        comecos = [float(t) for t in re.findall(r"silence_start: (-?[\d.]+)", saida)]
+        fins = [float(t) for t in re.findall(r"silence_end: (-?[\d.]+)", saida)]
+        meios = [inicio + (a + b) / 2 for a, b in zip(comecos, fins)]
+        return min(meios, key=lambda t: abs(t - alvo), default=alvo)
 
     @staticmethod
-    def criar_video_com_audio(audio_path, video_path, duracao):
-        """Cria um vídeo com tela preta a partir de um arquivo de áudio."""
-        comando = [
-            FFMPEG_BIN,
-            "-y",
-            "-f",
-            "lavfi",
-            "-i",
-            f"color=c=black:s=1280x720:d={int(duracao)}",
-            "-i",
-            audio_path,
-            "-shortest",
+    def pontos_de_corte(arquivo: str, duracao: float, partes: int, executor) -> list:
+        """
+        Divide `duracao` em `partes` de tamanho parecido, com os cortes em silêncios.
+        Cortes fora de (0, duracao) ou a menos de ATEMPO_SEGMENTO_MINIMO de outro corte
+        (ex: dois alvos que caíram no mesmo silêncio) são descartados, para que nenhum
+        segmento fique vazio depois do arredondamento do -ss em milissegundos.
+        """
+        alvos = [duracao * i / partes for i in range(1, partes)]
+        candidatos = executor.map(lambda alvo: Audio._silencio_proximo(arquivo, alvo), alvos)
+        cortes = [0.0]
+        for corte in sorted(round(c, 3) for c in candidatos):
+            if corte - cortes[-1] >= ATEMPO_SEGMENTO_MINIMO and duracao - corte >= ATEMPO_SEGMENTO_MINIMO:
+                cortes.append(corte)
+        return cortes + [duracao]
+
+    @staticmethod
+    @metricasJob.etapa("ffmpeg_atempo")
+    def acelerar_em_segmentos(
+        arquivo: str,
+        velocidade: float,
+        trabalhadores: int,
+        diretorio: str,
+        duracao: float,
+        codificacao: tuple = ("-c:a", "libmp3lame"),
+        extensao: str = ".mp3",
+    ) -> list:
+        """
+        Acelera `arquivo` em `trabalhadores` segmentos simultâneos, cortados em silêncios
+        para que as emendas não fiquem audíveis, e retorna os caminhos dos segmentos, na
+        ordem, para serem unidos sem recodificar.
+        A soma das durações é conferida com a duração esperada (duracao / velocidade).
+        """
+        with ThreadPoolExecutor(max_workers=trabalhadores) as executor:
+            cortes = Audio.pontos_de_corte(arquivo, duracao, trabalhadores, executor)
+
+            def acelerar(i):
+                inicio, fim = cortes[i], cortes[i + 1]
+                saida = os.path.join(diretorio, f"segmento{i:04d}{extensao}")
+                comando = [FFMPEG_BIN, "-y", "-v", "error", "-ss", f"{inicio:.3f}"]
+                if i + 2 < len(cortes):
+                    comando += ["-t", f"{fim - inicio:.3f}"]
+                comando += ["-i", arquivo, "-map", "0:a:0", "-filter:a", f"atempo={velocidade}"]
+                subprocess.run(comando + list(codificacao) + [saida], check=True)
+                return saida, Audio.obter_duracao(saida)
+
+            segmentos = list(executor.map(acelerar, range(len(cortes) - 1)))
+
+        esperado = duracao / velocidade
+        obtido = sum(d for _, d in segmentos)
+        if abs(obtido - esperado) > ATEMPO_TOLERANCIA_DURACAO * len(segmentos):
+            raise Exception(
+                f"❌ Duração dos segmentos acelerados ({obtido:.2f}s) difere da esperada ({esperado:.2f}s)"
+            )
+        print(f"    {len(segmentos)} segmento(s) acelerado(s) em paralelo")
+        return [caminho for caminho, _ in segmentos]
+
+    _filtros_ffmpeg = None  # Nomes dos filtros disponíveis no FFmpeg instalado
+
+    @staticmethod
+    def filtro_disponivel(nome: str) -> bool:
+        if Audio._filtros_ffmpeg is None:
+            resultado = subprocess.run(
+                [FFMPEG_BIN, "-hide_banner", "-filters"],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+            )
+            Audio._filtros_ffmpeg = {
+                partes[1] for partes in map(str.split, resultado.stdout.splitlines()) if len(partes) > 2
+            }
+        return nome in Audio._filtros_ffmpeg
+
+    @staticmethod
+    def _escapar_filtro(texto: str) -> str:
+        """
+        Escapa um valor de opção para o filtergraph do FFmpeg: primeiro no nível da
+        opção do filtro e depois no nível do grafo (dois níveis de barras invertidas).
+        """
+        for especiais in ("\\':", "\\'[],;"):
+            texto = "".join("\\" + c if c in especiais else c for c in texto)
+        return texto
+
+    @staticmethod
+    def argumentos_video(
+        duracao: float, capa: str = None, titulo: str = None, estatico: bool = VIDEO_QUADRO_ESTATICO
+    ) -> tuple:
+        """
+        Argumentos do FFmpeg para o vídeo que acompanha o áudio: a entrada da imagem
+        e a codificação do vídeo na saída.
+        Com `estatico` (VIDEO_QUADRO_ESTATICO) o vídeo é uma única imagem (tela preta ou `capa`, com
+        `titulo` escrito no centro) repetida a VIDEO_QUADROS_POR_SEGUNDO e codificada com
+        -tune stillimage, em vez de 25 quadros por segundo de tela preta.
+        """
+        largura, altura = VIDEO_RESOLUCAO
+        segundos = ceil(duracao)
+        if not estatico:
+            entrada = ["-f", "lavfi", "-i", f"color=c=black:s={largura}x{altura}:d={segundos}"]
+            return entrada, ["-c:v", "libx264", "-pix_fmt", "yuv420p"]
+
+        quadros = VIDEO_QUADROS_POR_SEGUNDO
+        filtros = []
+        if capa:
+            entrada = ["-loop", "1", "-framerate", str(quadros), "-t", str(segundos), "-i", capa]
+            filtros += [
+                f"scale={largura}:{altura}:force_original_aspect_ratio=decrease",
+                f"pad={largura}:{altura}:(ow-iw)/2:(oh-ih)/2:color=black",
+            ]
+        else:
+            entrada = [
+                "-f",
+                "lavfi",
+                "-i",
+                f"color=c=black:s={largura}x{altura}:r={quadros}:d={segundos}",
+            ]
+        if titulo and not Audio.filtro_disponivel("drawtext"):
+            print("    ⚠️ FFmpeg sem o filtro drawtext (freetype): o título não será escrito no vídeo")
+        elif titulo:
+            fonte = f":fontfile={Audio._escapar_filtro(VIDEO_FONTE)}" if VIDEO_FONTE else ""
+            filtros.append(
+                f"drawtext=text={Audio._escapar_filtro(titulo)}:expansion=none{fonte}"
+                ":fontcolor=white:fontsize=h/14:x=(w-text_w)/2:y=(h-text_h)/2"
+                ":box=1:boxcolor=black@0.5:boxborderw=20"
+            )
+        filtros.append("format=yuv420p")
+        codificacao = [
+            "-filter:v",
+            ",".join(filtros),
+            "-r",
+            str(quadros),
             "-c:v",
             "libx264",
-            "-c:a",
-            "aac",
-            "-b:a",
-            "192k",
-            "-pix_fmt",
-            "yuv420p",
-            video_path,
+            "-tune",
+            "stillimage",
+            "-preset",
+            "veryfast",
         ]
-        subprocess.run(comando, check=True)
+        return entrada, codificacao
 
     @staticmethod
-    def dividir_em_partes(
-        input_path, duracao_total, duracao_maxima, nome_base_saida, extensao
-    ):
-        """Divide um arquivo de mídia em partes menores."""
-        partes = ceil(duracao_total / duracao_maxima)
-        for i in range(partes):
-            inicio = i * duracao_maxima
-            duracao = min(duracao_maxima, duracao_total - inicio)
+    def obter_codec_audio(caminho_arquivo) -> str:
+        """Codec da primeira faixa de áudio (ex: "mp3", "aac"), segundo o ffprobe."""
+        comando = [
+            FFPROBE_BIN,
+            "-v",
+            "error",
+            "-select_streams",
+            "a:0",
+            "-show_entries",
+            "stream=codec_name",
+            "-of",
+            "default=noprint_wrappers=1:nokey=1",
+            caminho_arquivo,
+        ]
+        resultado = subprocess.run(
+            comando, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+        )
+        return resultado.stdout.strip()
 
-            output_path = f"{nome_base_saida}_parte{i+1}{extensao}"
+    @staticmethod
+    def codificacao_audio_mp4(caminho_audio: str) -> list:
+        """Copia o áudio quando o MP4 aceita o codec da entrada; senão, converte para AAC."""
+        if Audio.obter_codec_audio(caminho_audio) in CODECS_AUDIO_MP4:
+            return ["-c:a", "copy"]
+        return CODIFICACAO_AUDIO_MP4
 
-            comando = [
-                FFMPEG_BIN,
-                "-y",
-                "-i",
-                input_path,
-                "-ss",
-                str(int(inicio)),
-                "-t",
-                str(int(duracao)),
-                "-c",
-                "copy",
-                output_path,
-            ]
-            subprocess.run(comando, check=True)
-            print(f"    Parte {i+1} criada: {output_path}")
+    @staticmethod
+    @metricasJob.etapa("ffmpeg_video")
+    def criar_video_com_audio(
+        audio_path, video_path, duracao, capa=None, titulo=None, estatico=VIDEO_QUADRO_ESTATICO
+    ):
+        """Cria um vídeo (tela preta ou capa, ver argumentos_video) a partir de um arquivo de áudio."""
+        entrada_video, codificacao = Audio.argumentos_video(duracao, capa, titulo, estatico)
+        comando = (
+            [FFMPEG_BIN, "-y"]
+            + entrada_video
+            + ["-i", audio_path, "-map", "0:v", "-map", "1:a:0", "-shortest"]
+            + codificacao
+            + Audio.codificacao_audio_mp4(audio_path)
+            + [video_path]
+        )
+        subprocess.run(comando, check=True)
+
+    @staticmethod
+    def argumentos_segmentos(nome_base_saida: str, extensao: str, lista: str) -> list:
+        """
+        Saída pelo muxer segment: partes de até LIMITE_SEGUNDOS, numeradas a partir
+        de 1 (<nome>_parte1, <nome>_parte2...), com os nomes gravados em `lista`.
+        """
+        return [
+            "-f",
+            "segment",
+            "-segment_time",
+            str(LIMITE_SEGUNDOS),
+            "-segment_format",
+            extensao.lstrip("."),
+            "-segment_start_number",
+            "1",
+            "-reset_timestamps",
+            "1",
+            "-segment_list",
+            lista,
+            "-segment_list_type",
+            "flat",
+            f"{nome_base_saida}_parte%d{extensao}",
+        ]
 
     @staticmethod
     async def menu_melhorar_audio():
@@ -204,6 +416,167 @@ class Audio:
                 print("\n❌ Opção inválida")
                 await asyncio.sleep(1)
 
+    @staticmethod
+    def melhorar_audio(
+        arquivo: str,
+        velocidade: float,
+        formato: str,
+        trabalhadores: int = ATEMPO_TRABALHADORES,
+        capa: str = None,
+        titulo: str = None,
+        duracao_original: float = None,
+        capitulos: list = None,
+    ) -> list:
+        """
+        Acelera um arquivo de áudio/vídeo e gera a saída em MP3 ou MP4, dividindo-a
+        em partes de até LIMITE_SEGUNDOS. Retorna a lista de arquivos gerados.
+        Aceleração, vídeo e divisão são feitos por um único processo do FFmpeg, que
+        lê a entrada uma vez e não grava arquivos intermediários. Áudios longos são
+        antes acelerados em segmentos por `trabalhadores` processos; segmentos MP3 são
+        unidos quadro a quadro (concatenadorMP3), e numa saída MP3 de uma só parte nem
+        há processo final. Nos demais casos esse processo só une os segmentos, sem
+        recodificar o áudio.
+        No MP4, `capa` e `titulo` definem a imagem do vídeo (argumentos_video).
+        `duracao_original` evita ler a duração da entrada quando ela já é conhecida.
+        `capitulos` (ver capitulosAudio) são gravados como marcadores na saída, com os
+        tempos ajustados à velocidade, quando ela não é dividida em partes.
+        """
+        nome_base = os.path.splitext(arquivo)[0]
+
+        # Normaliza nome de saída
+        nome_saida_base = f"{nome_base}_x{velocidade}".replace(".", "_")
+        nome_saida_base = re.sub(
+            r"_+", "_", nome_saida_base
+        )  # Remove underlines duplos
+
+        # Cria diretório de saída, se necessário
+        Path(os.path.dirname(nome_saida_base)).mkdir(parents=True, exist_ok=True)
+
+        print(f"\n[+] Processando: {arquivo}")
+        print(f"    Aumentando velocidade ({velocidade}x)...")
+
+        # A duração final vem do cabeçalho da entrada, sem esperar a aceleração
+        if duracao_original is None:
+            duracao_original = Audio.obter_duracao(arquivo)
+        duracao = duracao_original / velocidade
+        print(f"    Duração após aceleração: {duracao / 3600:.2f} horas")
+
+        extensao_final = ".mp4" if formato == "mp4" else ".mp3"
+        filtro = ["-filter:a", f"atempo={velocidade}"] if velocidade != 1.0 else []
+        if formato == "mp4":
+            extensao_segmentos = ".m4a"
+            codificacao_audio = (
+                CODIFICACAO_AUDIO_MP4 if filtro else Audio.codificacao_audio_mp4(arquivo)
+            )
+        elif not filtro and arquivo.lower().endswith(".mp3"):
+            # Sem mudança de velocidade, o MP3 só é dividido, sem recodificar
+            codificacao_audio, extensao_segmentos = ["-c:a", "copy"], ".mp3"
+        else:
+            codificacao_audio, extensao_segmentos = ["-c:a", "libmp3lame"], ".mp3"
+
+        comando = [FFMPEG_BIN, "-y"]
+        temporario = None
+        metadados = None
+        try:
+            if filtro and trabalhadores > 1 and duracao_original >= ATEMPO_DURACAO_MINIMA_PARALELO:
+                temporario = tempfile.mkdtemp(
+                    prefix=".atempo_", dir=os.path.dirname(os.path.abspath(nome_saida_base))
+                )
+                segmentos = Audio.acelerar_em_segmentos(
+                    arquivo,
+                    velocidade,
+                    trabalhadores,
+                    temporario,
+                    duracao_original,
+                    codificacao_audio,
+                    extensao_segmentos,
+                )
+                if extensao_segmentos == ".mp3":
+                    # Segmentos MP3 são unidos quadro a quadro (concatenadorMP3), sem o FFmpeg
+                    if duracao <= LIMITE_SEGUNDOS:
+                        # Saída numa só parte: a união já é o arquivo final, com os capítulos na tag
+                        saida_final = f"{nome_saida_base}{extensao_final}"
+                        ajustados = [
+                            {**c, "inicio": c["inicio"] / velocidade, "fim": c["fim"] / velocidade}
+                            for c in capitulos or []
+                        ]
+                        with metricasJob.etapa("concatenacao"):
+                            concatenadorMP3.concatenar(
+                                segmentos, saida_final, capitulosAudio.tag_id3(ajustados)
+                            )
+                        print(f"    Arquivo final salvo: {saida_final}")
+                        return [saida_final]
+                    acelerado = os.path.join(temporario, "acelerado.mp3")
+                    with metricasJob.etapa("concatenacao"):
+                        concatenadorMP3.concatenar(segmentos, acelerado)
+                    comando += ["-i", acelerado]
+                else:
+                    lista_segmentos = os.path.join(temporario, "segmentos.txt")
+                    Audio.gravar_lista_concat(segmentos, lista_segmentos)
+                    comando += ["-f", "concat", "-safe", "0", "-i", lista_segmentos]
+                filtro, codificacao_audio = [], ["-c:a", "copy"]
+            else:
+                comando += ["-i", arquivo]
+
+            if formato == "mp4":
+                print("    Gerando vídeo...")
+                entrada_video, codificacao_video = Audio.argumentos_video(duracao, capa, titulo)
+                comando += entrada_video
+            if capitulos and duracao <= LIMITE_SEGUNDOS:
+                metadados = f"{nome_saida_base}_capitulos.txt"
+                Audio.gravar_metadados_capitulos(capitulos, metadados, velocidade)
+                indice = "2" if formato == "mp4" else "1"
+                comando += ["-i", metadados, "-map_chapters", indice]
+            elif filtro:
+                # Os capítulos da entrada ficariam nos tempos de antes da aceleração
+                comando += ["-map_chapters", "-1"]
+            if formato == "mp4":
+                comando += ["-map", "1:v", "-map", "0:a:0", "-shortest"]
+                comando += codificacao_video
+            else:
+                comando += ["-map", "0:a:0"]
+            comando += filtro + codificacao_audio
+
+            return Audio._gerar_saida(comando, nome_saida_base, extensao_final, duracao, formato)
+        finally:
+            if temporario is not None:
+                shutil.rmtree(temporario, ignore_errors=True)
+            if metadados is not None and os.path.exists(metadados):
+                os.remove(metadados)
+
+    @staticmethod
+    def _gerar_saida(comando: list, nome_saida_base: str, extensao_final: str, duracao: float, formato: str) -> list:
+        """Executa o comando do FFmpeg, dividindo a saída em partes quando necessário."""
+        if duracao <= LIMITE_SEGUNDOS:
+            saida_final = f"{nome_saida_base}{extensao_final}"
+            with metricasJob.etapa("ffmpeg_pos_processamento"):
+                subprocess.run(comando + [saida_final], check=True)
+            print(f"    Arquivo final salvo: {saida_final}")
+            return [saida_final]
+
+        print("    Dividindo em partes de até 12 horas...")
+        lista = f"{nome_saida_base}_partes.txt"
+        if formato == "mp4":
+            # O vídeo só pode ser cortado em quadros-chave: força um em cada ponto de corte
+            comando += ["-force_key_frames", f"expr:gte(t,n_forced*{LIMITE_SEGUNDOS})"]
+        comando += Audio.argumentos_segmentos(nome_saida_base, extensao_final, lista)
+        try:
+            with metricasJob.etapa("ffmpeg_pos_processamento"):
+                subprocess.run(comando, check=True)
+            # A lista traz só o nome de cada parte, sem o diretório
+            diretorio = os.path.dirname(nome_saida_base)
+            with open(lista, encoding="utf-8") as f:
+                arquivos_gerados = [
+                    os.path.join(diretorio, linha.strip()) for linha in f if linha.strip()
+                ]
+        finally:
+            if os.path.exists(lista):
+                os.remove(lista)
+        for i, parte in enumerate(arquivos_gerados, 1):
+            print(f"    Parte {i} criada: {parte}")
+        print("    Arquivos divididos com sucesso.")
+        return arquivos_gerados
+
     @staticmethod
     async def processar_melhorar_audio(arquivo):
         """Processa a melhoria de um arquivo de áudio/vídeo."""
@@ -251,54 +624,7 @@ class Audio:
                 else:
                     print("Formato inválido. Digite 'mp3' ou 'mp4'.")
 
-            # Normaliza nome de saída
-            nome_saida_base = f"{nome_base}_x{velocidade}".replace(".", "_")
-            nome_saida_base = re.sub(
-                r"_+", "_", nome_saida_base
-            )  # Remove underlines duplos
-
-            # Cria diretório de saída, se necessário
-            Path(os.path.dirname(nome_saida_base)).mkdir(parents=True, exist_ok=True)
-
-            temp_audio = f"{nome_saida_base}_temp_audio.mp3"
-
-            print(f"\n[+] Processando: {arquivo}")
-            print(f"    Aumentando velocidade ({velocidade}x)...")
-
-            Audio.acelerar_audio(arquivo, temp_audio, velocidade)
-            duracao = Audio.obter_duracao_ffprobe(temp_audio)
-            print(f"    Duração após aceleração: {duracao / 3600:.2f} horas")
-
-            extensao_final = ".mp4" if formato == "mp4" else ".mp3"
-
-            if duracao <= LIMITE_SEGUNDOS:
-                saida_final = f"{nome_saida_base}{extensao_final}"
-                if formato == "mp4":
-                    print("    Gerando vídeo com tela preta...")
-                    Audio.criar_video_com_audio(temp_audio, saida_final, duracao)
-                    os.remove(temp_audio)
-                else:
-                    os.rename(temp_audio, saida_final)
-                print(f"    Arquivo final salvo: {saida_final}")
-            else:
-                print("    Dividindo em partes de até 12 horas...")
-                if formato == "mp4":
-                    video_completo = f"{nome_saida_base}_video.mp4"
-                    Audio.criar_video_com_audio(temp_audio, video_completo, duracao)
-                    Audio.dividir_em_partes(
-                        video_completo,
-                        duracao,
-                        LIMITE_SEGUNDOS,
-                        nome_saida_base,
-                        ".mp4",
-                    )
-                    os.remove(video_completo)
-                else:
-                    Audio.dividir_em_partes(
-                        temp_audio, duracao, LIMITE_SEGUNDOS, nome_saida_base, ".mp3"
-                    )
-                os.remove(temp_audio)
-                print("    Arquivos divididos com sucesso.")
+            Audio.melhorar_audio(arquivo, velocidade, formato)
 
             await aioconsole.ainput("\nPressione ENTER para continuar...")
 
@@ -309,39 +635,27 @@ class Audio:
             CANCELAR_PROCESSAMENTO = True
 
     @staticmethod
-    def unificar_audio(temp_files, arquivo_final) -> bool:
-        """Une os arquivos de áudio temporários em um único arquivo final."""
-        try:
-            if shutil.which(FFMPEG_BIN):
-                list_file = os.path.join(
-                    os.path.dirname(arquivo_final), "file_list.txt"
-                )
-                with open(list_file, "w") as f:
-                    for temp in temp_files:
-                        f.write(f"file '{os.path.abspath(temp)}'\n")
-                subprocess.run(
-                    [
-                        FFMPEG_BIN,
-                        "-f",
-                        "concat",
-                        "-safe",
-                        "0",
-                        "-i",
-                        list_file,
-                        "-c",
-                        "copy",
-                        arquivo_final,
-                    ],
-                    check=True,
+    def gravar_metadados_capitulos(capitulos: list, caminho: str, velocidade: float = 1.0) -> None:
+        """
+        Grava os capítulos (títulos e tempos em segundos do áudio original) no formato
+        FFMETADATA, lido pelo FFmpeg com -map_chapters: vira átomos de capítulo no MP4
+        e quadros CHAP/CTOC no MP3. Os tempos são divididos pela `velocidade`.
+        """
+        with open(caminho, "w", encoding="utf-8") as f:
+            f.write(";FFMETADATA1\n")
+            for capitulo in capitulos:
+                titulo = re.sub(r"([=;#\\\n])", r"\\\1", capitulo["titulo"])
+                f.write(
+                    "[CHAPTER]\nTIMEBASE=1/1000\n"
+                    f"START={round(capitulo['inicio'] * 1000 / velocidade)}\n"
+                    f"END={round(capitulo['fim'] * 1000 / velocidade)}\n"
+                    f"title={titulo}\n"
                 )
-                os.remove(list_file)
-            else:
-                # Fallback: concatenação binária (pode não funcionar perfeitamente para mp3)
-                with open(arquivo_final, "wb") as outfile:
-                    for temp in temp_files:
-                        with open(temp, "rb") as infile:
-                            outfile.write(infile.read())
-            return True
-        except Exception as e:
-            print(f"❌ Erro na unificação dos arquivos: {e}")
-            return False
+
+    @staticmethod
+    def gravar_lista_concat(caminhos: list, lista: str) -> None:
+        """Grava a lista de arquivos lida pelo demuxer concat do FFmpeg (-f concat)."""
+        with open(lista, "w", encoding="utf-8") as f:
+            for caminho in caminhos:
+                # Aspas simples no caminho são escapadas como no shell
+                f.write("file '{}'\n".format(os.path.abspath(caminho).replace("'", "'\\''")))
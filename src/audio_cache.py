@@ -0,0 +1,155 @@
+import os
+import hashlib
+import shutil
+import tempfile
+import unicodedata
+from collections import OrderedDict
+from configs import *
+
+
+class cacheAudio:
+    """
+    Cache em disco dos trechos sintetizados, endereçado pelo conteúdo.
+    A chave é o hash de (texto normalizado, voz, velocidade, tom, formato), de modo
+    que trechos repetidos e reexecuções do mesmo livro não voltam ao TTS.
+    O tamanho total é limitado e os itens menos usados recentemente são removidos.
+    """
+
+    def __init__(
+        self, diretorio: str = DIRETORIO_CACHE, limite_bytes: int = LIMITE_CACHE_BYTES
+    ):
+        self.diretorio = os.path.join(diretorio, "audio")
+        self.limite_bytes = limite_bytes
+        self.acertos = 0
+        self.falhas = 0
+        self.remocoes = 0
+        self._indice = OrderedDict()  # chave -> tamanho, do menos ao mais recente
+        self._tamanho_total = 0
+        os.makedirs(self.diretorio, exist_ok=True)
+        self._carregar_indice()
+
+    @staticmethod
+    def normalizar_texto(texto: str) -> str:
+        """Normaliza o texto para que diferenças de espaçamento não gerem chaves novas."""
+        return " ".join(unicodedata.normalize("NFC", texto).split())
+
+    @staticmethod
+    def gerar_chave(
+        texto: str,
+        voz: str,
+        velocidade: str = VELOCIDADE_TTS,
+        tom: str = TOM_TTS,
+        formato: str = FORMATO_AUDIO_TTS,
+        backend: str = "edge",
+    ) -> str:
+        """
+        Gera a chave do cache para um trecho e seus parâmetros de síntese.
+        O backend faz parte da chave para que áudio simulado nunca substitua o real.
+        """
+        conteudo = "\x1f".join(
+            [cacheAudio.normalizar_texto(texto), voz, velocidade, tom, formato, backend]
+        )
+        return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+
+    def _caminho(self, chave: str) -> str:
+        return os.path.join(self.diretorio, chave[:2], f"{chave}.mp3")
+
+    def _carregar_indice(self) -> None:
+        """Reconstrói o índice LRU a partir dos arquivos existentes (ordem por mtime)."""
+        entradas = []
+        for raiz, _, arquivos in os.walk(self.diretorio):
+            for nome in arquivos:
+                if not nome.endswith(".mp3"):
+                    continue
+                try:
+                    info = os.stat(os.path.join(raiz, nome))
+                except OSError:
+                    continue
+                entradas.append((info.st_mtime, nome[:-4], info.st_size))
+        for _, chave, tamanho in sorted(entradas):
+            self._indice[chave] = tamanho
+            self._tamanho_total += tamanho
+        self._remover_excedente()
+
+    def _tocar(self, chave: str) -> None:
+        """Marca a entrada como usada recentemente (memória e mtime em disco)."""
+        self._indice.move_to_end(chave)
+        try:
+            os.utime(self._caminho(chave))
+        except OSError:
+            pass
+
+    def _descartar(self, chave: str) -> None:
+        tamanho = self._indice.pop(chave, 0)
+        self._tamanho_total -= tamanho
+        try:
+            os.remove(self._caminho(chave))
+        except OSError:
+            pass
+
+    def _remover_excedente(self) -> None:
+        while self._tamanho_total > self.limite_bytes and self._indice:
+            chave = next(iter(self._indice))
+            self._descartar(chave)
+            self.remocoes += 1
+
+    def obter(self, chave: str) -> bytes:
+        """Retorna o áudio em cache ou None, contabilizando acerto/falha."""
+        if chave in self._indice:
+            try:
+                with open(self._caminho(chave), "rb") as f:
+                    dados = f.read()
+                self._tocar(chave)
+                self.acertos += 1
+                return dados
+            except OSError:
+                self._descartar(chave)
+        self.falhas += 1
+        return None
+
+    def copiar_para(self, chave: str, destino: str) -> bool:
+        """Copia o áudio em cache para `destino`. Retorna False em caso de falha no cache."""
+        if chave in self._indice:
+            try:
+                shutil.copyfile(self._caminho(chave), destino)
+                self._tocar(chave)
+                self.acertos += 1
+                return True
+            except OSError:
+                self._descartar(chave)
+        self.falhas += 1
+        return False
+
+    def guardar(self, chave: str, dados: bytes) -> None:
+        """Grava o áudio no cache de forma atômica e aplica o limite de tamanho."""
+        caminho = self._caminho(chave)
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        try:
+            fd, temporario = tempfile.mkstemp(dir=os.path.dirname(caminho))
+            with os.fdopen(fd, "wb") as f:
+                f.write(dados)
+            os.replace(temporario, caminho)
+        except OSError as e:
+            print(f"⚠️ Não foi possível gravar no cache: {e}")
+            return
+        self._tamanho_total += len(dados) - self._indice.get(chave, 0)
+        self._indice[chave] = len(dados)
+        self._indice.move_to_end(chave)
+        self._remover_excedente()
+
+    def guardar_arquivo(self, chave: str, origem: str) -> None:
+        """Grava no cache o conteúdo de um arquivo de áudio já sintetizado."""
+        with open(origem, "rb") as f:
+            self.guardar(chave, f.read())
+
+    def estatisticas(self) -> dict:
+        """Retorna os contadores de uso do cache."""
+        consultas = self.acertos + self.falhas
+        return {
+            "acertos": self.acertos,
+            "falhas": self.falhas,
+            "taxa_acerto": self.acertos / consultas if consultas else 0.0,
+            "remocoes": self.remocoes,
+            "entradas": len(self._indice),
+            "bytes": self._tamanho_total,
+        }
@@ -0,0 +1,332 @@
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import platform
+import resource
+import tempfile
+import contextlib
+import subprocess
+from configs import *
+
+
+class Benchmark:
+    """
+    Benchmark de ponta a ponta do pipeline texto → MP3 (o mesmo de Conversor.converter_arquivo)
+    usando o simulador de TTS, sem internet. Cada tamanho de corpus roda num subprocesso
+    separado para que o pico de memória (RSS) seja medido isoladamente.
+
+    Uso:
+        python benchmark.py                              # 10K, 100K, 1M, 10M e 50M
+        python benchmark.py --tamanhos 10K 1M --latencia 0.2
+        python benchmark.py --comparar antes.json depois.json
+        python benchmark.py --video 3600                 # vídeo de quadro estático × tela preta a 25 quadros/s
+    """
+
+    TAMANHOS_PADRAO = ["10K", "100K", "1M", "10M", "50M"]
+    VOZ = VOZES_PT_BR[0]
+
+    SUJEITOS = [
+        "O Dr. Almeida", "A Sra. Costa", "O professor", "A menina", "O velho pescador",
+        "A equipe da Av. Paulista", "O Prof. Henrique", "Maria", "O capitão", "A cidade",
+    ]
+    VERBOS = [
+        "caminhou até", "observou", "escreveu sobre", "lembrou de", "encontrou",
+        "comprou", "atravessou", "descreveu", "esqueceu", "voltou para",
+    ]
+    OBJETOS = [
+        "a velha estação de trem", "o mercado municipal", "as cartas antigas",
+        "o rio que cortava o vale", "a biblioteca da universidade", "o relatório anual",
+        "a casa amarela", "os documentos do cartório", "a praça central", "o porto",
+    ]
+    COMPLEMENTOS = [
+        "em {ano}", "por R$ {valor}", "entre {a}-{b} horas", "no dia {dia}",
+        "com {n} pessoas", "depois de {n} anos", "às pressas", "sem dizer nada",
+        "enquanto chovia", "como fazia todos os dias",
+    ]
+
+    @staticmethod
+    def interpretar_tamanho(valor: str) -> int:
+        """Converte "10K", "1M", "50M" ou um número de bytes em inteiro."""
+        valor = valor.strip().upper()
+        multiplicadores = {"K": 1024, "M": 1024**2, "G": 1024**3}
+        if valor and valor[-1] in multiplicadores:
+            return int(float(valor[:-1]) * multiplicadores[valor[-1]])
+        return int(valor)
+
+    @staticmethod
+    def gerar_corpus(caminho: str, tamanho: int, semente: int = 42) -> None:
+        """Gera um texto em PT-BR com capítulos, números, valores e abreviações."""
+        aleatorio = random.Random(semente)
+        escrito = 0
+        capitulo = 0
+        with open(caminho, "w", encoding="utf-8") as f:
+            while escrito < tamanho:
+                if capitulo == 0 or aleatorio.random() < 0.02:
+                    capitulo += 1
+                    bloco = f"CAPÍTULO {capitulo}\n\n"
+                else:
+                    frases = []
+                    for _ in range(aleatorio.randint(3, 8)):
+                        complemento = aleatorio.choice(Benchmark.COMPLEMENTOS).format(
+                            ano=aleatorio.randint(1890, 2024),
+                            valor=aleatorio.randint(1, 5000),
+                            a=aleatorio.randint(1, 11),
+                            b=aleatorio.randint(12, 23),
+                            dia=aleatorio.randint(1, 28),
+                            n=aleatorio.randint(2, 300),
+                        )
+                        frases.append(
+                            f"{aleatorio.choice(Benchmark.SUJEITOS)} "
+                            f"{aleatorio.choice(Benchmark.VERBOS)} "
+                            f"{aleatorio.choice(Benchmark.OBJETOS)} {complemento}"
+                            f"{aleatorio.choice(['.', '.', '.', '!', '?', '...'])}"
+                        )
+                    bloco = " ".join(frases) + "\n\n"
+                f.write(bloco)
+                escrito += len(bloco.encode("utf-8"))
+
+    @staticmethod
+    async def executar_um(caminho: str, args) -> dict:
+        """Converte um arquivo do corpus com o simulador e retorna as métricas."""
+        from conversor import Conversor
+        from tts_backend import backendTTS
+        from metricas import metricasJob
+
+        backend = backendTTS.criar(
+            "local",
+            latencia_media=args.latencia,
+            latencia_desvio=args.desvio,
+            segundos_por_caractere=args.segundos_por_caractere,
+            fator_tempo_real=args.tempo_real,
+            max_simultaneas=args.max_simultaneas,
+            taxa_erro=args.taxa_erro,
+            semente=args.semente,
+        )
+        with tempfile.TemporaryDirectory() as diretorio_saida:
+            inicio = time.perf_counter()
+            # O log por parte do pipeline é descartado para não poluir a medição.
+            # As métricas do job entram no resultado, sem gravar no arquivo de métricas
+            metricas = metricasJob(caminho, voz=Benchmark.VOZ, backend="local")
+            with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(
+                nulo
+            ), metricas.ativar():
+                resumo = await Conversor.converter_arquivo(
+                    caminho,
+                    Benchmark.VOZ,
+                    diretorio_saida=diretorio_saida,
+                    concorrencia=args.concorrencia,
+                    concorrencia_maxima=args.concorrencia_maxima,
+                    backend=backend,
+                    usar_cache=False,
+                )
+            total = time.perf_counter() - inicio
+            bytes_audio = (
+                os.path.getsize(resumo["saida"]) if resumo["saida"] else 0
+            )
+
+        # Contagem em blocos para não inflar o pico de memória medido
+        with open(caminho, encoding="utf-8") as f:
+            caracteres = sum(len(bloco) for bloco in iter(lambda: f.read(BUFFER_IO), ""))
+        sintese = resumo["etapas"].get("sintese") or total
+        return {
+            "arquivo": os.path.basename(caminho),
+            "bytes": os.path.getsize(caminho),
+            "caracteres": caracteres,
+            "status": resumo["status"],
+            "partes": resumo["partes"],
+            "tempo_total": total,
+            "partes_por_s": resumo["partes"] / sintese if sintese else 0.0,
+            "caracteres_por_s": caracteres / total if total else 0.0,
+            "tempo_primeiro_audio": resumo["tempo_primeiro_audio"],
+            "rss_pico_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            "bytes_audio": bytes_audio,
+            "etapas": resumo["etapas"],
+            "limpeza": resumo["limpeza"],
+            "metricas": metricas.finalizar(resumo["status"], None, None),
+            "concorrencia_final": resumo.get("concorrencia", {}).get("limite"),
+        }
+
+    @staticmethod
+    def medir_video(segundos: int, diretorio: str) -> dict:
+        """
+        Tempo para gerar o MP4 de um áudio de `segundos` segundos nos dois modos de
+        Audio.criar_video_com_audio: quadro estático (com cópia do áudio) e tela preta
+        a 25 quadros/s com o áudio recodificado.
+        """
+        from audio import Audio
+
+        audio = os.path.join(diretorio, f"tom_{segundos}s.mp3")
+        if not os.path.exists(audio):
+            print(f"📝 Gerando áudio de {segundos}s...")
+            subprocess.run(
+                [
+                    FFMPEG_BIN, "-y", "-v", "error", "-f", "lavfi", "-i", f"sine=f=440:d={segundos}",
+                    "-ac", "1", "-c:a", "libmp3lame", "-b:a", "48k", audio,
+                ],
+                check=True,
+            )
+        resultado = {"segundos_audio": segundos}
+        for modo, estatico in (("estatico", True), ("completo", False)):
+            print(f"⏱️ Vídeo {modo}...")
+            saida = os.path.join(diretorio, f"video_{modo}.mp4")
+            inicio = time.perf_counter()
+            with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+                Audio.criar_video_com_audio(audio, saida, segundos, estatico=estatico)
+            resultado[modo] = {
+                "tempo": time.perf_counter() - inicio,
+                "bytes": os.path.getsize(saida),
+            }
+            os.remove(saida)
+        resultado["reducao_tempo"] = 1 - resultado["estatico"]["tempo"] / resultado["completo"]["tempo"]
+        return resultado
+
+    @staticmethod
+    def medir_em_subprocesso(caminho: str, argv_simulador: list) -> dict:
+        resultado = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--executar-um", caminho]
+            + argv_simulador,
+            stdout=subprocess.PIPE,
+            text=True,
+            check=True,
+        )
+        return json.loads(resultado.stdout.strip().splitlines()[-1])
+
+    @staticmethod
+    def commit_atual() -> str:
+        try:
+            return subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"],
+                cwd=os.path.dirname(os.path.abspath(__file__)),
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+                check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return "desconhecido"
+
+    @staticmethod
+    def comparar(caminho_antes: str, caminho_depois: str) -> None:
+        """Compara dois arquivos de resultado, tamanho a tamanho."""
+        with open(caminho_antes, encoding="utf-8") as f:
+            antes = {r["arquivo"]: r for r in json.load(f)["resultados"]}
+        with open(caminho_depois, encoding="utf-8") as f:
+            depois = {r["arquivo"]: r for r in json.load(f)["resultados"]}
+        print(f"{'corpus':<22}{'caracteres/s':>28}{'tempo 1º áudio':>24}{'RSS (MB)':>22}")
+        for nome in sorted(set(antes) & set(depois), key=lambda n: antes[n]["bytes"]):
+            a, d = antes[nome], depois[nome]
+            variacao = (d["caracteres_por_s"] / a["caracteres_por_s"] - 1) * 100
+            print(
+                f"{nome:<22}"
+                f"{a['caracteres_por_s']:>10.0f} → {d['caracteres_por_s']:<8.0f}({variacao:+.0f}%)"
+                f"{a['tempo_primeiro_audio'] or 0:>10.2f} → {d['tempo_primeiro_audio'] or 0:<10.2f}"
+                f"{a['rss_pico_mb']:>8.0f} → {d['rss_pico_mb']:<8.0f}"
+            )
+
+    @staticmethod
+    def criar_parser() -> argparse.ArgumentParser:
+        parser = argparse.ArgumentParser(description=Benchmark.__doc__.split("\n")[1].strip())
+        parser.add_argument("--tamanhos", nargs="+", default=Benchmark.TAMANHOS_PADRAO)
+        parser.add_argument("--corpus", default=os.path.join(tempfile.gettempdir(), "conversor_tts_corpus"))
+        parser.add_argument("--saida", default="benchmark_resultados")
+        parser.add_argument("--comparar", nargs=2, metavar=("ANTES", "DEPOIS"))
+        parser.add_argument("--video", type=int, metavar="SEGUNDOS", help="Mede só a geração do MP4")
+        parser.add_argument("--executar-um", help=argparse.SUPPRESS)
+        simulador = parser.add_argument_group("simulador de TTS")
+        simulador.add_argument("--latencia", type=float, default=0.05)
+        simulador.add_argument("--desvio", type=float, default=0.02)
+        simulador.add_argument("--segundos-por-caractere", type=float, default=0.0005)
+        simulador.add_argument("--tempo-real", type=float, default=0.0)
+        simulador.add_argument("--max-simultaneas", type=int, default=0)
+        simulador.add_argument("--taxa-erro", type=float, default=0.0)
+        simulador.add_argument("--semente", type=int, default=42)
+        simulador.add_argument("--concorrencia", type=int, default=CONCORRENCIA_INICIAL)
+        simulador.add_argument("--concorrencia-maxima", type=int, default=CONCORRENCIA_MAXIMA)
+        return parser
+
+    @staticmethod
+    def main(argv: list) -> int:
+        args = Benchmark.criar_parser().parse_args(argv)
+
+        if args.executar_um:
+            resultado = asyncio.run(Benchmark.executar_um(args.executar_um, args))
+            print(json.dumps(resultado))
+            return 0
+
+        if args.comparar:
+            Benchmark.comparar(*args.comparar)
+            return 0
+
+        if args.video:
+            os.makedirs(args.corpus, exist_ok=True)
+            resultado = Benchmark.medir_video(args.video, args.corpus)
+            print(
+                f"   quadro estático: {resultado['estatico']['tempo']:.1f}s | "
+                f"tela preta 25 quadros/s: {resultado['completo']['tempo']:.1f}s | "
+                f"redução de {resultado['reducao_tempo']:.0%}"
+            )
+            os.makedirs(args.saida, exist_ok=True)
+            destino = os.path.join(
+                args.saida, f"video_{time.strftime('%Y%m%d-%H%M%S')}_{Benchmark.commit_atual()}.json"
+            )
+            with open(destino, "w", encoding="utf-8") as f:
+                json.dump(resultado, f, ensure_ascii=False, indent=2)
+            print(f"✅ Resultados gravados em {destino}")
+            return 0
+
+        # Repassa os parâmetros do simulador para os subprocessos
+        argv_simulador = []
+        for acao in Benchmark.criar_parser()._action_groups[-1]._group_actions:
+            argv_simulador += [acao.option_strings[0], str(getattr(args, acao.dest))]
+
+        os.makedirs(args.corpus, exist_ok=True)
+        resultados = []
+        for rotulo in args.tamanhos:
+            tamanho = Benchmark.interpretar_tamanho(rotulo)
+            caminho = os.path.join(args.corpus, f"corpus_{rotulo}.txt")
+            if not os.path.exists(caminho) or os.path.getsize(caminho) < tamanho:
+                print(f"📝 Gerando corpus de {rotulo}...")
+                Benchmark.gerar_corpus(caminho, tamanho, args.semente)
+            print(f"⏱️ Medindo {rotulo}...")
+            resultado = Benchmark.medir_em_subprocesso(caminho, argv_simulador)
+            print(
+                f"   {resultado['partes']} partes | {resultado['partes_por_s']:.1f} partes/s | "
+                f"{resultado['caracteres_por_s']:.0f} caracteres/s | "
+                f"1º áudio em {resultado['tempo_primeiro_audio'] or 0:.2f}s | "
+                f"RSS {resultado['rss_pico_mb']:.0f} MB"
+            )
+            resultados.append(resultado)
+
+        commit = Benchmark.commit_atual()
+        os.makedirs(args.saida, exist_ok=True)
+        destino = os.path.join(
+            args.saida, f"{time.strftime('%Y%m%d-%H%M%S')}_{commit}.json"
+        )
+        with open(destino, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "commit": commit,
+                    "data": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                    "python": platform.python_version(),
+                    "plataforma": platform.platform(),
+                    "parametros": {
+                        k: v
+                        for k, v in vars(args).items()
+                        if k not in ("comparar", "executar_um", "video")
+                    },
+                    "resultados": resultados,
+                },
+                f,
+                ensure_ascii=False,
+                indent=2,
+            )
+        print(f"✅ Resultados gravados em {destino}")
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(Benchmark.main(sys.argv[1:]))
@@ -0,0 +1,171 @@
+import os
+from configs import TITULO_ABERTURA
+from files_utils import filesUtils
+from metricas import metricasJob
+from mp3_quadros import quadrosMP3, concatenadorMP3
+
+_CAPITULOS_POR_INDICE = 255  # Limite de entradas de um quadro CTOC (contador de 1 byte)
+
+
+class capitulosAudio:
+    """
+    Capítulos do áudio de um job, acompanhados à medida que as partes são gravadas.
+    Cada capítulo começa numa parte (textFormat.gerar_partes abre uma parte nova em
+    cada título), então ele é um trecho contínuo de bytes da saída e o seu tempo é a
+    soma das durações das partes, medidas na síntese (jobJournal): nenhum áudio é
+    decodificado. Os capítulos não são unidades próprias da síntese nem da retomada:
+    as partes continuam sendo sintetizadas e gravadas em ordem numa única saída, e o
+    MP3 de um capítulo é só um recorte dela, copiado quando a última parte dele é
+    gravada (antes do fim do livro, mas depois de todos os capítulos anteriores).
+    """
+
+    def __init__(self, arquivo_saida: str, diretorio: str = None):
+        """`diretorio` recebe um MP3 por capítulo concluído (None não grava)."""
+        self.arquivo_saida = arquivo_saida
+        self.diretorio = diretorio
+        self.capitulos = []  # {"titulo", "inicio", "fim", "offset", "tamanho", "partes", "arquivo"}
+        self.marcados = False  # Algum capítulo veio de um título no texto
+        self._proxima = 0  # Posição (base 0) da próxima parte a contabilizar
+        self._segundos = 0.0
+        self._atual = None
+
+    def atualizar(self, chunks: list, fim: bool = False) -> list:
+        """
+        Contabiliza as partes concluídas do manifesto (em ordem) e fecha os capítulos
+        cuja última parte já foi gravada. `fim` indica que todas as partes foram
+        registradas e concluídas. Retorna os capítulos fechados nesta chamada.
+        """
+        fechados = []
+        while self._proxima < len(chunks) and chunks[self._proxima]["status"] == "concluido":
+            chunk = chunks[self._proxima]
+            if chunk.get("capitulo"):
+                self.marcados = True
+                if self._atual is not None:
+                    fechados.append(self._fechar())
+            if self._atual is None:
+                self._atual = {
+                    "titulo": chunk.get("capitulo") or TITULO_ABERTURA,
+                    "inicio": self._segundos,
+                    "fim": None,
+                    "offset": chunk["offset"],
+                    "tamanho": 0,
+                    "partes": 0,
+                    "arquivo": None,
+                }
+            self._atual["tamanho"] += chunk["tamanho"]
+            self._atual["partes"] += 1
+            self._segundos += self._duracao(chunk)
+            self._proxima += 1
+
+        # A parte seguinte já registrada abre outro capítulo: o atual está completo
+        seguinte = chunks[self._proxima] if self._proxima < len(chunks) else None
+        if self._atual is not None and seguinte is not None and seguinte.get("capitulo"):
+            self.marcados = True
+            fechados.append(self._fechar())
+        elif self._atual is not None and fim and seguinte is None:
+            fechados.append(self._fechar())
+        return fechados
+
+    def _duracao(self, chunk: dict) -> float:
+        if chunk.get("duracao") is not None:
+            return chunk["duracao"]
+        # Manifesto sem a duração da parte: lê só o trecho dela na saída
+        with open(self.arquivo_saida, "rb") as f:
+            return quadrosMP3.duracao(os.pread(f.fileno(), chunk["tamanho"], chunk["offset"]))
+
+    def _fechar(self) -> dict:
+        capitulo = self._atual
+        self._atual = None
+        capitulo["fim"] = self._segundos
+        self.capitulos.append(capitulo)
+        # Sem títulos no texto o livro inteiro seria um único "capítulo": não há o que separar
+        if self.diretorio and self.marcados and capitulo["tamanho"]:
+            numero = len(self.capitulos)
+            os.makedirs(self.diretorio, exist_ok=True)
+            capitulo["arquivo"] = os.path.join(
+                self.diretorio,
+                f"{numero:03d}_{filesUtils.limpar_nome_arquivo(capitulo['titulo'])}.mp3",
+            )
+            with metricasJob.etapa("exportacao_capitulos"):
+                concatenadorMP3.recortar(
+                    self.arquivo_saida,
+                    capitulo["offset"],
+                    capitulo["tamanho"],
+                    capitulo["arquivo"],
+                    capitulosAudio.tag_id3([], capitulo["titulo"]),
+                )
+            metricasJob.contar("capitulos_exportados")
+            print(f"📑 Capítulo {numero} pronto: {capitulo['arquivo']}")
+        return capitulo
+
+    @staticmethod
+    def _syncsafe(valor: int) -> bytes:
+        return bytes((valor >> deslocamento) & 0x7F for deslocamento in (21, 14, 7, 0))
+
+    @staticmethod
+    def _quadro(identificador: str, conteudo: bytes) -> bytes:
+        """Quadro ID3v2.4: identificador, tamanho syncsafe, flags zeradas e conteúdo."""
+        return identificador.encode("ascii") + capitulosAudio._syncsafe(len(conteudo)) + b"\x00\x00" + conteudo
+
+    @staticmethod
+    def _texto(titulo: str) -> bytes:
+        return capitulosAudio._quadro("TIT2", b"\x03" + titulo.encode("utf-8"))  # 3 = UTF-8
+
+    @staticmethod
+    def tag_id3(capitulos: list, titulo: str = None) -> bytes:
+        """
+        Tag ID3v2.4 com o título (TIT2) e, para cada capítulo, um quadro CHAP (início e
+        fim em milissegundos, com o título num TIT2 interno), listados em ordem por um
+        quadro CTOC de nível superior. Acima de 255 capítulos o CTOC principal aponta
+        para CTOCs intermediários, cada um com até 255.
+        """
+        quadros = [capitulosAudio._texto(titulo)] if titulo else []
+        ids = []
+        for numero, capitulo in enumerate(capitulos, 1):
+            ids.append(f"chp{numero}".encode("ascii"))
+            quadros.append(
+                capitulosAudio._quadro(
+                    "CHAP",
+                    ids[-1]
+                    + b"\x00"
+                    + round(capitulo["inicio"] * 1000).to_bytes(4, "big")
+                    + round(capitulo["fim"] * 1000).to_bytes(4, "big")
+                    + b"\xff" * 8  # Offsets em bytes não informados
+                    + capitulosAudio._texto(capitulo["titulo"]),
+                )
+            )
+
+        def indice(identificador: bytes, filhos: list, principal: bool) -> bytes:
+            flags = 0x03 if principal else 0x01  # Nível superior e/ou ordenado
+            return capitulosAudio._quadro(
+                "CTOC",
+                identificador + b"\x00" + bytes((flags, len(filhos))) + b"".join(f + b"\x00" for f in filhos),
+            )
+
+        if len(ids) > _CAPITULOS_POR_INDICE:
+            grupos = [ids[i : i + _CAPITULOS_POR_INDICE] for i in range(0, len(ids), _CAPITULOS_POR_INDICE)]
+            intermediarios = [f"toc{n}".encode("ascii") for n in range(1, len(grupos) + 1)]
+            quadros.append(indice(b"toc", intermediarios, True))
+            quadros += [indice(i, grupo, False) for i, grupo in zip(intermediarios, grupos)]
+        elif ids:
+            quadros.append(indice(b"toc", ids, True))
+
+        corpo = b"".join(quadros)
+        if not corpo:
+            return b""
+        return b"ID3\x04\x00\x00" + capitulosAudio._syncsafe(len(corpo)) + corpo
+
+    def gravar_marcadores(self, titulo: str = None) -> None:
+        """
+        Regrava a saída com a tag de capítulos no início (e um quadro Xing com a
+        duração total), copiando o áudio pelo kernel em vez de reprocessá-lo.
+        """
+        if not self.marcados:
+            return
+        with metricasJob.etapa("marcadores_capitulos"):
+            concatenadorMP3.concatenar(
+                [self.arquivo_saida],
+                self.arquivo_saida,
+                capitulosAudio.tag_id3(self.capitulos, titulo),
+            )
+        print(f"🔖 {len(self.capitulos)} marcador(es) de capítulo gravados no MP3.")
@@ -0,0 +1,411 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import contextlib
+from configs import *
+
+# Códigos de saída da linha de comando
+SAIDA_OK = 0
+SAIDA_FALHA_PARCIAL = 1  # Pelo menos uma entrada falhou
+SAIDA_USO_INVALIDO = 2  # Argumentos inválidos (mesmo código usado pelo argparse)
+SAIDA_INTERROMPIDO = 130  # Interrompido pelo usuário (CTRL + C)
+
+
+class CLI:
+    """
+    Linha de comando não interativa, alternativa ao menu do aioconsole.
+    Executa o mesmo pipeline (pdfCoverter → textFormat → Audio) para várias entradas
+    e imprime um resumo em JSON, para uso em scripts e servidores.
+
+    Exemplo:
+        python pdf_tts_converter_to_mp4.py convert livro1.pdf livro2.txt --voice 2 --out saida/
+    """
+
+    @staticmethod
+    def resolver_voz(valor: str) -> str:
+        """Aceita o nome completo da voz, o número no menu (1, 2, 3) ou o nome curto."""
+        if valor in VOZES_PT_BR:
+            return valor
+        if valor.isdigit() and 1 <= int(valor) <= len(VOZES_PT_BR):
+            return VOZES_PT_BR[int(valor) - 1]
+        for voz in VOZES_PT_BR:
+            if voz.lower().startswith(f"pt-br-{valor.lower()}"):
+                return voz
+        raise argparse.ArgumentTypeError(
+            f"voz desconhecida: {valor} (opções: {', '.join(VOZES_PT_BR)})"
+        )
+
+    @staticmethod
+    def velocidade(valor: str) -> float:
+        try:
+            velocidade = float(valor)
+        except ValueError:
+            velocidade = 0.0
+        if not (0.5 <= velocidade <= 2.0):
+            raise argparse.ArgumentTypeError("use um número entre 0.5 e 2.0")
+        return velocidade
+
+    @staticmethod
+    def criar_parser() -> argparse.ArgumentParser:
+        parser = argparse.ArgumentParser(
+            prog="pdf_tts_converter_to_mp4.py",
+            description="Conversor TTS: execute sem argumentos para abrir o menu interativo.",
+        )
+        subcomandos = parser.add_subparsers(dest="comando", required=True)
+
+        convert = subcomandos.add_parser(
+            "convert",
+            aliases=["converter"],
+            help="Converte arquivos TXT/PDF em áudio sem interação",
+        )
+        convert.add_argument("entradas", nargs="+", metavar="INPUT")
+        convert.add_argument(
+            "--voice",
+            "-v",
+            type=CLI.resolver_voz,
+            default=VOZES_PT_BR[0],
+            help="Voz (nome completo, número 1-3 ou nome curto, ex: antonio)",
+        )
+        convert.add_argument(
+            "--out",
+            "-o",
+            default=None,
+            help="Diretório de saída (padrão: <nome>_audio ao lado da entrada)",
+        )
+        convert.add_argument(
+            "--concurrency",
+            "-c",
+            type=int,
+            default=CONCORRENCIA_INICIAL,
+            help="Número inicial de partes sintetizadas simultaneamente (ajustado durante o job)",
+        )
+        convert.add_argument(
+            "--max-concurrency",
+            type=int,
+            default=CONCORRENCIA_MAXIMA,
+            help="Limite superior para o ajuste automático de simultaneidade",
+        )
+        convert.add_argument(
+            "--speed",
+            type=CLI.velocidade,
+            default=1.0,
+            help="Velocidade final do áudio (0.5 a 2.0)",
+        )
+        convert.add_argument(
+            "--format", choices=["mp3", "mp4"], default="mp3", help="Formato final"
+        )
+        convert.add_argument(
+            "--backend",
+            choices=["edge", "local", "servidor"],
+            default=BACKEND_TTS,
+            help="Mecanismo de síntese (local/servidor simulam o Edge TTS, sem internet)",
+        )
+        convert.add_argument(
+            "--pdf-workers",
+            type=int,
+            default=PDF_TRABALHADORES,
+            help="Processos usados para extrair o texto de PDFs em paralelo",
+        )
+        convert.add_argument(
+            "--cover", default=None, help="Imagem usada como quadro do vídeo (--format mp4)"
+        )
+        convert.add_argument(
+            "--title", default=None, help="Título escrito sobre o quadro do vídeo (--format mp4)"
+        )
+        convert.add_argument(
+            "--no-chapter-files",
+            action="store_true",
+            help="Não grava um MP3 por capítulo (os marcadores de capítulo são mantidos)",
+        )
+        convert.add_argument(
+            "--speed-workers",
+            type=int,
+            default=ATEMPO_TRABALHADORES,
+            help="Processos do FFmpeg usados para acelerar áudios longos em segmentos paralelos",
+        )
+        convert.add_argument(
+            "--metrics",
+            default=ARQUIVO_METRICAS,
+            help="Arquivo JSON-lines que recebe as métricas de cada entrada ('' desativa)",
+        )
+        convert.add_argument(
+            "--prometheus-textfile",
+            default=ARQUIVO_METRICAS_PROMETHEUS,
+            help="Textfile do Prometheus (node_exporter) regravado a cada entrada",
+        )
+        convert.add_argument(
+            "--summary",
+            default="-",
+            help="Arquivo para o resumo JSON ('-' para a saída padrão)",
+        )
+
+        lote = subcomandos.add_parser(
+            "batch",
+            aliases=["lote"],
+            help="Fila persistente para converter muitos documentos com o TTS compartilhado",
+        )
+        # Opções aceitas por todas as ações do lote
+        comum = argparse.ArgumentParser(add_help=False)
+        comum.add_argument(
+            "--db", default=ARQUIVO_FILA_JOBS, help="Banco SQLite da fila de jobs"
+        )
+        comum.add_argument(
+            "--summary",
+            default="-",
+            help="Arquivo para o resumo JSON ('-' para a saída padrão)",
+        )
+        acoes = lote.add_subparsers(dest="acao", required=True)
+
+        adicionar = acoes.add_parser("add", parents=[comum], help="Inclui documentos na fila")
+        adicionar.add_argument("entradas", nargs="+", metavar="INPUT")
+        adicionar.add_argument(
+            "--priority",
+            type=int,
+            default=0,
+            help=f"Prioridade: cada nível multiplica por {PESO_PRIORIDADE} a fatia do TTS do job",
+        )
+        adicionar.add_argument(
+            "--voice",
+            "-v",
+            type=CLI.resolver_voz,
+            default=VOZES_PT_BR[0],
+            help="Voz (nome completo, número 1-3 ou nome curto, ex: antonio)",
+        )
+        adicionar.add_argument(
+            "--out",
+            "-o",
+            default=None,
+            help="Diretório de saída (padrão: ao lado de cada entrada)",
+        )
+        adicionar.add_argument(
+            "--speed", type=CLI.velocidade, default=1.0, help="Velocidade final (0.5 a 2.0)"
+        )
+        adicionar.add_argument(
+            "--format", choices=["mp3", "mp4"], default="mp3", help="Formato final"
+        )
+
+        executar = acoes.add_parser("run", parents=[comum], help="Executa a fila até esvaziá-la")
+        executar.add_argument(
+            "--documents",
+            type=int,
+            default=LOTE_DOCUMENTOS_SIMULTANEOS,
+            help="Documentos em andamento ao mesmo tempo",
+        )
+        executar.add_argument(
+            "--concurrency",
+            "-c",
+            type=int,
+            default=CONCORRENCIA_INICIAL,
+            help="Requisições simultâneas iniciais ao TTS, somando todos os documentos",
+        )
+        executar.add_argument(
+            "--max-concurrency",
+            type=int,
+            default=CONCORRENCIA_MAXIMA,
+            help="Limite máximo de requisições simultâneas, somando todos os documentos",
+        )
+        executar.add_argument(
+            "--backend",
+            choices=["edge", "local", "servidor"],
+            default=BACKEND_TTS,
+            help="Mecanismo de síntese",
+        )
+        executar.add_argument(
+            "--pdf-workers",
+            type=int,
+            default=PDF_TRABALHADORES,
+            help="Processos usados para extrair o texto de PDFs em paralelo",
+        )
+        executar.add_argument(
+            "--speed-workers",
+            type=int,
+            default=ATEMPO_TRABALHADORES,
+            help="Processos do FFmpeg na aceleração de áudios longos",
+        )
+        executar.add_argument(
+            "--metrics",
+            default=ARQUIVO_METRICAS,
+            help="Arquivo JSON-lines que recebe as métricas de cada job ('' desativa)",
+        )
+        executar.add_argument(
+            "--prometheus-textfile",
+            default=ARQUIVO_METRICAS_PROMETHEUS,
+            help="Textfile do Prometheus (node_exporter) regravado a cada job",
+        )
+
+        estado = acoes.add_parser(
+            "status",
+            parents=[comum],
+            help="Profundidade da fila, progresso dos jobs e vazão agregada",
+        )
+        estado.add_argument("--job", type=int, default=None, help="Mostra só este job")
+        return parser
+
+    @staticmethod
+    async def converter_entradas(args) -> dict:
+        """Converte cada entrada em sequência e retorna o resumo do lote."""
+        from pdfParser import pdfCoverter
+        from conversor import Conversor
+        from audio import Audio
+        from audio_cache import cacheAudio
+        from tts_backend import backendTTS
+        from metricas import metricasJob
+
+        inicio = time.time()
+        cache = cacheAudio()
+        backend = backendTTS.criar(args.backend)
+        jobs = []
+        for entrada in args.entradas:
+            job = {"entrada": os.path.abspath(entrada), "status": "falha"}
+            metricas = metricasJob(entrada, voz=args.voice, backend=args.backend)
+            try:
+                if not os.path.isfile(entrada):
+                    raise Exception(f"❌ Arquivo não encontrado: {entrada}")
+                with metricas.ativar():
+                    caminho_txt = pdfCoverter.preparar_arquivo(entrada, args.pdf_workers)
+                    diretorio_saida = None
+                    if args.out:
+                        nome = os.path.splitext(os.path.basename(entrada))[0]
+                        diretorio_saida = os.path.join(args.out, f"{nome}_audio")
+                    job = await Conversor.converter_arquivo(
+                        caminho_txt,
+                        args.voice,
+                        diretorio_saida=diretorio_saida,
+                        concorrencia=args.concurrency,
+                        cache=cache,
+                        concorrencia_maxima=args.max_concurrency,
+                        backend=backend,
+                        exportar_capitulos=not args.no_chapter_files,
+                    )
+                    job["entrada"] = os.path.abspath(entrada)
+                    job["arquivos"] = [job["saida"]] if job["saida"] else []
+                    if job["status"] == "ok" and (args.speed != 1.0 or args.format == "mp4"):
+                        job["arquivos"] = Audio.melhorar_audio(
+                            job["saida"],
+                            args.speed,
+                            args.format,
+                            args.speed_workers,
+                            capa=args.cover,
+                            titulo=args.title,
+                            duracao_original=job["duracao_audio"],
+                            capitulos=job["capitulos"],
+                        )
+            except Exception as e:
+                print(f"\n❌ Erro ao converter {entrada}: {e}")
+                job["status"] = "falha"
+                job["erro"] = str(e)
+            job["metricas"] = metricas.finalizar(
+                job["status"], args.metrics, args.prometheus_textfile
+            )
+            jobs.append(job)
+
+        sucesso = sum(1 for j in jobs if j["status"] == "ok")
+        return {
+            "status": "ok" if sucesso == len(jobs) else "falha",
+            "total": len(jobs),
+            "sucesso": sucesso,
+            "falhas": len(jobs) - sucesso,
+            "tempo": time.time() - inicio,
+            "cache": cache.estatisticas(),
+            "jobs": jobs,
+        }
+
+    @staticmethod
+    async def executar_lote(args) -> dict:
+        """Executa uma ação do subcomando batch e retorna o resumo em JSON."""
+        from fila_jobs import filaJobs
+
+        fila = filaJobs(args.db)
+        try:
+            if args.acao == "add":
+                ausentes = [e for e in args.entradas if not os.path.isfile(e)]
+                if ausentes:
+                    print(f"❌ Arquivo(s) não encontrado(s): {', '.join(ausentes)}")
+                    return {"status": "falha", "erro": "arquivo não encontrado", "entradas": ausentes}
+                jobs = [
+                    fila.adicionar(
+                        entrada,
+                        args.voice,
+                        args.priority,
+                        os.path.abspath(args.out) if args.out else None,
+                        args.speed,
+                        args.format,
+                    )
+                    for entrada in args.entradas
+                ]
+                print(f"📥 {len(jobs)} documento(s) incluído(s) na fila.")
+                return {"status": "ok", "jobs": jobs, "fila": fila.profundidade()}
+
+            if args.acao == "status":
+                return {
+                    "status": "ok",
+                    "fila": fila.profundidade(),
+                    "vazao": fila.vazao(),
+                    "jobs": fila.progresso(args.job),
+                }
+
+            from lote import processadorLote
+            from audio_cache import cacheAudio
+            from tts_backend import backendTTS
+
+            inicio = time.time()
+            cache = cacheAudio()
+            processador = processadorLote(
+                fila,
+                backend=backendTTS.criar(args.backend),
+                cache=cache,
+                documentos=args.documents,
+                concorrencia=args.concurrency,
+                concorrencia_maxima=args.max_concurrency,
+                trabalhadores_pdf=args.pdf_workers,
+                trabalhadores_velocidade=args.speed_workers,
+                arquivo_metricas=args.metrics,
+                arquivo_prometheus=args.prometheus_textfile,
+            )
+            jobs = await processador.executar()
+            sucesso = sum(1 for j in jobs if j["status"] == "ok")
+            return {
+                "status": "ok" if sucesso == len(jobs) else "falha",
+                "total": len(jobs),
+                "sucesso": sucesso,
+                "falhas": len(jobs) - sucesso,
+                "tempo": time.time() - inicio,
+                "cache": cache.estatisticas(),
+                "concorrencia": processador.limitador.estado(),
+                "vazao": fila.vazao(),
+                "jobs": jobs,
+            }
+        finally:
+            fila.fechar()
+
+    @staticmethod
+    def gravar_resumo(resumo: dict, destino: str) -> None:
+        conteudo = json.dumps(resumo, ensure_ascii=False, indent=2)
+        if destino == "-":
+            print(conteudo)
+        else:
+            with open(destino, "w", encoding="utf-8") as f:
+                f.write(conteudo + "\n")
+
+    @staticmethod
+    def main(argv: list) -> int:
+        """Executa a linha de comando e retorna o código de saída."""
+        args = CLI.criar_parser().parse_args(argv)
+        if getattr(args, "concurrency", 1) < 1:
+            print("❌ --concurrency deve ser maior que zero", file=sys.stderr)
+            return SAIDA_USO_INVALIDO
+
+        executar = CLI.executar_lote if args.comando in ("batch", "lote") else CLI.converter_entradas
+        try:
+            # O progresso vai para stderr para que stdout contenha apenas o resumo JSON
+            with contextlib.redirect_stdout(sys.stderr):
+                resumo = asyncio.run(executar(args))
+        except KeyboardInterrupt:
+            print("\n⚠️ Conversão interrompida pelo usuário.", file=sys.stderr)
+            return SAIDA_INTERROMPIDO
+
+        CLI.gravar_resumo(resumo, args.summary)
+        return SAIDA_OK if resumo["status"] == "ok" else SAIDA_FALHA_PARCIAL
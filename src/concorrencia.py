@@ -0,0 +1,291 @@
+import time
+import asyncio
+import heapq
+from collections import deque
+from configs import *
+from resiliencia import politicaRetentativa, TRANSITORIO
+
+
+class limitadorAdaptativo:
+    """
+    Limite de requisições simultâneas ao TTS ajustado dinamicamente (AIMD).
+    A latência é modelada como um custo fixo por requisição mais um custo por
+    caractere (regressão com pesos exponenciais), então partes curtas não parecem
+    lentas. Enquanto a latência normalizada se mantém dentro da tolerância em relação
+    à melhor observada, o limite cresce aditivamente (cerca de +1 a cada `limite`
+    sucessos); só depois de AMOSTRAS_DERIVA amostras seguidas acima dela o limite
+    recua levemente. Em timeouts, throttling ou erros de rede (falhas transitórias) é
+    reduzido pela metade. Reduções respeitam um intervalo mínimo para que uma rajada
+    de falhas simultâneas não derrube o limite de uma vez.
+
+    Uso:
+        async with limitador:
+            ...
+            limitador.registrar_sucesso(latencia, len(texto))
+    """
+
+    ALFA_MEDIA = 0.2  # Peso de cada nova amostra na média móvel exponencial
+    ALFA_MODELO = 0.05  # Peso de cada amostra no modelo custo fixo + custo por caractere
+    AMOSTRAS_DERIVA = 5  # Amostras seguidas acima da tolerância antes de reduzir o limite
+    JANELA_VAZAO = 60.0  # Segundos considerados no cálculo da vazão
+
+    def __init__(
+        self,
+        inicial: int = CONCORRENCIA_INICIAL,
+        minimo: int = CONCORRENCIA_MINIMA,
+        maximo: int = CONCORRENCIA_MAXIMA,
+        tolerancia_latencia: float = TOLERANCIA_LATENCIA,
+    ):
+        self.minimo = max(1, minimo)
+        self.maximo = max(self.minimo, maximo)
+        self.limite = float(min(max(inicial, self.minimo), self.maximo))
+        self.tolerancia_latencia = tolerancia_latencia
+        self.em_uso = 0
+        self.sucessos = 0
+        self.falhas = 0
+        self._latencia_base = None  # Menor latência normalizada observada
+        self._latencia_media = None  # Média móvel da latência normalizada
+        self._modelo = None  # Médias ponderadas de caracteres, latência, caracteres² e caracteres×latência
+        self._caracteres_fixos = 0.0  # Custo fixo da requisição, em caracteres equivalentes
+        self._deriva = 0  # Amostras seguidas acima da tolerância
+        self._duracao_media = 1.0  # Média móvel da latência em segundos
+        self._ultima_reducao = 0.0
+        self._conclusoes = deque()  # (instante, caracteres)
+        self._condicao = asyncio.Condition()
+
+    @property
+    def limite_atual(self) -> int:
+        return int(self.limite)
+
+    async def __aenter__(self):
+        async with self._condicao:
+            await self._condicao.wait_for(lambda: self.em_uso < self.limite_atual)
+            self.em_uso += 1
+        return self
+
+    async def __aexit__(self, *exc):
+        async with self._condicao:
+            self.em_uso -= 1
+            self._condicao.notify_all()
+        return False
+
+    def _reduzir(self, fator: float) -> None:
+        agora = time.monotonic()
+        if agora - self._ultima_reducao < self._duracao_media:
+            return
+        self.limite = max(self.minimo, self.limite * fator)
+        self._ultima_reducao = agora
+
+    def registrar_sucesso(self, latencia: float, caracteres: int) -> None:
+        """Registra uma síntese concluída e ajusta o limite conforme a latência."""
+        self.sucessos += 1
+        agora = time.monotonic()
+        self._conclusoes.append((agora, caracteres))
+        while self._conclusoes and agora - self._conclusoes[0][0] > self.JANELA_VAZAO:
+            self._conclusoes.popleft()
+
+        self._atualizar_modelo(latencia, caracteres)
+        normalizada = latencia / max(self._caracteres_fixos + caracteres, 1)
+        if self._latencia_media is None:
+            self._latencia_media = normalizada
+            self._latencia_base = normalizada
+            self._duracao_media = latencia
+        else:
+            self._latencia_media += self.ALFA_MEDIA * (normalizada - self._latencia_media)
+            self._duracao_media += self.ALFA_MEDIA * (latencia - self._duracao_media)
+            # A base acompanha lentamente mudanças permanentes no serviço
+            self._latencia_base = min(self._latencia_media, self._latencia_base * 1.01)
+
+        if self._latencia_media <= self.tolerancia_latencia * self._latencia_base:
+            self._deriva = 0
+            self.limite = min(self.maximo, self.limite + 1 / self.limite)
+            return
+        # Oscilações isoladas não reduzem o limite: só uma alta sustentada
+        self._deriva += 1
+        if self._deriva >= self.AMOSTRAS_DERIVA:
+            self._deriva = 0
+            self._reduzir(0.9)
+
+    def _atualizar_modelo(self, latencia: float, caracteres: int) -> None:
+        """
+        Ajusta latência = custo fixo + custo por caractere × caracteres por mínimos
+        quadrados com pesos exponenciais e guarda o custo fixo em caracteres
+        equivalentes. Com partes todas do mesmo tamanho o ajuste anterior é mantido.
+        """
+        amostra = (caracteres, latencia, caracteres * caracteres, caracteres * latencia)
+        if self._modelo is None:
+            self._modelo = list(amostra)
+            return
+        self._modelo = [m + self.ALFA_MODELO * (a - m) for m, a in zip(self._modelo, amostra)]
+        media_x, media_y, media_xx, media_xy = self._modelo
+        variancia = media_xx - media_x * media_x
+        if variancia <= 1e-9 * max(media_xx, 1.0):
+            return
+        inclinacao = (media_xy - media_x * media_y) / variancia
+        if inclinacao <= 0:
+            return
+        fixo = media_y - inclinacao * media_x
+        self._caracteres_fixos = max(0.0, fixo) / inclinacao
+
+    def registrar_falha(self, erro: Exception = None) -> None:
+        """
+        Registra uma falha de síntese. Timeouts, throttling e erros de rede reduzem o
+        limite pela metade; falhas permanentes (voz inválida, requisição recusada) e
+        áudio vazio não indicam sobrecarga e não alteram o limite.
+        """
+        self.falhas += 1
+        if erro is not None and politicaRetentativa.classificar(erro) != TRANSITORIO:
+            return
+        self._reduzir(0.5)
+
+    def estado(self) -> dict:
+        """Retorna o limite atual e a vazão observada no último minuto."""
+        vazao_partes = vazao_caracteres = 0.0
+        if self._conclusoes:
+            intervalo = max(time.monotonic() - self._conclusoes[0][0], 1.0)
+            vazao_partes = len(self._conclusoes) / intervalo
+            vazao_caracteres = sum(c for _, c in self._conclusoes) / intervalo
+        return {
+            "limite": self.limite_atual,
+            "em_uso": self.em_uso,
+            "sucessos": self.sucessos,
+            "falhas": self.falhas,
+            "vazao_partes_s": vazao_partes,
+            "vazao_caracteres_s": vazao_caracteres,
+        }
+
+
+class cotaJob:
+    """
+    Vagas de um job num limitadorCompartilhado. Tem a mesma interface do
+    limitadorAdaptativo (async with, registrar_sucesso, registrar_falha, estado),
+    então o Conversor a usa no lugar do limitador próprio do job.
+    """
+
+    def __init__(self, limitador: "limitadorCompartilhado", nome: str, peso: float, ordem: int):
+        self.limitador = limitador
+        self.nome = nome
+        self.peso = peso
+        self.ordem = ordem
+        self.virtual = 0.0  # Vagas recebidas divididas pelo peso (tempo virtual do job)
+        self.em_uso = 0
+        self.sucessos = 0
+        self.caracteres = 0
+        self._esperando = deque()
+        self._na_fila = False
+
+    @property
+    def limite_atual(self) -> int:
+        return self.limitador.limite_atual
+
+    @property
+    def maximo(self) -> int:
+        return self.limitador.maximo
+
+    async def __aenter__(self):
+        await self.limitador._adquirir(self)
+        return self
+
+    async def __aexit__(self, *exc):
+        self.limitador._liberar(self)
+        return False
+
+    def registrar_sucesso(self, latencia: float, caracteres: int) -> None:
+        self.sucessos += 1
+        self.caracteres += caracteres
+        self.limitador.registrar_sucesso(latencia, caracteres)
+
+    def registrar_falha(self, erro: Exception = None) -> None:
+        self.limitador.registrar_falha(erro)
+
+    def estado(self) -> dict:
+        estado = self.limitador.estado()
+        estado.update(job=self.nome, peso=self.peso, em_uso_job=self.em_uso, sucessos_job=self.sucessos)
+        return estado
+
+
+class limitadorCompartilhado(limitadorAdaptativo):
+    """
+    Um único limite AIMD de requisições ao TTS dividido entre vários jobs (processamento
+    em lote). Cada job recebe uma cotaJob; quando há vaga, ela vai para o job em espera
+    que recebeu menos vagas em proporção ao seu peso (fila justa ponderada, por tempo
+    virtual de início), e não para quem pediu primeiro. O peso é PESO_PRIORIDADE
+    elevado à prioridade: um job de prioridade 1 recebe o dobro das vagas de um de
+    prioridade 0, sem que este fique parado. Um job que entra no meio do lote começa
+    no tempo virtual atual, sem "créditos" acumulados.
+    """
+
+    def __init__(self, *args, peso_prioridade: float = PESO_PRIORIDADE, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.peso_prioridade = peso_prioridade
+        self._fila = []  # heap de (tempo virtual, ordem, cota) dos jobs com pedidos em espera
+        self._relogio = 0.0  # Tempo virtual da última vaga concedida
+        self._ordem = 0
+        self._padrao = None
+
+    def cota(self, nome: str, prioridade: int = 0) -> cotaJob:
+        self._ordem += 1
+        cota = cotaJob(self, nome, self.peso_prioridade**prioridade, self._ordem)
+        cota.virtual = self._relogio
+        return cota
+
+    async def __aenter__(self):
+        if self._padrao is None:
+            self._padrao = self.cota("padrao")
+        await self._adquirir(self._padrao)
+        return self
+
+    async def __aexit__(self, *exc):
+        self._liberar(self._padrao)
+        return False
+
+    def _conceder(self, cota: cotaJob) -> None:
+        self.em_uso += 1
+        cota.em_uso += 1
+        self._relogio = max(self._relogio, cota.virtual)
+        cota.virtual = max(cota.virtual, self._relogio) + 1 / cota.peso
+
+    async def _adquirir(self, cota: cotaJob) -> None:
+        futuro = asyncio.get_running_loop().create_future()
+        cota._esperando.append(futuro)
+        if not cota._na_fila:
+            cota._na_fila = True
+            heapq.heappush(self._fila, (cota.virtual, cota.ordem, cota))
+        self._distribuir()
+        try:
+            await futuro
+        except asyncio.CancelledError:
+            if futuro.done() and not futuro.cancelled():
+                # A vaga chegou junto com o cancelamento: devolve para o próximo
+                self._liberar(cota)
+            raise
+
+    def _liberar(self, cota: cotaJob) -> None:
+        self.em_uso -= 1
+        cota.em_uso -= 1
+        self._distribuir()
+
+    def _distribuir(self) -> None:
+        """Entrega as vagas livres, uma a uma, ao job com menor tempo virtual."""
+        while self._fila and self.em_uso < self.limite_atual:
+            _, _, cota = heapq.heappop(self._fila)
+            cota._na_fila = False
+            while cota._esperando and cota._esperando[0].done():
+                cota._esperando.popleft()  # Pedidos cancelados
+            if not cota._esperando:
+                continue
+            self._conceder(cota)
+            cota._esperando.popleft().set_result(None)
+            if cota._esperando:
+                cota._na_fila = True
+                heapq.heappush(self._fila, (cota.virtual, cota.ordem, cota))
+
+    def registrar_sucesso(self, latencia: float, caracteres: int) -> None:
+        super().registrar_sucesso(latencia, caracteres)
+        # O limite pode ter crescido
+        self._distribuir()
+
+    def estado(self) -> dict:
+        estado = super().estado()
+        estado["jobs_em_espera"] = len(self._fila)
+        return estado
@@ -1,3 +1,5 @@
+import os
+
 manual_converser = {
     "UM": 1,
     "UMI": 2,
@@ -28,53 +30,119 @@ VOZES_PT_BR = [
 ]
 
 ENCODINGS_TENTATIVAS = ["utf-8", "utf-16", "iso-8859-1", "cp1252"]
+AMOSTRA_ENCODING_BYTES = 65536  # Início do arquivo analisado na detecção de encoding
+JANELAS_ENCODING = 8  # Trechos adicionais espalhados pelo arquivo na detecção de encoding
+TAMANHO_JANELA_ENCODING = 4096
+PDF_TRABALHADORES = os.cpu_count() or 1  # Processos usados na extração de texto de PDFs
+PDF_PAGINAS_POR_LOTE = 32  # Páginas extraídas por tarefa de cada processo
+PDF_MARGEM_CABECALHO = 0.1  # Fração superior da página onde ficam os cabeçalhos
+PDF_MARGEM_RODAPE = 0.1  # Fração inferior da página onde ficam os rodapés
+PDF_JANELA_CABECALHO = 4  # Páginas vizinhas (antes e depois) comparadas na detecção
+PDF_LIMIAR_CABECALHO = 0.4  # Fração das vizinhas em que o texto de margem precisa se repetir
 BUFFER_IO = 32768
-MAX_TENTATIVAS = 1  # Número máximo de tentativas por chunk
+LIMITE_PARAGRAFO_LEITURA = 65536  # Parágrafos maiores são cortados no fim de uma sentença na leitura incremental
+MAX_TENTATIVAS = 5  # Número máximo de tentativas por chunk
+MAX_TENTATIVAS_AUDIO_VAZIO = 2  # Tentativas quando o TTS responde sem áudio
+ESPERA_BASE_RETENTATIVA = 1.0  # Segundos; dobra a cada tentativa (com jitter)
+ESPERA_MAXIMA_RETENTATIVA = 60.0
+ORCAMENTO_RETENTATIVAS_FRACAO = 0.2  # Novas tentativas por job, em fração das partes
+ORCAMENTO_RETENTATIVAS_MINIMO = 20
+DISJUNTOR_JANELA = 20  # Últimas requisições consideradas pelo disjuntor
+DISJUNTOR_LIMIAR = 0.5  # Fração de falhas que abre o circuito
+DISJUNTOR_MINIMO = 5  # Requisições mínimas na janela antes de avaliar
+DISJUNTOR_ESPERA = 15.0  # Segundos com o circuito aberto (dobra a cada sonda falha)
+DISJUNTOR_ESPERA_MAXIMA = 300.0
 CANCELAR_PROCESSAMENTO = False
 FFMPEG_BIN = "ffmpeg"
 FFPROBE_BIN = "ffprobe"
 LIMITE_SEGUNDOS = 43200  # 12 horas para divisão de arquivos longos
+ATEMPO_TRABALHADORES = os.cpu_count() or 1  # Processos do FFmpeg na aceleração em segmentos paralelos
+ATEMPO_DURACAO_MINIMA_PARALELO = 1800  # Segundos; áudios mais curtos são acelerados num só processo
+ATEMPO_JANELA_SILENCIO = 30  # Segundos analisados em torno de cada corte em busca de silêncio
+ATEMPO_RUIDO_SILENCIO = "-35dB"  # Nível abaixo do qual o áudio é considerado silêncio
+ATEMPO_TOLERANCIA_DURACAO = 0.25  # Segundos de diferença aceitos por segmento na validação
+ATEMPO_SEGMENTO_MINIMO = 1.0  # Segundos mínimos entre cortes (e até o início e o fim do áudio)
+CODIFICACAO_AUDIO_MP4 = ["-c:a", "aac", "-b:a", "192k"]  # Áudio dos vídeos gerados
+CODECS_AUDIO_MP4 = ("mp3", "aac")  # Codecs copiados para o MP4 sem recodificar
+VIDEO_QUADRO_ESTATICO = True  # Vídeo de uma única imagem a poucos quadros/s (False: tela preta a 25 quadros/s)
+VIDEO_QUADROS_POR_SEGUNDO = 1
+VIDEO_RESOLUCAO = (1280, 720)
+VIDEO_FONTE = None  # Arquivo de fonte do título no vídeo (None usa a fonte padrão do fontconfig)
+LIMITE_CHUNK_CARACTERES = 2500  # Tamanho máximo de cada requisição ao TTS
+LIMITE_CHUNK_BYTES = 4000  # Limite em bytes UTF-8 (o Edge TTS aceita até 4096)
+BACKEND_TTS = "edge"  # "edge", "local" (simulador offline) ou "servidor" (simulador via TCP)
+FORMATO_AUDIO_TTS = "audio-24khz-48kbitrate-mono-mp3"  # Formato padrão do Edge TTS
+VELOCIDADE_TTS = "+0%"
+TOM_TTS = "+0Hz"
+DIRETORIO_CACHE = os.path.join(os.path.expanduser("~"), ".cache", "conversor_tts")
+ARQUIVO_METRICAS = os.path.join(DIRETORIO_CACHE, "metricas.jsonl")  # Uma linha JSON por job
+ARQUIVO_METRICAS_PROMETHEUS = None  # Ex: /var/lib/node_exporter/textfile/conversor_tts.prom
+ARQUIVO_FILA_JOBS = os.path.join(DIRETORIO_CACHE, "fila.sqlite3")  # Jobs e partes do processamento em lote
+CONCORRENCIA_INICIAL = 5  # Requisições simultâneas ao TTS no início do job
+CONCORRENCIA_MINIMA = 1
+CONCORRENCIA_MAXIMA = 32
+TOLERANCIA_LATENCIA = 1.5  # Latência aceita, em múltiplos da melhor observada
+LOTE_DOCUMENTOS_SIMULTANEOS = 4  # Documentos do lote em andamento ao mesmo tempo, dividindo o limite do TTS
+PESO_PRIORIDADE = 2  # Cada nível de prioridade multiplica a fatia das vagas do TTS dada ao job
+JANELA_VAZAO_LOTE = 300  # Segundos considerados na vazão agregada do lote
+SIMULADOR_LATENCIA_MEDIA = 0.4  # Segundos até o primeiro byte no simulador de TTS
+SIMULADOR_LATENCIA_DESVIO = 0.2
+SIMULADOR_SEGUNDOS_POR_CARACTERE = 0.065  # Duração do áudio simulado por caractere
+SIMULADOR_FATOR_TEMPO_REAL = 0.05  # Fração da duração do áudio gasta na transmissão
+SIMULADOR_MAX_SIMULTANEAS = 16  # Acima disso o simulador responde HTTP 429
+SIMULADOR_TAXA_ERRO = 0.0
+SIMULADOR_TAXA_AUDIO_VAZIO = 0.0
+JANELA_REORDENACAO_POR_TAREFA = 4  # Partes à frente da próxima a gravar, por tarefa simultânea
+EXPORTAR_CAPITULOS = True  # Grava cada capítulo num MP3 próprio assim que a última parte dele fica pronta
+TITULO_ABERTURA = "Abertura"  # Marcador do trecho anterior ao primeiro capítulo (índice, prefácio)
+LIMITE_TITULO_CAPITULO = 80  # Caracteres do título de capítulo usado nos marcadores
+LIMITE_CACHE_BYTES = 2 * 1024**3  # 2 GB de áudio sintetizado em cache
+LIMITE_DIGITOS_EXTENSO = 15  # Números mais longos são lidos dígito a dígito
+TAMANHO_CACHE_NUMEROS = 65536  # Números já convertidos por extenso mantidos em memória
+FUNDIR_ETAPAS_TEXTO = True  # Une etapas compatíveis da limpeza de texto numa só varredura (False mede cada etapa isoladamente)
 
 
+# Abreviação (texto literal, com o ponto) → expansão lida pelo TTS.
+# Novos termos podem ser incluídos em tempo de execução com textFormat.registrar_abreviacao.
 abreviacoes = {
-    r"\bDr\.(?=\s)": "Doutor",
-    r"\bD\.(?=\s)": "Dona",
-    r"\bDra\.(?=\s)": "Doutora",
-    r"\bSr\.(?=\s)": "Senhor",
-    r"\bSra\.(?=\s)": "Senhora",
-    r"\bSrta\.(?=\s)": "Senhorita",
-    r"\bProf\.(?=\s)": "Professor",
-    r"\bProfa\.(?=\s)": "Professora",
-    r"\bEng\.(?=\s)": "Engenheiro",
-    r"\bEngª\.(?=\s)": "Engenheira",
-    r"\bAdm\.(?=\s)": "Administrador",
-    r"\bAdv\.(?=\s)": "Advogado",
-    r"\bExmo\.(?=\s)": "Excelentíssimo",
-    r"\bExma\.(?=\s)": "Excelentíssima",
-    r"\bV\.Exa\.(?=\s)": "Vossa Excelência",
-    r"\bV\.Sa\.(?=\s)": "Vossa Senhoria",
-    r"\bAv\.(?=\s)": "Avenida",
-    r"\bR\.(?=\s)": "Rua",
-    r"\bKm\.(?=\s)": "Quilômetro",
-    r"\betc\.(?=\s)": "etcétera",
-    r"\bRef\.(?=\s)": "Referência",
-    r"\bPag\.(?=\s)": "Página",
-    r"\bPág\.(?=\s)": "Página",
-    r"\bPágs\.(?=\s)": "Páginas",
-    r"\bPags\.(?=\s)": "Páginas",
-    r"\bFl\.(?=\s)": "Folha",
-    r"\bPe\.(?=\s)": "Padre",
-    r"\bFls\.(?=\s)": "Folhas",
-    r"\bDept\.(?=\s)": "Departamento",
-    r"\bDepto\.(?=\s)": "Departamento",
-    r"\bUniv\.(?=\s)": "Universidade",
-    r"\bInst\.(?=\s)": "Instituição",
-    r"\bEst\.(?=\s)": "Estado",
-    r"\bTel\.(?=\s)": "Telefone",
-    r"\bCEP\.(?=\s)": "Código de Endereçamento Postal",
-    r"\bCNPJ\.(?=\s)": "Cadastro Nacional da Pessoa Jurídica",
-    r"\bCPF\.(?=\s)": "Cadastro de Pessoas Físicas",
-    r"\bEUA\.(?=\s)": "Estados Unidos da América",
-    r"\bEd\.(?=\s)": "Edição",
-    r"\bLtda\.(?=\s)": "Limitada",
+    "Dr.": "Doutor",
+    "D.": "Dona",
+    "Dra.": "Doutora",
+    "Sr.": "Senhor",
+    "Sra.": "Senhora",
+    "Srta.": "Senhorita",
+    "Prof.": "Professor",
+    "Profa.": "Professora",
+    "Eng.": "Engenheiro",
+    "Engª.": "Engenheira",
+    "Adm.": "Administrador",
+    "Adv.": "Advogado",
+    "Exmo.": "Excelentíssimo",
+    "Exma.": "Excelentíssima",
+    "V.Exa.": "Vossa Excelência",
+    "V.Sa.": "Vossa Senhoria",
+    "Av.": "Avenida",
+    "R.": "Rua",
+    "Km.": "Quilômetro",
+    "etc.": "etcétera",
+    "Ref.": "Referência",
+    "Pag.": "Página",
+    "Pág.": "Página",
+    "Págs.": "Páginas",
+    "Pags.": "Páginas",
+    "Fl.": "Folha",
+    "Pe.": "Padre",
+    "Fls.": "Folhas",
+    "Dept.": "Departamento",
+    "Depto.": "Departamento",
+    "Univ.": "Universidade",
+    "Inst.": "Instituição",
+    "Est.": "Estado",
+    "Tel.": "Telefone",
+    "CEP.": "Código de Endereçamento Postal",
+    "CNPJ.": "Cadastro Nacional da Pessoa Jurídica",
+    "CPF.": "Cadastro de Pessoas Físicas",
+    "EUA.": "Estados Unidos da América",
+    "Ed.": "Edição",
+    "Ltda.": "Limitada",
 }
@@ -0,0 +1,406 @@
+import os
+import asyncio
+import time
+from configs import *
+from formatText import textFormat
+from files_utils import filesUtils
+from audio import Audio
+from audio_cache import cacheAudio
+from job_journal import jobJournal
+from montador_audio import montadorAudio
+from concorrencia import limitadorAdaptativo
+from tts_backend import backendTTS
+from metricas import metricasJob
+from mp3_quadros import quadrosMP3
+from capitulos import capitulosAudio
+from resiliencia import politicaRetentativa, disjuntorCircuito, audioVazioErro, TRANSITORIO
+
+_FIM = object()
+
+
+class Conversor:
+    """
+    Pipeline de conversão sem interação com o usuário:
+    leitura do texto → processamento → divisão em partes → síntese → montagem em ordem.
+    É usado tanto pelo menu interativo quanto pela linha de comando.
+    """
+
+    @staticmethod
+    def _cronometrar(gerador, etapas: dict, nome: str):
+        """Repassa os itens do gerador somando em etapas[nome] o tempo gasto em cada um."""
+        iterador = iter(gerador)
+        while True:
+            marca = time.perf_counter()
+            item = next(iterador, _FIM)
+            etapas[nome] += time.perf_counter() - marca
+            if item is _FIM:
+                return
+            yield item
+
+    @staticmethod
+    def gerar_partes(caminho_arquivo: str, etapas: dict = None, limpeza: dict = None):
+        """
+        Lê, processa e divide o arquivo sob demanda, gerando as partes prontas para
+        a síntese com memória limitada, independente do tamanho do livro.
+        `limpeza` acumula o relatório das etapas de textFormat.processar_texto.
+        Gera pares (parte, título do capítulo que começa nela ou None).
+        """
+        etapas = {} if etapas is None else etapas
+        for nome in ("leitura", "processamento", "divisao"):
+            etapas[nome] = 0.0
+        paragrafos = Conversor._cronometrar(
+            filesUtils.ler_paragrafos(caminho_arquivo), etapas, "leitura"
+        )
+        processados = Conversor._cronometrar(
+            textFormat.processar_paragrafos(paragrafos, limpeza, com_titulos=True),
+            etapas,
+            "processamento",
+        )
+        return Conversor._cronometrar(
+            textFormat.gerar_partes(processados, com_titulos=True), etapas, "divisao"
+        )
+
+    @staticmethod
+    def _descontar_etapas(etapas: dict) -> None:
+        # Cada etapa puxa a anterior, então o tempo medido inclui o das etapas anteriores
+        etapas["divisao"] -= etapas["processamento"]
+        etapas["processamento"] -= etapas["leitura"]
+
+    @staticmethod
+    async def converter_arquivo(
+        caminho_arquivo: str,
+        voz: str,
+        diretorio_saida: str = None,
+        concorrencia: int = CONCORRENCIA_INICIAL,
+        cache: cacheAudio = None,
+        concorrencia_maxima: int = CONCORRENCIA_MAXIMA,
+        backend: backendTTS = None,
+        usar_cache: bool = True,
+        exportar_capitulos: bool = EXPORTAR_CAPITULOS,
+        limitador: limitadorAdaptativo = None,
+        acompanhamento=None,
+    ) -> dict:
+        """
+        Converte um arquivo TXT já preparado em um MP3 e retorna um resumo do job.
+        `concorrencia` é o número inicial de requisições simultâneas, ajustado durante
+        o job até `concorrencia_maxima`. `backend` define o mecanismo de síntese
+        (padrão: BACKEND_TTS). O campo "status" do resumo é "ok", "falha" ou "vazio";
+        "etapas" traz o tempo gasto em cada etapa, "limpeza" o tempo e os bytes alterados
+        por etapa da limpeza do texto, "tempo_primeiro_audio" o tempo até a primeira
+        parte ser gravada na saída e "duracao_audio" a duração do MP3 em segundos.
+        Os títulos "CAPÍTULO ..." do texto viram marcadores de capítulo no MP3 (ID3
+        CHAP/CTOC), listados em "capitulos"; com `exportar_capitulos`, cada capítulo é
+        também recortado da saída num MP3 próprio quando a última parte dele é gravada.
+        `limitador` substitui o limitador próprio do job (ex: a cotaJob de um
+        limitadorCompartilhado, no processamento em lote) e `acompanhamento` recebe
+        o progresso de cada parte (ver acompanhamentoJob).
+        As métricas vão para o job de metricasJob ativo; sem um, o próprio job é criado
+        e gravado ao final.
+        """
+        if metricasJob.atual() is None:
+            metricas = metricasJob(caminho_arquivo, voz=voz)
+            resumo = None
+            with metricas.ativar():
+                try:
+                    resumo = await Conversor.converter_arquivo(
+                        caminho_arquivo,
+                        voz,
+                        diretorio_saida,
+                        concorrencia,
+                        cache,
+                        concorrencia_maxima,
+                        backend,
+                        usar_cache,
+                        exportar_capitulos,
+                        limitador,
+                        acompanhamento,
+                    )
+                finally:
+                    metricas.finalizar(resumo["status"] if resumo else "erro")
+            return resumo
+
+        inicio = time.time()
+        metricas = metricasJob.atual()
+        etapas = {}
+        limpeza = {}
+        resumo = {
+            "entrada": os.path.abspath(caminho_arquivo),
+            "voz": voz,
+            "status": "falha",
+            "saida": None,
+            "partes": 0,
+            "partes_falhas": 0,
+            "tempo": 0.0,
+            "tempo_primeiro_audio": None,
+            "duracao_audio": None,
+            "capitulos": [],
+            "etapas": etapas,
+            "limpeza": limpeza,
+        }
+
+        nome_base = os.path.splitext(os.path.basename(caminho_arquivo))[0]
+        nome_base = filesUtils.limpar_nome_arquivo(nome_base)
+        if diretorio_saida is None:
+            diretorio_saida = os.path.join(
+                os.path.dirname(caminho_arquivo), f"{nome_base}_audio"
+            )
+        arquivo_final = os.path.join(diretorio_saida, f"{nome_base}.mp3")
+
+        print("\n📖 Lendo arquivo...")
+        # O texto é lido, processado e dividido sob demanda, conforme as partes são sintetizadas
+        partes = Conversor.gerar_partes(caminho_arquivo, etapas, limpeza)
+        journal = jobJournal.abrir(
+            os.path.join(diretorio_saida, f"{nome_base}.job.json"),
+            caminho_arquivo,
+            voz,
+            arquivo_final,
+        )
+
+        def registrar(item):
+            parte, capitulo = item
+            concluida = journal.registrar_parte(parte, capitulo)
+            if acompanhamento is not None:
+                acompanhamento.parte_registrada(len(journal.chunks), len(parte), capitulo, concluida)
+            return concluida
+
+        # As partes concluídas numa execução anterior formam um prefixo da saída
+        primeira_pendente = None
+        for item in partes:
+            if not registrar(item):
+                primeira_pendente = item[0]
+                break
+        if not journal.chunks or CANCELAR_PROCESSAMENTO:
+            print("\n❌ Arquivo vazio ou ilegível")
+            resumo["status"] = "vazio"
+            return resumo
+        if journal.concluidos():
+            print(
+                f"♻️ Retomando conversão: {journal.concluidos()} parte(s) já concluída(s)."
+            )
+
+        if not os.path.exists(diretorio_saida):
+            os.makedirs(diretorio_saida)
+
+        if cache is None and usar_cache:
+            cache = cacheAudio()
+        if backend is None:
+            backend = backendTTS.padrao()
+        if limitador is None:
+            limitador = limitadorAdaptativo(
+                inicial=concorrencia, maximo=max(concorrencia, concorrencia_maxima)
+            )
+
+        duracoes = {}  # Duração de cada parte sintetizada, até ela ser gravada
+        capitulos = capitulosAudio(
+            arquivo_final,
+            os.path.join(diretorio_saida, "capitulos") if exportar_capitulos else None,
+        )
+
+        def ao_gravar(indice, offset, tamanho):
+            if resumo["tempo_primeiro_audio"] is None:
+                resumo["tempo_primeiro_audio"] = time.time() - inicio
+            duracao = duracoes.pop(indice, None)
+            journal.marcar_concluido(indice, offset, tamanho, duracao)
+            if acompanhamento is not None:
+                acompanhamento.parte_concluida(indice, tamanho, duracao)
+            capitulos.atualizar(journal.chunks)
+
+        # O arquivo final é montado em ordem enquanto as partes são sintetizadas
+        bytes_iniciais = journal.bytes_confirmados()
+        montador = montadorAudio(
+            arquivo_final,
+            proxima=len(journal.chunks) + (0 if primeira_pendente is not None else 1),
+            bytes_gravados=bytes_iniciais,
+            janela=JANELA_REORDENACAO_POR_TAREFA * limitador.maximo,
+            ao_gravar=ao_gravar,
+        )
+        total_partes = None
+
+        async def sintetizar(parte):
+            # Acertos no cache não ocupam vaga nem entram na medição de latência
+            if cache is not None:
+                chave = cacheAudio.gerar_chave(parte, voz, backend=backend.nome)
+                dados = cache.obter(chave)
+                if dados is not None:
+                    metricasJob.contar("partes_do_cache")
+                    return dados
+            async with limitador:
+                inicio_sintese = time.time()
+                metricasJob.contar("requisicoes_tts")
+                metricasJob.contar("caracteres_enviados", len(parte))
+                try:
+                    dados = await Audio.sintetizar_bytes(parte, voz, backend=backend)
+                except Exception as e:
+                    limitador.registrar_falha(e)
+                    raise
+                latencia = time.time() - inicio_sintese
+                metricasJob.observar("latencia_tts_segundos", latencia)
+                if dados is not None:
+                    metricasJob.contar("bytes_recebidos", len(dados))
+                    limitador.registrar_sucesso(latencia, len(parte))
+                    if cache is not None:
+                        cache.guardar(chave, dados)
+                return dados
+
+        # O total de partes só é conhecido no fim da leitura: o orçamento usa uma estimativa
+        politica = politicaRetentativa(
+            orcamento=politicaRetentativa.orcamento_para(
+                os.path.getsize(caminho_arquivo) // LIMITE_CHUNK_CARACTERES + 1
+            )
+        )
+        disjuntor = disjuntorCircuito()
+
+        async def processar_chunk(i, parte):
+            if not await montador.aguardar_vez(i):
+                return None
+
+            tentativa = 1
+            while True:
+                sonda = await disjuntor.aguardar(desistir=lambda: montador.falhou)
+                if CANCELAR_PROCESSAMENTO or montador.falhou:
+                    disjuntor.liberar_sonda(sonda)
+                    return None
+
+                inicio_chunk = time.time()
+                try:
+                    dados = await sintetizar(parte)
+                    if dados is None:
+                        raise audioVazioErro("o TTS não retornou áudio")
+                except asyncio.CancelledError:
+                    disjuntor.liberar_sonda(sonda)
+                    raise
+                except Exception as e:
+                    classe = politicaRetentativa.classificar(e)
+                    metricasJob.contar("falhas_tts", classe=classe)
+                    # Só falhas transitórias indicam problema no serviço
+                    disjuntor.registrar(classe != TRANSITORIO, sonda)
+                    if not politica.pode_tentar(classe, tentativa):
+                        metricasJob.contar("falhas_definitivas", classe=classe)
+                        print(
+                            f"❌ Falha definitiva na parte {i} após {tentativa} tentativa(s) ({classe}): {e}"
+                        )
+                        # As partes seguintes não podem ser montadas sem esta
+                        await montador.abortar()
+                        return False
+                    espera = politica.espera(tentativa)
+                    metricasJob.contar("retentativas", classe=classe)
+                    print(
+                        f"🔄 Tentativa {tentativa}/{politica.max_tentativas} falhou para parte {i} ({classe}: {e}). Nova tentativa em {espera:.1f}s..."
+                    )
+                    tentativa += 1
+                    await asyncio.sleep(espera)
+                    continue
+
+                disjuntor.registrar(True, sonda)
+                duracoes[i] = quadrosMP3.duracao(dados)
+                await montador.entregar(i, dados)
+                tempo_chunk = time.time() - inicio_chunk
+                print(
+                    f"✅ Parte {i}/{total_partes or '?'} | Tentativa {tentativa}/{politica.max_tentativas} | Tempo: {tempo_chunk:.1f}s | Simultâneas: {limitador.limite_atual}"
+                )
+                return True
+
+        tarefas = set()
+        erros = []
+
+        def ao_terminar(tarefa):
+            tarefas.discard(tarefa)
+            if not tarefa.cancelled() and tarefa.exception() is not None:
+                erros.append(tarefa.exception())
+                asyncio.ensure_future(montador.abortar())
+
+        marca = time.perf_counter()
+        try:
+            parte = primeira_pendente
+            while parte is not None and not erros and not CANCELAR_PROCESSAMENTO:
+                i = len(journal.chunks)
+                # Só lê mais texto quando a parte cabe na janela de reordenação
+                if not await montador.aguardar_vez(i):
+                    break
+                tarefa = asyncio.ensure_future(processar_chunk(i, parte))
+                tarefas.add(tarefa)
+                tarefa.add_done_callback(ao_terminar)
+                item = next(partes, None)
+                if item is not None:
+                    parte = item[0]
+                    registrar(item)
+                else:
+                    parte = None
+                    total_partes = len(journal.chunks)
+            if tarefas:
+                await asyncio.gather(*list(tarefas))
+            if erros:
+                raise erros[0]
+        finally:
+            # Em caso de erro, nenhuma tarefa pode continuar gravando após o fechamento
+            pendentes = list(tarefas)
+            for tarefa in pendentes:
+                tarefa.cancel()
+            await asyncio.gather(*pendentes, return_exceptions=True)
+            # O prefixo já montado fica no disco para a retomada
+            montador.fechar()
+            journal.salvar(forcar=True)
+            etapas["sintese"] = time.perf_counter() - marca
+
+        if total_partes is None and not CANCELAR_PROCESSAMENTO:
+            # Após uma falha, o restante do texto só é percorrido para contar as partes
+            for item in partes:
+                registrar(item)
+            total_partes = len(journal.chunks)
+        Conversor._descontar_etapas(etapas)
+        resumo["partes"] = total_partes or len(journal.chunks)
+        for nome, segundos in etapas.items():
+            metricas.registrar_etapa(nome, segundos)
+        metricasJob.registrar_limpeza("tts", limpeza)
+        metricasJob.contar("bytes_lidos", os.path.getsize(caminho_arquivo))
+        metricasJob.contar("partes", resumo["partes"])
+        metricasJob.contar("bytes_gravados", montador.bytes_gravados - bytes_iniciais)
+        metricasJob.contar("aberturas_disjuntor", disjuntor.aberturas)
+        metricasJob.anotar("tempo_primeiro_audio", resumo["tempo_primeiro_audio"])
+        print(f"\n📊 Texto dividido em {resumo['partes']} parte(s).")
+
+        resumo["cache"] = cache.estatisticas() if cache is not None else None
+        resumo["concorrencia"] = limitador.estado()
+        resumo["retentativas"] = politica.estado()
+        resumo["retentativas"]["aberturas_disjuntor"] = disjuntor.aberturas
+        print(
+            f"⚙️ Simultâneas ao final: {resumo['concorrencia']['limite']} | "
+            f"Vazão: {resumo['concorrencia']['vazao_caracteres_s']:.0f} caracteres/s"
+        )
+        if cache is not None:
+            print(
+                f"\n💾 Cache: {resumo['cache']['acertos']} acerto(s), "
+                f"{resumo['cache']['falhas']} falha(s) "
+                f"({resumo['cache']['taxa_acerto']:.0%} de aproveitamento)"
+            )
+
+        # Verificar se todas as partes foram convertidas
+        resumo["partes_falhas"] = resumo["partes"] - journal.concluidos()
+        resumo["tempo"] = time.time() - inicio
+        if resumo["partes_falhas"]:
+            print("\n⚠️ Algumas partes falharam. O áudio final está incompleto.")
+            print(
+                "💡 Rode a conversão novamente para sintetizar apenas as partes que faltam."
+            )
+            return resumo
+
+        # A duração vem das partes, medidas na síntese: o arquivo final não é lido de novo
+        resumo["duracao_audio"] = journal.duracao_total()
+        if resumo["duracao_audio"] is None:
+            resumo["duracao_audio"] = quadrosMP3.duracao_arquivo(arquivo_final)
+        metricasJob.contar("segundos_audio", resumo["duracao_audio"])
+        capitulos.atualizar(journal.chunks, fim=True)
+        capitulos.gravar_marcadores(nome_base)
+        if capitulos.marcados:
+            resumo["capitulos"] = [
+                {chave: c[chave] for chave in ("titulo", "inicio", "fim", "arquivo")}
+                for c in capitulos.capitulos
+            ]
+        journal.remover()
+        resumo["status"] = "ok"
+        resumo["saida"] = arquivo_final
+        print(
+            f"\n🎉 Conversão concluída em {resumo['tempo']:.1f} s! Arquivo final: {arquivo_final}"
+        )
+        print(f"🎧 Duração do áudio: {time.strftime('%H:%M:%S', time.gmtime(resumo['duracao_audio']))}")
+        return resumo
@@ -0,0 +1,202 @@
+import re
+import time
+from configs import FUNDIR_ETAPAS_TEXTO
+
+# Flags que podem ser aplicadas só a um trecho do padrão, como em "(?i:...)"
+_FLAGS_ESCOPO = {re.IGNORECASE: "i", re.MULTILINE: "m", re.DOTALL: "s", re.VERBOSE: "x"}
+
+
+class regraTexto:
+    """
+    Uma substituição da limpeza: padrão pré-compilado e o texto literal que entra
+    no lugar do trecho encontrado, ou uma função que recebe o match e retorna esse texto.
+    Para poderem ser fundidas, as regras só usam grupos nomeados (sem referências
+    numeradas como \\1), já que a numeração muda quando os padrões são unidos.
+
+    `inicio` é opcional: o conteúdo de uma classe de caracteres (ex: r"\\d") com que
+    todo trecho encontrado pela regra começa. Quando todas as regras de uma passada o
+    informam, as posições que não começam com nenhum deles são descartadas com um
+    único teste, em vez de um por regra.
+    """
+
+    def __init__(self, padrao, substituicao, inicio: str = None):
+        self.padrao = re.compile(padrao) if isinstance(padrao, str) else padrao
+        self.substituicao = substituicao
+        self.inicio = inicio
+
+    def fonte(self) -> str:
+        """Padrão com as próprias flags em escopo local, pronto para ser unido a outros."""
+        flags = "".join(
+            letra for flag, letra in _FLAGS_ESCOPO.items() if self.padrao.flags & flag
+        )
+        if not flags:
+            return self.padrao.pattern
+        # A quebra de linha fecha um eventual comentário de um padrão VERBOSE
+        fim = "\n" if "x" in flags else ""
+        return f"(?{flags}:{self.padrao.pattern}{fim})"
+
+
+class etapaTexto:
+    """
+    Etapa da limpeza de texto: regras aplicadas juntas, numa única varredura.
+    `ordem` define a posição da etapa no pipeline. Etapas fundíveis consecutivas
+    dividem a mesma varredura; `fundivel=False` indica que a etapa precisa do
+    resultado completo das anteriores e começa uma nova passada (as seguintes
+    ainda podem ser fundidas a ela). `pular(texto)` permite dispensar a etapa
+    quando o texto já está no formato esperado.
+    """
+
+    def __init__(self, nome: str, ordem: int, regras: list, fundivel: bool = True, pular=None):
+        self.nome = nome
+        self.ordem = ordem
+        self.regras = list(regras)
+        self.fundivel = fundivel and pular is None
+        self.pular = pular
+
+
+class _passada:
+    """Etapas executadas numa mesma varredura, com as regras unidas numa alternância."""
+
+    def __init__(self, etapas: list):
+        self.etapas = etapas
+        self.nome = "+".join(etapa.nome for etapa in etapas)
+        regras = [(etapa.nome, regra) for etapa in etapas for regra in etapa.regras]
+        # Um grupo vazio no fim de cada alternativa identifica a regra: é o último grupo
+        # fechado (lastindex) e, por não ficar no início, não impede o re de descartar
+        # rapidamente as alternativas pelo primeiro caractere
+        alternativas = "|".join(
+            f"(?:{regra.fonte()})(?P<_r{i}>)" for i, (_, regra) in enumerate(regras)
+        )
+        if all(regra.inicio for _, regra in regras):
+            filtro = "".join(regra.inicio for _, regra in regras)
+            alternativas = f"(?=[{filtro}])(?:{alternativas})"
+        self.padrao = re.compile(alternativas)
+        self.regras = {
+            self.padrao.groupindex[f"_r{i}"]: item for i, item in enumerate(regras)
+        }
+
+    def executar(self, texto: str, relatorio: dict = None) -> str:
+        if len(self.etapas) == 1 and self.etapas[0].pular and self.etapas[0].pular(texto):
+            if relatorio is not None:
+                pipelineTexto._acumular(relatorio, self, 0.0, {})
+            return texto
+
+        alteracoes = {}
+        regras = self.regras
+
+        def substituir(match):
+            nome, regra = regras[match.lastindex]
+            original = match.group()
+            novo = regra.substituicao
+            if not isinstance(novo, str):
+                novo = novo(match)
+            if novo != original:
+                contagem = alteracoes.setdefault(nome, [0, 0])
+                contagem[0] += 1
+                contagem[1] += max(
+                    len(original.encode("utf-8", "surrogatepass")),
+                    len(novo.encode("utf-8", "surrogatepass")),
+                )
+            return novo
+
+        inicio = time.perf_counter()
+        texto = self.padrao.sub(substituir, texto)
+        if relatorio is not None:
+            pipelineTexto._acumular(relatorio, self, time.perf_counter() - inicio, alteracoes)
+        return texto
+
+
+class pipelineTexto:
+    """
+    Registro ordenado das etapas de limpeza de um tipo de texto. As etapas são
+    agrupadas em passadas (fundindo as compatíveis) na primeira execução e de
+    novo sempre que o registro muda.
+
+    Cada execução pode acumular num dicionário `relatorio`, por etapa: o tempo da
+    passada que a executou (compartilhado entre etapas fundidas), o número de
+    substituições e os bytes (UTF-8) alterados. Com `fundir=False` cada etapa roda
+    na sua própria passada, e o tempo medido é só dela.
+    """
+
+    def __init__(self, nome: str, etapas: list = (), fundir: bool = FUNDIR_ETAPAS_TEXTO):
+        self.nome = nome
+        self.fundir = fundir
+        self._etapas = []
+        self._passadas = None
+        self._isoladas = {}
+        for etapa in etapas:
+            self.registrar(etapa)
+
+    def registrar(self, etapa: etapaTexto) -> etapaTexto:
+        if any(e.nome == etapa.nome for e in self._etapas):
+            raise ValueError(f"Etapa '{etapa.nome}' já registrada em '{self.nome}'")
+        self._etapas.append(etapa)
+        self._etapas.sort(key=lambda e: e.ordem)
+        self._invalidar()
+        return etapa
+
+    def etapa(self, nome: str) -> etapaTexto:
+        for etapa in self._etapas:
+            if etapa.nome == nome:
+                return etapa
+        raise KeyError(nome)
+
+    def atualizar_regras(self, nome: str, regras: list) -> None:
+        """Troca as regras de uma etapa (ex: após incluir uma abreviação)."""
+        self.etapa(nome).regras = list(regras)
+        self._invalidar()
+
+    def _invalidar(self) -> None:
+        self._passadas = None
+        self._isoladas = {}
+
+    def passadas(self) -> list:
+        if self._passadas is None:
+            grupos = []
+            for etapa in self._etapas:
+                # Uma etapa que pode ser dispensada fica sozinha na sua passada
+                if grupos and self.fundir and etapa.fundivel and not grupos[-1][0].pular:
+                    grupos[-1].append(etapa)
+                else:
+                    grupos.append([etapa])
+            self._passadas = [_passada(grupo) for grupo in grupos]
+        return self._passadas
+
+    def executar(self, texto: str, relatorio: dict = None) -> str:
+        for passada in self.passadas():
+            texto = passada.executar(texto, relatorio)
+        return texto
+
+    def executar_etapa(self, nome: str, texto: str, relatorio: dict = None) -> str:
+        """Aplica só uma das etapas registradas, na sua própria passada."""
+        if nome not in self._isoladas:
+            self._isoladas[nome] = _passada([self.etapa(nome)])
+        return self._isoladas[nome].executar(texto, relatorio)
+
+    @staticmethod
+    def _acumular(relatorio: dict, passada: _passada, tempo: float, alteracoes: dict) -> None:
+        for etapa in passada.etapas:
+            dados = relatorio.setdefault(
+                etapa.nome,
+                {"passada": passada.nome, "tempo": 0.0, "substituicoes": 0, "bytes_alterados": 0},
+            )
+            dados["tempo"] += tempo
+            substituicoes, bytes_alterados = alteracoes.get(etapa.nome, (0, 0))
+            dados["substituicoes"] += substituicoes
+            dados["bytes_alterados"] += bytes_alterados
+
+    @staticmethod
+    def imprimir_relatorio(relatorio: dict) -> None:
+        passadas = {}
+        for dados in relatorio.values():
+            passadas[dados["passada"]] = dados["tempo"]
+        print(
+            f"🧹 Limpeza: {len(relatorio)} etapa(s) em {len(passadas)} passada(s), "
+            f"{sum(passadas.values()):.3f}s"
+        )
+        for nome, dados in relatorio.items():
+            compartilhada = " (passada compartilhada)" if "+" in dados["passada"] else ""
+            print(
+                f"   {nome}: {dados['tempo']:.3f}s{compartilhada} | "
+                f"{dados['substituicoes']} substituição(ões) | {dados['bytes_alterados']} bytes alterados"
+            )
@@ -0,0 +1,246 @@
+import os
+import time
+import sqlite3
+from configs import *
+
+
+class filaJobs:
+    """
+    Fila persistente (SQLite) do processamento em lote: um registro por documento
+    (job), com prioridade, voz, saída e status, e um por parte do texto (chunk), com
+    tamanho, capítulo, duração e o instante em que foi gravada. Os índices cobrem as
+    consultas do escalonador e do acompanhamento: próximo job da fila, profundidade,
+    progresso de cada job e vazão agregada numa janela recente.
+
+    O progresso das partes chega do Conversor (ver acompanhamentoJob) e é gravado em
+    lotes, no máximo uma vez por INTERVALO_GRAVACAO, numa única transação.
+    A retomada das partes de um job interrompido continua a cargo do jobJournal.
+    """
+
+    INTERVALO_GRAVACAO = 1.0  # segundos mínimos entre gravações do progresso das partes
+
+    def __init__(self, caminho: str = None):
+        caminho = caminho or ARQUIVO_FILA_JOBS
+        os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+        self.caminho = caminho
+        self._conexao = sqlite3.connect(caminho)
+        self._conexao.row_factory = sqlite3.Row
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.execute("PRAGMA synchronous=NORMAL")
+        self._conexao.execute("PRAGMA foreign_keys=ON")
+        self._conexao.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY,
+                entrada TEXT NOT NULL,
+                voz TEXT NOT NULL,
+                prioridade INTEGER NOT NULL DEFAULT 0,
+                status TEXT NOT NULL DEFAULT 'pendente',
+                diretorio_saida TEXT,
+                velocidade REAL NOT NULL DEFAULT 1.0,
+                formato TEXT NOT NULL DEFAULT 'mp3',
+                criado REAL NOT NULL,
+                inicio REAL,
+                fim REAL,
+                partes INTEGER,
+                saida TEXT,
+                duracao_audio REAL,
+                erro TEXT
+            );
+            CREATE INDEX IF NOT EXISTS jobs_fila ON jobs (status, prioridade DESC, id);
+            CREATE TABLE IF NOT EXISTS chunks (
+                job INTEGER NOT NULL REFERENCES jobs (id) ON DELETE CASCADE,
+                indice INTEGER NOT NULL,
+                caracteres INTEGER NOT NULL,
+                capitulo TEXT,
+                status TEXT NOT NULL,
+                bytes INTEGER,
+                duracao REAL,
+                concluido REAL,
+                PRIMARY KEY (job, indice)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS chunks_concluidos
+                ON chunks (concluido) WHERE concluido IS NOT NULL;
+            """
+        )
+        self._registros = []  # Partes lidas ainda não gravadas
+        self._conclusoes = []  # Partes sintetizadas ainda não gravadas
+        self._ultima_gravacao = 0.0
+
+    def adicionar(
+        self,
+        entrada: str,
+        voz: str,
+        prioridade: int = 0,
+        diretorio_saida: str = None,
+        velocidade: float = 1.0,
+        formato: str = "mp3",
+    ) -> int:
+        """Inclui um documento na fila e retorna o id do job."""
+        with self._conexao:
+            cursor = self._conexao.execute(
+                "INSERT INTO jobs (entrada, voz, prioridade, diretorio_saida, velocidade, formato, criado)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (os.path.abspath(entrada), voz, prioridade, diretorio_saida, velocidade, formato, time.time()),
+            )
+        return cursor.lastrowid
+
+    def recuperar_interrompidos(self) -> int:
+        """
+        Devolve à fila os jobs que estavam em execução quando o processo anterior parou.
+        Só deve ser chamado por quem vai executar a fila (um processo por banco).
+        """
+        with self._conexao:
+            return self._conexao.execute(
+                "UPDATE jobs SET status = 'pendente', inicio = NULL WHERE status = 'executando'"
+            ).rowcount
+
+    def proximo(self):
+        """Marca como em execução e retorna o job pendente de maior prioridade (o mais antigo no empate)."""
+        with self._conexao:
+            linha = self._conexao.execute(
+                "SELECT * FROM jobs WHERE status = 'pendente' ORDER BY prioridade DESC, id LIMIT 1"
+            ).fetchone()
+            if linha is None:
+                return None
+            self._conexao.execute(
+                "UPDATE jobs SET status = 'executando', inicio = ?, erro = NULL WHERE id = ?",
+                (time.time(), linha["id"]),
+            )
+        return dict(linha)
+
+    def acompanhar(self, job: int) -> "acompanhamentoJob":
+        return acompanhamentoJob(self, job)
+
+    def registrar_parte(self, job: int, indice: int, caracteres: int, capitulo: str, concluida: bool) -> None:
+        # Partes aproveitadas de uma execução anterior não entram na vazão
+        self._registros.append(
+            (job, indice, caracteres, capitulo, "concluido" if concluida else "pendente")
+        )
+        self.gravar()
+
+    def concluir_parte(self, job: int, indice: int, tamanho: int, duracao: float) -> None:
+        self._conclusoes.append((tamanho, duracao, time.time(), job, indice))
+        self.gravar()
+
+    def gravar(self, forcar: bool = False) -> None:
+        """Grava o progresso acumulado, no máximo uma vez por INTERVALO_GRAVACAO, salvo se forçado."""
+        agora = time.monotonic()
+        if not (self._registros or self._conclusoes) or (
+            not forcar and agora - self._ultima_gravacao < self.INTERVALO_GRAVACAO
+        ):
+            return
+        with self._conexao:
+            self._conexao.executemany(
+                "INSERT OR REPLACE INTO chunks (job, indice, caracteres, capitulo, status)"
+                " VALUES (?, ?, ?, ?, ?)",
+                self._registros,
+            )
+            self._conexao.executemany(
+                "UPDATE chunks SET status = 'concluido', bytes = ?, duracao = ?, concluido = ?"
+                " WHERE job = ? AND indice = ?",
+                self._conclusoes,
+            )
+        self._registros = []
+        self._conclusoes = []
+        self._ultima_gravacao = agora
+
+    def finalizar(self, job: int, resumo: dict) -> None:
+        """Grava o resultado do job (status, total de partes, saída, duração ou erro)."""
+        self.gravar(forcar=True)
+        with self._conexao:
+            self._conexao.execute(
+                "UPDATE jobs SET status = ?, fim = ?, partes = ?, saida = ?, duracao_audio = ?, erro = ?"
+                " WHERE id = ?",
+                (
+                    resumo.get("status", "falha"),
+                    time.time(),
+                    resumo.get("partes"),
+                    resumo.get("saida"),
+                    resumo.get("duracao_audio"),
+                    resumo.get("erro"),
+                    job,
+                ),
+            )
+
+    def profundidade(self) -> dict:
+        """Jobs por status e partes já lidas que ainda aguardam a síntese."""
+        jobs = dict(
+            self._conexao.execute("SELECT status, count(*) FROM jobs GROUP BY status").fetchall()
+        )
+        partes, caracteres = self._conexao.execute(
+            "SELECT count(*), coalesce(sum(c.caracteres), 0) FROM jobs j"
+            " JOIN chunks c ON c.job = j.id"
+            " WHERE j.status = 'executando' AND c.status != 'concluido'"
+        ).fetchone()
+        return {
+            "jobs_pendentes": jobs.get("pendente", 0),
+            "jobs_executando": jobs.get("executando", 0),
+            "jobs_concluidos": jobs.get("ok", 0),
+            "jobs_com_falha": jobs.get("falha", 0) + jobs.get("vazio", 0),
+            "partes_pendentes": partes,
+            "caracteres_pendentes": caracteres,
+        }
+
+    def progresso(self, job: int = None) -> list:
+        """
+        Progresso de um job (ou de todos): partes lidas e concluídas, caracteres e
+        segundos de áudio. Enquanto o texto é lido o total de partes ainda não é
+        conhecido, e a fração é calculada sobre as partes já lidas.
+        """
+        linhas = self._conexao.execute(
+            "SELECT j.id, j.entrada, j.status, j.prioridade, j.partes, j.inicio, j.fim,"
+            " j.saida, j.erro, count(c.indice) AS lidas,"
+            " coalesce(sum(c.status = 'concluido'), 0) AS concluidas,"
+            " coalesce(sum(c.caracteres), 0) AS caracteres,"
+            " coalesce(sum(CASE WHEN c.status = 'concluido' THEN c.caracteres END), 0) AS caracteres_concluidos,"
+            " coalesce(sum(c.duracao), 0) AS segundos_audio"
+            " FROM jobs j LEFT JOIN chunks c ON c.job = j.id"
+            " WHERE ? IS NULL OR j.id = ?"
+            " GROUP BY j.id ORDER BY j.id",
+            (job, job),
+        ).fetchall()
+        agora = time.time()
+        resultado = []
+        for linha in linhas:
+            dados = dict(linha)
+            total = dados["partes"] or dados["lidas"]
+            dados["fracao"] = dados["concluidas"] / total if total else 0.0
+            dados["decorrido"] = (dados["fim"] or agora) - dados["inicio"] if dados["inicio"] else None
+            resultado.append(dados)
+        return resultado
+
+    def vazao(self, janela: float = JANELA_VAZAO_LOTE) -> dict:
+        """Vazão agregada de todos os jobs nos últimos `janela` segundos."""
+        agora = time.time()
+        partes, caracteres, segundos, primeiro = self._conexao.execute(
+            "SELECT count(*), coalesce(sum(caracteres), 0), coalesce(sum(duracao), 0), min(concluido)"
+            " FROM chunks WHERE concluido >= ?",
+            (agora - janela,),
+        ).fetchone()
+        intervalo = max(agora - primeiro, 1.0) if primeiro else janela
+        return {
+            "janela_s": janela,
+            "partes": partes,
+            "partes_s": partes / intervalo,
+            "caracteres_s": caracteres / intervalo,
+            "segundos_audio_s": segundos / intervalo,
+        }
+
+    def fechar(self) -> None:
+        self.gravar(forcar=True)
+        self._conexao.close()
+
+
+class acompanhamentoJob:
+    """Repassa à filaJobs o progresso das partes de um job, informado pelo Conversor."""
+
+    def __init__(self, fila: filaJobs, job: int):
+        self.fila = fila
+        self.job = job
+
+    def parte_registrada(self, indice: int, caracteres: int, capitulo: str, concluida: bool) -> None:
+        self.fila.registrar_parte(self.job, indice, caracteres, capitulo, concluida)
+
+    def parte_concluida(self, indice: int, tamanho: int, duracao: float) -> None:
+        self.fila.concluir_parte(self.job, indice, tamanho, duracao)
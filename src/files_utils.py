@@ -1,7 +1,16 @@
 import os
+import mmap
+import codecs
+import contextlib
 from textParser import ParserTxt
+from etapas_texto import pipelineTexto
+from metricas import metricasJob
 import re
 from pdfParser import pdfCoverter
+from configs import BUFFER_IO, LIMITE_PARAGRAFO_LEITURA
+
+_SEPARADOR_PARAGRAFOS = re.compile(r"\n[^\S\n]*\n\s*")
+_CORTE_SENTENCA = re.compile(r"[.!?…][\"'”’»)\]]*\s+")
 
 
 class filesUtils:
@@ -36,7 +45,11 @@ class filesUtils:
         except Exception as e:
             print(f"❌ Erro ao ler o arquivo TXT: {e}")
             return caminho_txt
-        conteudo_corrigido = ParserTxt.melhorar_texto_corrigido(conteudo)
+        relatorio = {}
+        with metricasJob.etapa("correcao_arquivo"):
+            conteudo_corrigido = ParserTxt.melhorar_texto_corrigido(conteudo, relatorio)
+        pipelineTexto.imprimir_relatorio(relatorio)
+        metricasJob.registrar_limpeza("arquivo", relatorio)
         novo_caminho = base + "_formatado" + ext
         try:
             with open(novo_caminho, "w", encoding="utf-8") as f:
@@ -69,14 +82,96 @@ class filesUtils:
         nome_limpo = nome_limpo.replace(" ", "_")
         return nome_limpo
 
+    @staticmethod
+    @contextlib.contextmanager
+    def mapear_arquivo(caminho_arquivo: str):
+        """Mapeia o arquivo na memória, somente leitura (arquivos vazios viram b"")."""
+        with open(caminho_arquivo, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                yield b""
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+                yield mapa
+
+    @staticmethod
+    def decodificar_blocos(mapa, encoding: str, tamanho_bloco: int = BUFFER_IO):
+        """
+        Decodifica o mapeamento em blocos de texto, com as quebras de linha
+        normalizadas para "\\n" como na leitura em modo texto. Se aparecerem bytes
+        inválidos para o encoding detectado, eles são substituídos em vez de
+        interromper a leitura.
+        """
+        decodificador = codecs.getincrementaldecoder(encoding)()
+        retorno_carro = ""
+        for inicio in range(0, len(mapa), tamanho_bloco):
+            dados = mapa[inicio : inicio + tamanho_bloco]
+            final = inicio + tamanho_bloco >= len(mapa)
+            try:
+                texto = decodificador.decode(dados, final)
+            except UnicodeDecodeError:
+                print(
+                    f"\n⚠️ O arquivo tem bytes inválidos para {encoding}; eles serão substituídos."
+                )
+                decodificador.errors = "replace"
+                texto = decodificador.decode(dados, final)
+            texto = retorno_carro + texto
+            retorno_carro = ""
+            # "\r\n" pode ficar dividido entre dois blocos
+            if texto.endswith("\r") and not final:
+                texto, retorno_carro = texto[:-1], "\r"
+            yield texto.replace("\r\n", "\n").replace("\r", "\n")
+        if retorno_carro:
+            yield "\n"
+
     @staticmethod
     def ler_arquivo_texto(caminho_arquivo: str) -> str:
         """Lê o conteúdo de um arquivo de texto com detecção automática de encoding."""
-        encoding = pdfCoverter.detectar_encoding(caminho_arquivo)
         try:
-            with open(caminho_arquivo, "r", encoding=encoding) as f:
-                conteudo = f.read()
-            return conteudo
+            with filesUtils.mapear_arquivo(caminho_arquivo) as mapa:
+                # A detecção e a decodificação usam o mesmo mapeamento, sem reler o arquivo
+                encoding = pdfCoverter.detectar_encoding(caminho_arquivo, mapa)
+                return "".join(filesUtils.decodificar_blocos(mapa, encoding, len(mapa) or 1))
         except Exception as e:
             print(f"\n❌ Erro ao ler arquivo: {str(e)}")
             return ""
+
+    @staticmethod
+    def ler_paragrafos(
+        caminho_arquivo: str,
+        tamanho_bloco: int = BUFFER_IO,
+        limite_paragrafo: int = LIMITE_PARAGRAFO_LEITURA,
+    ):
+        """
+        Lê o arquivo em blocos e gera um parágrafo por vez, com memória limitada.
+        O trecho após a última linha em branco do bloco fica guardado até o próximo,
+        para que palavras hifenizadas e sentenças quebradas entre blocos não sejam
+        separadas. Um parágrafo sem linha em branco maior que `limite_paragrafo`
+        é cortado no fim da última sentença completa (ou, em último caso, num espaço).
+        Erros de leitura são propagados: um livro lido pela metade não pode virar um
+        áudio "completo".
+        """
+        pendente = ""
+        with filesUtils.mapear_arquivo(caminho_arquivo) as mapa:
+            encoding = pdfCoverter.detectar_encoding(caminho_arquivo, mapa)
+            for bloco in filesUtils.decodificar_blocos(mapa, encoding, tamanho_bloco):
+                pendente += bloco
+                paragrafos = _SEPARADOR_PARAGRAFOS.split(pendente)
+                pendente = paragrafos.pop()
+                yield from paragrafos
+
+                while len(pendente) > limite_paragrafo:
+                    corte = None
+                    for corte_sentenca in _CORTE_SENTENCA.finditer(
+                        pendente, 0, limite_paragrafo
+                    ):
+                        corte = corte_sentenca.end()
+                    if corte is None:
+                        corte = pendente.rfind(" ", 0, limite_paragrafo) + 1
+                        while corte > 1 and pendente[corte - 2] == "-":
+                            corte = pendente.rfind(" ", 0, corte - 1) + 1
+                    if corte <= 0:
+                        corte = limite_paragrafo
+                    yield pendente[:corte]
+                    pendente = pendente[corte:]
+        if pendente.strip():
+            yield pendente
@@ -1,109 +1,368 @@
 import re
 from configs import manual_converser
-from num2words import num2words
+from numeros import verbalizadorNumeros, PADRAO_NUMEROS
+from etapas_texto import regraTexto, etapaTexto, pipelineTexto
 from configs import abreviacoes
+from configs import LIMITE_CHUNK_CARACTERES, LIMITE_CHUNK_BYTES, LIMITE_TITULO_CAPITULO
 
+_SEPARADOR_PARAGRAFOS = re.compile(r"\n\s*\n")
+_FIM_SENTENCA = re.compile(r"[.!?…]+[\"'”’»)\]]*(?=\s|$)")
+_PROXIMO_CARACTERE = re.compile(r"\s*(\S)")
+_INICIAL_NOME = re.compile(r"(?:^|\s)[A-ZÀ-Ý]$")
+_PAUSA_INTERNA = re.compile(r"(?<=[;:,—–])\s+")
 
-class textFormat:
 
-    def __init__(self):
-        pass
+def _compilar_abreviacoes(tabela: dict) -> re.Pattern:
+    """
+    Monta uma única alternância com todas as abreviações da tabela.
+    As mais longas vêm primeiro para que "Profa." não seja lida como "Prof." + "a.".
+    """
+    alternativas = "|".join(
+        re.escape(abrev) for abrev in sorted(tabela, key=len, reverse=True)
+    )
+    # As iniciais descartam rápido as posições que não podem começar uma abreviação
+    return re.compile(rf"(?=[{_iniciais(tabela)}])\b(?:{alternativas})(?=\s|$)")
+
 
-    def standardize_chapters(self, text: str) -> str:
+def _iniciais(tabela: dict) -> str:
+    return "".join(sorted({re.escape(abrev[0]) for abrev in tabela}))
 
-        def substituidor(match):
-            chapter = match.group(1).strip().upper()
-            title = match.group(2).strip()
-            number = manual_converser.get(chapter, title)
-            return f"CAPÍTULO {number}: {title.title()}"
 
-        pattern = re.compile(
-            r"CAP[IÍ]TULO\s+([A-Z0-9]+)\s*[:\-]?\s*(.+)", re.IGNORECASE
+_ABREVIACOES = _compilar_abreviacoes(abreviacoes)
+
+
+def _regras_abreviacoes() -> list:
+    return [
+        regraTexto(
+            _ABREVIACOES, lambda m: abreviacoes[m.group()], inicio=_iniciais(abreviacoes)
         )
-        format_text = pattern.sub(substituidor, text)
+    ]
+
+
+def _espacos(match: re.Match) -> str:
+    # Linhas em branco viram uma quebra de parágrafo e quebras simples, um espaço,
+    # para que dividir_texto agrupe parágrafos inteiros
+    return "\n\n" if match.group().count("\n") > 1 else " "
+
+
+# Limpeza de cada parágrafo antes da síntese. Espaços e quebras são normalizados
+# numa passada; abreviações e números, que dependem deles já normalizados, na seguinte.
+_LIMPEZA_TTS = pipelineTexto(
+    "tts",
+    [
+        etapaTexto(
+            "controle",
+            10,
+            # Caracteres de controle e surrogates isolados (que não existem em UTF-8)
+            [
+                regraTexto(
+                    r"[\x00-\x08\x0B-\x1F\x7F-\x9F\ud800-\udfff]+",
+                    "",
+                    inicio=r"\x00-\x08\x0B-\x1F\x7F-\x9F\ud800-\udfff",
+                )
+            ],
+        ),
+        etapaTexto(
+            "espacos",
+            20,
+            # Sequências de espaços (menos o espaço simples, que já está certo)
+            [regraTexto(r"\s(?:(?<! )|\s)\s*", _espacos, inicio=r"\s")],
+        ),
+        etapaTexto("abreviacoes", 30, _regras_abreviacoes(), fundivel=False),
+        etapaTexto(
+            "numeros",
+            40,
+            [regraTexto(PADRAO_NUMEROS, verbalizadorNumeros.substituir, inicio=r"\dR")],
+        ),
+    ],
+)
+
+
+def _capitulo_padronizado(match: re.Match) -> str:
+    capitulo = match.group("capitulo").strip().upper()
+    titulo = match.group("titulo").strip()
+    numero = (
+        manual_converser.get(capitulo)
+        or verbalizadorNumeros.romano_para_inteiro(capitulo)
+        or capitulo
+    )
+    return f"\n\nCAPÍTULO {numero}: {titulo.title()}"
+
+
+def _linha_maiuscula(match: re.Match) -> str:
+    linha = match.group()
+    return linha.capitalize() if linha.isupper() and len(linha.strip()) > 3 else linha
+
 
-        return format_text
+# Formatação opcional de livros convertidos de PDF (capítulos numerados e índice)
+_FORMATACAO = pipelineTexto(
+    "formatacao",
+    [
+        etapaTexto(
+            "capitulos",
+            10,
+            [
+                regraTexto(
+                    re.compile(
+                        r"CAP[IÍ]TULO\s+(?P<capitulo>[A-Z0-9]+)\s*[:\-]?\s*(?P<titulo>.+)",
+                        re.IGNORECASE,
+                    ),
+                    _capitulo_padronizado,
+                )
+            ],
+        ),
+        etapaTexto(
+            "linhas_maiusculas",
+            20,
+            [regraTexto(re.compile(r"^.+$", re.MULTILINE), _linha_maiuscula)],
+            fundivel=False,
+        ),
+    ],
+)
+_INDICE = re.compile(r"CAP[IÍ]TULO\s+(\d+):\s+(.+)", re.IGNORECASE)
+# Título de capítulo no início de um parágrafo, em maiúsculas como standardize_chapters
+# e ParserTxt o escrevem; vai até o fim da linha ou da primeira sentença
+_TITULO_CAPITULO = re.compile(r"CAP[IÍ]TULO[^\S\n]+[^\n.!?…]+")
+
+
+class textFormat:
 
-    def normalize_text(self, text: str) -> str:
-        lines = text.splitlines()
-        final_text = []
+    def __init__(self):
+        pass
 
-        for line in lines:
-            if line.isupper() and len(line.strip()) > 3:
-                final_text.append(line.capitalize())
-            else:
-                final_text.append(line)
-        return "\n".join(final_text)
+    @staticmethod
+    def standardize_chapters(text: str) -> str:
+        """Padroniza os títulos como "CAPÍTULO n: Título", cada um num parágrafo."""
+        return _FORMATACAO.executar_etapa("capitulos", text)
 
-    def separate_chapter(text: str) -> str:
-        return re.sub(r"(CAP[IÍ]TULO\s+\d+:)", r"\n\n\1", text)
+    @staticmethod
+    def normalize_text(text: str) -> str:
+        """Deixa em caixa alta só a inicial das linhas escritas todas em maiúsculas."""
+        return _FORMATACAO.executar_etapa("linhas_maiusculas", text)
 
+    @staticmethod
     def index_gen(text: str) -> str:
-        pattern = re.compile(r"CAP[IÍ]TULO\s+(\d+):\s+(.+)", re.IGNORECASE)
         return "\n".join(
-            [
-                f"{match.group(1)}. {match.group(2).title()}"
-                for match in pattern.finditer(pattern)
-            ]
+            f"{match.group(1)}. {match.group(2).title()}"
+            for match in _INDICE.finditer(text)
         )
 
     @staticmethod
-    def apply_format(self, text: str) -> str:
-        text = self.standardize_chapters(text)
-        text = self.normalize_text(text)
-        text = self.separate_chapter(text)
-        index = self.index_gen(text)
-        return index + "\n\n" + text
+    def titulo_capitulo(texto: str):
+        """
+        Título do capítulo que abre o parágrafo `texto`, ou None. Recebe o parágrafo
+        original, antes da limpeza, que une as linhas: o título é só a primeira linha.
+        """
+        match = _TITULO_CAPITULO.match(texto.lstrip())
+        if match is None:
+            return None
+        titulo = " ".join(match.group().split())
+        if len(titulo) > LIMITE_TITULO_CAPITULO:
+            titulo = titulo[:LIMITE_TITULO_CAPITULO].rsplit(" ", 1)[0]
+        return titulo
+
+    @staticmethod
+    def apply_format(text: str, relatorio: dict = None) -> str:
+        """Padroniza capítulos e linhas em caixa alta e inclui um índice no início."""
+        text = _FORMATACAO.executar(text, relatorio)
+        return textFormat.index_gen(text) + "\n\n" + text.strip()
 
     @staticmethod
-    def processar_texto(texto: str) -> str:
-        """Processa o texto para melhorar a qualidade da conversão TTS."""
-        # Remover caracteres não imprimíveis
-        texto = re.sub(r"[\x00-\x1F\x7F-\x9F]", "", texto)
-        texto = texto.encode("utf-8", "ignore").decode("utf-8")
-
-        texto = re.sub(r"\s+", " ", texto)
-
-        for abrev, expansao in abreviacoes.items():
-            texto = re.sub(abrev, expansao, texto)
-
-        def converter_numero(match):
-            num = match.group(0)
-            try:
-                return num2words(int(num), lang="pt_BR")
-            except:
-                return num
-
-        def converter_valor_monetario(match):
-            valor = match.group(1)
-            try:
-                return f"{num2words(int(valor), lang='pt_BR')} reais"
-            except:
-                return f"{valor} reais"
-
-        texto = re.sub(r"\b\d+\b", converter_numero, texto)
-        texto = re.sub(r"R\$\s*(\d+)", converter_valor_monetario, texto)
-        texto = re.sub(
-            r"\b(\d+)\s*-\s*(\d+)\b",
-            lambda m: f"{num2words(int(m.group(1)), lang='pt_BR')} a {num2words(int(m.group(2)), lang='pt_BR')}",
-            texto,
-        )
+    def expandir_abreviacoes(texto: str) -> str:
+        """Expande todas as abreviações de configs.abreviacoes em uma única passada."""
+        return _ABREVIACOES.sub(lambda m: abreviacoes[m.group()], texto)
+
+    @staticmethod
+    def registrar_abreviacao(abreviacao: str, expansao: str) -> None:
+        """
+        Inclui (ou substitui) uma abreviação na tabela compartilhada.
+        `abreviacao` é o texto literal, com o ponto (ex: "Cia.").
+        """
+        global _ABREVIACOES
+        abreviacoes[abreviacao] = expansao
+        _ABREVIACOES = _compilar_abreviacoes(abreviacoes)
+        _LIMPEZA_TTS.atualizar_regras("abreviacoes", _regras_abreviacoes())
+
+    @staticmethod
+    def processar_texto(texto: str, relatorio: dict = None) -> str:
+        """
+        Processa o texto para melhorar a qualidade da conversão TTS: remove caracteres
+        de controle, normaliza espaços, expande abreviações e converte números.
+        `relatorio` acumula o tempo e os bytes alterados por etapa (ver pipelineTexto).
+        """
+        return _LIMPEZA_TTS.executar(texto, relatorio)
+
+    @staticmethod
+    def dividir_sentencas(paragrafo: str) -> list:
+        """
+        Divide um parágrafo em sentenças completas.
+        Pontos decimais, reticências seguidas de minúscula e iniciais de nomes
+        (ex: "J. Silva") não encerram a sentença.
+        """
+        sentencas = []
+        inicio = 0
+        for match in _FIM_SENTENCA.finditer(paragrafo):
+            fim = match.end()
+            proximo = _PROXIMO_CARACTERE.match(paragrafo, fim)
+            if proximo and proximo.group(1).islower():
+                continue
+            if match.group() == "." and _INICIAL_NOME.search(
+                paragrafo, inicio, match.start()
+            ):
+                continue
+            sentenca = paragrafo[inicio:fim].strip()
+            if sentenca:
+                sentencas.append(sentenca)
+            inicio = fim
+        resto = paragrafo[inicio:].strip()
+        if resto:
+            sentencas.append(resto)
+        return sentencas
+
+    @staticmethod
+    def _quebrar_sentenca_longa(
+        sentenca: str, limite_caracteres: int, limite_bytes: int
+    ) -> list:
+        """
+        Quebra uma sentença maior que o limite, preferindo pausas naturais
+        (";", ":", ",", travessões), depois espaços e, em último caso, um corte seco.
+        """
+
+        def cabe(trecho: str) -> bool:
+            return (
+                len(trecho) <= limite_caracteres
+                and len(trecho.encode("utf-8")) <= limite_bytes
+            )
 
-        return texto
+        def empacotar(pedacos: list, separador: str) -> list:
+            blocos = []
+            atual = ""
+            for pedaco in pedacos:
+                candidato = f"{atual}{separador}{pedaco}" if atual else pedaco
+                if cabe(candidato):
+                    atual = candidato
+                    continue
+                if atual:
+                    blocos.append(atual)
+                atual = pedaco
+            if atual:
+                blocos.append(atual)
+            return blocos
+
+        resultado = []
+        for bloco in empacotar(_PAUSA_INTERNA.split(sentenca), " "):
+            if cabe(bloco):
+                resultado.append(bloco)
+                continue
+            for sub_bloco in empacotar(bloco.split(), " "):
+                while not cabe(sub_bloco):
+                    corte = min(len(sub_bloco), limite_caracteres)
+                    while corte > 1 and not cabe(sub_bloco[:corte]):
+                        corte -= max(1, corte // 8)
+                    resultado.append(sub_bloco[:corte])
+                    sub_bloco = sub_bloco[corte:]
+                if sub_bloco:
+                    resultado.append(sub_bloco)
+        return resultado
+
+    @staticmethod
+    def processar_paragrafos(paragrafos, relatorio: dict = None, com_titulos: bool = False):
+        """
+        Versão incremental de processar_texto: recebe um iterável de parágrafos
+        e gera cada um já processado, sem montar o texto inteiro na memória.
+        Com `com_titulos`, gera pares (parágrafo, título do capítulo ou None), com o
+        título lido do parágrafo original (titulo_capitulo).
+        """
+        for original in paragrafos:
+            paragrafo = textFormat.processar_texto(original, relatorio).strip()
+            if paragrafo:
+                yield (paragrafo, textFormat.titulo_capitulo(original)) if com_titulos else paragrafo
+
+    @staticmethod
+    def dividir_texto(
+        texto: str,
+        limite_caracteres: int = LIMITE_CHUNK_CARACTERES,
+        limite_bytes: int = LIMITE_CHUNK_BYTES,
+    ) -> list:
+        """
+        Agrupa sentenças e parágrafos inteiros em partes de até `limite_caracteres`
+        caracteres e `limite_bytes` bytes (UTF-8), reduzindo o número de requisições
+        ao TTS. Sentenças maiores que o limite são quebradas em pausas naturais.
+        """
+        return list(
+            textFormat.gerar_partes(
+                _SEPARADOR_PARAGRAFOS.split(texto), limite_caracteres, limite_bytes
+            )
+        )
 
     @staticmethod
-    def dividir_texto(texto: str) -> list:
-        """
-        Divide o texto em partes menores para processamento, respeitando os pontos finais.
-        """
-        partes = []
-        start = 0
-        while start < len(texto):
-            next_period = texto.find(".", start)
-            if next_period == -1:
-                partes.append(texto[start:].strip())
-                break
-            end = next_period + 1
-            partes.append(texto[start:end].strip())
-            start = end
-        return [p for p in partes if p]
+    def gerar_partes(
+        paragrafos,
+        limite_caracteres: int = LIMITE_CHUNK_CARACTERES,
+        limite_bytes: int = LIMITE_CHUNK_BYTES,
+        com_titulos: bool = False,
+    ):
+        """
+        Gerador usado por dividir_texto: consome os parágrafos sob demanda e gera
+        cada parte assim que ela é fechada, mantendo na memória só a parte atual.
+        Com `com_titulos`, recebe e gera pares (texto, título do capítulo ou None),
+        como os de processar_paragrafos: um parágrafo que abre capítulo sempre começa
+        uma parte nova, que leva o título, para que o capítulo corresponda a partes
+        inteiras do áudio.
+        """
+        atual = []
+        tamanho_caracteres = 0
+        tamanho_bytes = 0
+        titulo_atual = None
+
+        def fechar(parte):
+            return (parte, titulo_atual) if com_titulos else parte
+
+        for item in paragrafos:
+            paragrafo, titulo = item if com_titulos else (item, None)
+            paragrafo = " ".join(paragrafo.split())
+            if not paragrafo:
+                continue
+            if titulo:
+                if atual:
+                    yield fechar("".join(atual).strip())
+                    atual = []
+                    tamanho_caracteres = 0
+                    tamanho_bytes = 0
+                titulo_atual = titulo
+            separador = "\n\n"
+            for sentenca in textFormat.dividir_sentencas(paragrafo):
+                if (
+                    len(sentenca) > limite_caracteres
+                    or len(sentenca.encode("utf-8")) > limite_bytes
+                ):
+                    pedacos = textFormat._quebrar_sentenca_longa(
+                        sentenca, limite_caracteres, limite_bytes
+                    )
+                else:
+                    pedacos = [sentenca]
+
+                for pedaco in pedacos:
+                    trecho = f"{separador}{pedaco}" if atual else pedaco
+                    bytes_trecho = len(trecho.encode("utf-8"))
+                    if (
+                        tamanho_caracteres + len(trecho) > limite_caracteres
+                        or tamanho_bytes + bytes_trecho > limite_bytes
+                    ):
+                        parte = "".join(atual).strip()
+                        if parte:
+                            yield fechar(parte)
+                            titulo_atual = None
+                        atual = []
+                        tamanho_caracteres = 0
+                        tamanho_bytes = 0
+                        trecho = pedaco
+                        bytes_trecho = len(trecho.encode("utf-8"))
+                    atual.append(trecho)
+                    tamanho_caracteres += len(trecho)
+                    tamanho_bytes += bytes_trecho
+                    separador = " "
+
+        parte = "".join(atual).strip()
+        if parte:
+            yield fechar(parte)
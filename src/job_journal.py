@@ -0,0 +1,196 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+
+
+class jobJournal:
+    """
+    Manifesto de uma conversão (job), gravado de forma atômica ao lado da saída.
+    Registra o hash do arquivo de origem, a voz, o arquivo de saída, a lista de partes
+    e o status e a posição (offset/tamanho) de cada parte na saída, permitindo retomar
+    uma conversão interrompida sintetizando apenas as partes que faltam.
+    As partes são registradas conforme o texto é lido, sem exigir a lista completa.
+    """
+
+    VERSAO = 2
+    INTERVALO_GRAVACAO = 1.0  # segundos mínimos entre gravações do manifesto
+
+    def __init__(self, caminho_manifesto: str, dados: dict):
+        self.caminho_manifesto = caminho_manifesto
+        self.dados = dados
+        self._ultima_gravacao = 0.0
+        self._alterado = False
+        self._anteriores = []  # Partes do manifesto anterior, candidatas a reaproveitamento
+        self._tamanho_saida = 0
+        self._bytes_confirmados = 0
+        self._prefixo_valido = True
+
+    @staticmethod
+    def hash_arquivo(caminho: str) -> str:
+        """Calcula o SHA-256 de um arquivo sem carregá-lo inteiro na memória."""
+        h = hashlib.sha256()
+        with open(caminho, "rb") as f:
+            for bloco in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(bloco)
+        return h.hexdigest()
+
+    @staticmethod
+    def hash_texto(texto: str) -> str:
+        return hashlib.sha256(texto.encode("utf-8")).hexdigest()[:16]
+
+    @staticmethod
+    def gravar_json_atomico(caminho: str, dados: dict) -> None:
+        """Grava JSON em arquivo temporário e o renomeia, evitando manifestos truncados."""
+        diretorio = os.path.dirname(os.path.abspath(caminho))
+        fd, temporario = tempfile.mkstemp(dir=diretorio, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(dados, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporario, caminho)
+        except BaseException:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+            raise
+
+    @classmethod
+    def abrir(
+        cls,
+        caminho_manifesto: str,
+        caminho_origem: str,
+        voz: str,
+        saida: str,
+    ) -> "jobJournal":
+        """
+        Abre o manifesto de uma conversão. As partes são registradas uma a uma com
+        registrar_parte, à medida que o texto é lido; se existir um manifesto anterior
+        do mesmo arquivo, voz e saída, as partes concluídas dele são aproveitadas.
+        """
+        hash_origem = cls.hash_arquivo(caminho_origem)
+
+        anterior = None
+        try:
+            with open(caminho_manifesto, "r", encoding="utf-8") as f:
+                anterior = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+        compativel = (
+            anterior is not None
+            and anterior.get("versao") == cls.VERSAO
+            and anterior.get("hash_origem") == hash_origem
+            and anterior.get("voz") == voz
+            and anterior.get("saida") == saida
+        )
+
+        journal = cls(
+            caminho_manifesto,
+            {
+                "versao": cls.VERSAO,
+                "origem": os.path.abspath(caminho_origem),
+                "hash_origem": hash_origem,
+                "voz": voz,
+                "saida": saida,
+                "chunks": [],
+            },
+        )
+        if compativel:
+            journal._anteriores = anterior["chunks"]
+            journal._tamanho_saida = os.path.getsize(saida) if os.path.exists(saida) else 0
+        return journal
+
+    def registrar_parte(self, parte: str, capitulo: str = None) -> bool:
+        """
+        Registra a próxima parte do texto e indica se ela já está concluída.
+        `capitulo` é o título do capítulo que começa nesta parte, se houver.
+        As partes são gravadas em ordem no arquivo de saída, então as concluídas
+        formam sempre um prefixo; só é aproveitado o prefixo que de fato está no
+        disco e cujas partes não mudaram.
+        """
+        indice = len(self.chunks) + 1
+        chunk = {
+            "indice": indice,
+            "hash": self.hash_texto(parte),
+            "status": "pendente",
+            "offset": None,
+            "tamanho": None,
+            "duracao": None,
+            "capitulo": capitulo,
+        }
+        if self._prefixo_valido and indice <= len(self._anteriores):
+            anterior = self._anteriores[indice - 1]
+            fim = (anterior["offset"] or 0) + (anterior["tamanho"] or 0)
+            if (
+                anterior["hash"] == chunk["hash"]
+                and anterior["status"] == "concluido"
+                and anterior["offset"] == self._bytes_confirmados
+                and fim <= self._tamanho_saida
+            ):
+                chunk.update(
+                    status="concluido",
+                    offset=anterior["offset"],
+                    tamanho=anterior["tamanho"],
+                    duracao=anterior.get("duracao"),
+                )
+                self._bytes_confirmados = fim
+        if chunk["status"] != "concluido":
+            # Depois da primeira parte pendente nada mais pode ser aproveitado
+            self._prefixo_valido = False
+            self._anteriores = []
+        self.chunks.append(chunk)
+        self._alterado = True
+        return chunk["status"] == "concluido"
+
+    @property
+    def chunks(self) -> list:
+        return self.dados["chunks"]
+
+    def pendentes(self) -> list:
+        """Índices (base 1) das partes ainda não gravadas na saída."""
+        return [c["indice"] for c in self.chunks if c["status"] != "concluido"]
+
+    def concluidos(self) -> int:
+        return sum(1 for c in self.chunks if c["status"] == "concluido")
+
+    def bytes_confirmados(self) -> int:
+        """Tamanho do prefixo da saída que corresponde a partes concluídas."""
+        return sum(c["tamanho"] for c in self.chunks if c["status"] == "concluido")
+
+    def duracao_total(self):
+        """
+        Soma das durações (segundos) das partes concluídas, ou None se alguma não tiver
+        a duração registrada (ex: manifesto gravado por uma versão anterior).
+        """
+        duracoes = [c.get("duracao") for c in self.chunks if c["status"] == "concluido"]
+        if None in duracoes:
+            return None
+        return sum(duracoes)
+
+    def marcar_concluido(self, indice: int, offset: int, tamanho: int, duracao: float = None) -> None:
+        chunk = self.chunks[indice - 1]
+        chunk["status"] = "concluido"
+        chunk["offset"] = offset
+        chunk["tamanho"] = tamanho
+        chunk["duracao"] = duracao
+        self._alterado = True
+        self.salvar()
+
+    def salvar(self, forcar: bool = False) -> None:
+        """Grava o manifesto, no máximo uma vez por INTERVALO_GRAVACAO, salvo se forçado."""
+        agora = time.monotonic()
+        if not forcar and (
+            not self._alterado
+            or agora - self._ultima_gravacao < self.INTERVALO_GRAVACAO
+        ):
+            return
+        self.gravar_json_atomico(self.caminho_manifesto, self.dados)
+        self._ultima_gravacao = agora
+        self._alterado = False
+
+    def remover(self) -> None:
+        """Remove o manifesto após a conclusão do job."""
+        if os.path.exists(self.caminho_manifesto):
+            os.remove(self.caminho_manifesto)
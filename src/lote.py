@@ -0,0 +1,127 @@
+import os
+import asyncio
+from configs import *
+from fila_jobs import filaJobs
+from concorrencia import limitadorCompartilhado
+from metricas import metricasJob
+
+
+class processadorLote:
+    """
+    Executa os documentos de uma filaJobs com até `documentos` jobs em andamento ao
+    mesmo tempo, todos sintetizando por um único limitadorCompartilhado: as vagas do
+    TTS são divididas entre os jobs por prioridade (fila justa ponderada), e o fim de
+    um livro, a extração do próximo PDF ou o pós-processamento no FFmpeg não deixam
+    o TTS ocioso enquanto outros documentos têm partes a sintetizar.
+    Jobs incluídos na fila durante a execução (ex: por outro processo) também são
+    executados. A extração do texto e o FFmpeg rodam em threads, fora do loop.
+    """
+
+    def __init__(
+        self,
+        fila: filaJobs,
+        backend=None,
+        cache=None,
+        documentos: int = LOTE_DOCUMENTOS_SIMULTANEOS,
+        concorrencia: int = CONCORRENCIA_INICIAL,
+        concorrencia_maxima: int = CONCORRENCIA_MAXIMA,
+        trabalhadores_pdf: int = PDF_TRABALHADORES,
+        trabalhadores_velocidade: int = ATEMPO_TRABALHADORES,
+        arquivo_metricas: str = ARQUIVO_METRICAS,
+        arquivo_prometheus: str = ARQUIVO_METRICAS_PROMETHEUS,
+    ):
+        self.fila = fila
+        self.backend = backend
+        self.cache = cache
+        self.documentos = max(1, documentos)
+        self.limitador = limitadorCompartilhado(
+            inicial=concorrencia, maximo=max(concorrencia, concorrencia_maxima)
+        )
+        self.trabalhadores_pdf = trabalhadores_pdf
+        self.trabalhadores_velocidade = trabalhadores_velocidade
+        self.arquivo_metricas = arquivo_metricas
+        self.arquivo_prometheus = arquivo_prometheus
+
+    async def executar(self) -> list:
+        """Executa a fila até esvaziá-la e retorna o resumo de cada job executado."""
+        recuperados = self.fila.recuperar_interrompidos()
+        if recuperados:
+            print(f"♻️ {recuperados} job(s) interrompido(s) voltaram para a fila.")
+        resumos = []
+        em_andamento = set()
+        while True:
+            while len(em_andamento) < self.documentos:
+                job = self.fila.proximo()
+                if job is None:
+                    break
+                em_andamento.add(asyncio.ensure_future(self.executar_job(job)))
+            if resumos:
+                profundidade = self.fila.profundidade()
+                print(
+                    f"📚 Lote: {profundidade['jobs_concluidos']} concluído(s), "
+                    f"{profundidade['jobs_executando']} em andamento, "
+                    f"{profundidade['jobs_pendentes']} na fila | "
+                    f"Vazão: {self.fila.vazao()['caracteres_s']:.0f} caracteres/s"
+                )
+            if not em_andamento:
+                break
+            concluidos, em_andamento = await asyncio.wait(
+                em_andamento, return_when=asyncio.FIRST_COMPLETED
+            )
+            for tarefa in concluidos:
+                resumos.append(tarefa.result())
+        return resumos
+
+    async def executar_job(self, job: dict) -> dict:
+        """Prepara, converte e pós-processa um documento da fila, registrando o resultado."""
+        from pdfParser import pdfCoverter
+        from conversor import Conversor
+        from audio import Audio
+
+        entrada = job["entrada"]
+        resumo = {"job": job["id"], "entrada": entrada, "status": "falha"}
+        metricas = metricasJob(entrada, voz=job["voz"], lote_job=job["id"], prioridade=job["prioridade"])
+        try:
+            if not os.path.isfile(entrada):
+                raise Exception(f"❌ Arquivo não encontrado: {entrada}")
+            with metricas.ativar():
+                caminho_txt = await asyncio.to_thread(
+                    pdfCoverter.preparar_arquivo, entrada, self.trabalhadores_pdf
+                )
+                # Um diretório por job: documentos com o mesmo nome (ou o mesmo documento
+                # incluído duas vezes) não dividem saída nem manifesto de retomada
+                nome = os.path.splitext(os.path.basename(entrada))[0]
+                diretorio_saida = os.path.join(
+                    job["diretorio_saida"] or os.path.dirname(entrada), f"{nome}_{job['id']}_audio"
+                )
+                resumo = await Conversor.converter_arquivo(
+                    caminho_txt,
+                    job["voz"],
+                    diretorio_saida=diretorio_saida,
+                    cache=self.cache,
+                    backend=self.backend,
+                    limitador=self.limitador.cota(os.path.basename(entrada), job["prioridade"]),
+                    acompanhamento=self.fila.acompanhar(job["id"]),
+                )
+                resumo["job"] = job["id"]
+                resumo["entrada"] = entrada
+                resumo["arquivos"] = [resumo["saida"]] if resumo["saida"] else []
+                if resumo["status"] == "ok" and (job["velocidade"] != 1.0 or job["formato"] == "mp4"):
+                    resumo["arquivos"] = await asyncio.to_thread(
+                        Audio.melhorar_audio,
+                        resumo["saida"],
+                        job["velocidade"],
+                        job["formato"],
+                        self.trabalhadores_velocidade,
+                        duracao_original=resumo["duracao_audio"],
+                        capitulos=resumo["capitulos"],
+                    )
+        except Exception as e:
+            print(f"\n❌ Erro ao converter {entrada}: {e}")
+            resumo["status"] = "falha"
+            resumo["erro"] = str(e)
+        resumo["metricas"] = metricas.finalizar(
+            resumo["status"], self.arquivo_metricas, self.arquivo_prometheus
+        )
+        self.fila.finalizar(job["id"], resumo)
+        return resumo
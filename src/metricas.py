@@ -0,0 +1,276 @@
+import os
+import json
+import time
+import uuid
+import tempfile
+import contextlib
+import contextvars
+from configs import ARQUIVO_METRICAS, ARQUIVO_METRICAS_PROMETHEUS
+
+# Job cujas métricas estão sendo coletadas. As tarefas do asyncio herdam o contexto
+# de quem as criou, então as partes sintetizadas em paralelo registram no job certo.
+_JOB_ATUAL = contextvars.ContextVar("metricas_job", default=None)
+
+PREFIXO_PROMETHEUS = "conversor_tts"
+PERCENTIS = (50, 95, 99)
+
+
+class metricasJob:
+    """
+    Métricas de um job de conversão: tempo de cada etapa (leitura, detecção de
+    encoding, extração do PDF, limpeza, divisão, síntese, montagem, ffmpeg),
+    contadores (bytes, partes, novas tentativas) e amostras com percentis
+    (latência do TTS).
+
+    O job é ativado com `with job.ativar():` e, a partir daí, o código instrumentado
+    registra nele pelos métodos estáticos (etapa, contar, observar, anotar), que não
+    fazem nada quando não há job ativo. No fim, `finalizar` acrescenta uma linha JSON
+    ao arquivo de métricas e, se configurado, regrava o textfile do Prometheus
+    (node_exporter) com os valores do último job.
+    """
+
+    def __init__(self, entrada: str = None, **info):
+        self.id = uuid.uuid4().hex[:12]
+        self.entrada = os.path.abspath(entrada) if entrada else None
+        self.info = dict(info)
+        self.inicio = time.time()
+        self.duracao = None
+        self.status = None
+        self.etapas = {}  # nome → {"segundos", "vezes"}
+        self.limpeza = {}  # pipeline → relatório do pipelineTexto
+        self.contadores = {}  # nome → valor ou {rótulo: valor}
+        self.rotulos = {}  # nome do contador → nome do rótulo
+        self.amostras = {}  # nome → lista de valores
+
+    @staticmethod
+    def atual():
+        return _JOB_ATUAL.get()
+
+    @contextlib.contextmanager
+    def ativar(self):
+        token = _JOB_ATUAL.set(self)
+        try:
+            yield self
+        finally:
+            _JOB_ATUAL.reset(token)
+
+    @staticmethod
+    @contextlib.contextmanager
+    def etapa(nome: str):
+        """Mede o bloco e soma o tempo na etapa `nome` do job atual."""
+        job = _JOB_ATUAL.get()
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            if job is not None:
+                job.registrar_etapa(nome, time.perf_counter() - inicio)
+
+    @staticmethod
+    def contar(nome: str, valor: float = 1, **rotulo) -> None:
+        """
+        Soma `valor` ao contador `nome` do job atual. Um rótulo opcional separa o
+        contador por categoria, ex: contar("retentativas", classe="transitorio").
+        """
+        job = _JOB_ATUAL.get()
+        if job is None:
+            return
+        if rotulo:
+            ((chave, categoria),) = rotulo.items()
+            job.rotulos[nome] = chave
+            valores = job.contadores.setdefault(nome, {})
+            valores[categoria] = valores.get(categoria, 0) + valor
+        else:
+            job.contadores[nome] = job.contadores.get(nome, 0) + valor
+
+    @staticmethod
+    def observar(nome: str, valor: float) -> None:
+        """Guarda uma amostra (ex: latência de uma requisição) para os percentis."""
+        job = _JOB_ATUAL.get()
+        if job is not None:
+            job.amostras.setdefault(nome, []).append(valor)
+
+    @staticmethod
+    def anotar(chave: str, valor) -> None:
+        """Inclui uma informação descritiva no job (ex: encoding detectado)."""
+        job = _JOB_ATUAL.get()
+        if job is not None:
+            job.info[chave] = valor
+
+    @staticmethod
+    def registrar_limpeza(pipeline: str, relatorio: dict) -> None:
+        """Soma ao job o relatório de um pipelineTexto (tempo e bytes por etapa)."""
+        job = _JOB_ATUAL.get()
+        if job is None:
+            return
+        acumulado = job.limpeza.setdefault(pipeline, {})
+        for nome, dados in relatorio.items():
+            atual = acumulado.setdefault(
+                nome, {"passada": dados["passada"], "tempo": 0.0, "substituicoes": 0, "bytes_alterados": 0}
+            )
+            for campo in ("tempo", "substituicoes", "bytes_alterados"):
+                atual[campo] += dados[campo]
+
+    def registrar_etapa(self, nome: str, segundos: float) -> None:
+        dados = self.etapas.setdefault(nome, {"segundos": 0.0, "vezes": 0})
+        dados["segundos"] += segundos
+        dados["vezes"] += 1
+
+    @staticmethod
+    def percentis(amostras: list) -> dict:
+        """Percentis pelo método do posto mais próximo, além de média, máximo e total."""
+        if not amostras:
+            return {"n": 0}
+        ordenadas = sorted(amostras)
+        resultado = {"n": len(ordenadas)}
+        for p in PERCENTIS:
+            posto = max(1, -(-p * len(ordenadas) // 100))
+            resultado[f"p{p}"] = ordenadas[posto - 1]
+        resultado["max"] = ordenadas[-1]
+        resultado["soma"] = sum(ordenadas)
+        resultado["media"] = resultado["soma"] / len(ordenadas)
+        return resultado
+
+    def resumo(self) -> dict:
+        return {
+            "job": self.id,
+            "entrada": self.entrada,
+            "inicio": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.inicio)),
+            "duracao": self.duracao if self.duracao is not None else time.time() - self.inicio,
+            "status": self.status,
+            "info": self.info,
+            "etapas": self.etapas,
+            "limpeza": self.limpeza,
+            "contadores": self.contadores,
+            "distribuicoes": {
+                nome: metricasJob.percentis(valores) for nome, valores in self.amostras.items()
+            },
+        }
+
+    def finalizar(
+        self,
+        status: str,
+        caminho_jsonl: str = ARQUIVO_METRICAS,
+        caminho_prometheus: str = ARQUIVO_METRICAS_PROMETHEUS,
+    ) -> dict:
+        """Encerra o job e grava as métricas. Retorna o resumo gravado."""
+        self.status = status
+        self.duracao = time.time() - self.inicio
+        resumo = self.resumo()
+        try:
+            if caminho_jsonl:
+                metricasJob.gravar_jsonl(resumo, caminho_jsonl)
+            if caminho_prometheus:
+                metricasJob.gravar_prometheus(resumo, caminho_prometheus, self.rotulos)
+        except OSError as e:
+            print(f"⚠️ Não foi possível gravar as métricas do job: {e}")
+        return resumo
+
+    @staticmethod
+    def gravar_jsonl(resumo: dict, caminho: str) -> None:
+        """Acrescenta o job como uma linha JSON; uma única escrita em modo append."""
+        diretorio = os.path.dirname(os.path.abspath(caminho))
+        os.makedirs(diretorio, exist_ok=True)
+        linha = json.dumps(resumo, ensure_ascii=False) + "\n"
+        with open(caminho, "a", encoding="utf-8") as f:
+            f.write(linha)
+
+    @staticmethod
+    def _rotulos(**rotulos) -> str:
+        if not rotulos:
+            return ""
+        pares = ",".join(
+            '{}="{}"'.format(
+                chave, str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+            )
+            for chave, valor in rotulos.items()
+        )
+        return "{" + pares + "}"
+
+    @staticmethod
+    def _numero(valor) -> str:
+        valor = float(valor)
+        return str(int(valor)) if valor.is_integer() else repr(valor)
+
+    @staticmethod
+    def formatar_prometheus(resumo: dict, rotulos_contadores: dict = None) -> str:
+        """Texto no formato de exposição do Prometheus com as métricas de um job."""
+        p = PREFIXO_PROMETHEUS
+        r = metricasJob._rotulos
+        n = metricasJob._numero
+        linhas = []
+
+        def metrica(nome, tipo, ajuda, valores):
+            linhas.append(f"# HELP {p}_{nome} {ajuda}")
+            linhas.append(f"# TYPE {p}_{nome} {tipo}")
+            for rotulos, valor in valores:
+                linhas.append(f"{p}_{nome}{r(**rotulos)} {n(valor)}")
+
+        metrica(
+            "ultimo_job_info",
+            "gauge",
+            "Último job concluído (valor sempre 1).",
+            [({"job": resumo["job"], "entrada": os.path.basename(resumo["entrada"] or ""), "status": resumo["status"]}, 1)],
+        )
+        metrica("ultimo_job_timestamp_segundos", "gauge", "Fim do último job (epoch).", [({}, time.time())])
+        metrica("ultimo_job_duracao_segundos", "gauge", "Duração do último job.", [({}, resumo["duracao"])])
+        metrica(
+            "etapa_segundos",
+            "gauge",
+            "Tempo gasto em cada etapa no último job.",
+            [({"etapa": nome}, dados["segundos"]) for nome, dados in resumo["etapas"].items()],
+        )
+        limpeza = [
+            ({"pipeline": pipeline, "etapa": nome}, dados)
+            for pipeline, etapas in resumo["limpeza"].items()
+            for nome, dados in etapas.items()
+        ]
+        metrica(
+            "limpeza_segundos",
+            "gauge",
+            "Tempo da passada de cada etapa de limpeza (compartilhado por etapas fundidas).",
+            [(rotulos, dados["tempo"]) for rotulos, dados in limpeza],
+        )
+        metrica(
+            "limpeza_bytes_alterados",
+            "gauge",
+            "Bytes alterados por etapa de limpeza no último job.",
+            [(rotulos, dados["bytes_alterados"]) for rotulos, dados in limpeza],
+        )
+        rotulos_contadores = rotulos_contadores or {}
+        for nome, valor in resumo["contadores"].items():
+            if isinstance(valor, dict):
+                chave = rotulos_contadores.get(nome, "categoria")
+                valores = [({chave: categoria}, v) for categoria, v in valor.items()]
+            else:
+                valores = [({}, valor)]
+            metrica(nome, "gauge", f"Contador '{nome}' do último job.", valores)
+        for nome, dist in resumo["distribuicoes"].items():
+            linhas.append(f"# HELP {p}_{nome} Distribuição de '{nome}' no último job.")
+            linhas.append(f"# TYPE {p}_{nome} summary")
+            for percentil in PERCENTIS:
+                if f"p{percentil}" in dist:
+                    linhas.append(
+                        f"{p}_{nome}{r(quantile=str(percentil / 100))} {n(dist[f'p{percentil}'])}"
+                    )
+            linhas.append(f"{p}_{nome}_sum {n(dist.get('soma', 0))}")
+            linhas.append(f"{p}_{nome}_count {dist['n']}")
+        return "\n".join(linhas) + "\n"
+
+    @staticmethod
+    def gravar_prometheus(resumo: dict, caminho: str, rotulos_contadores: dict = None) -> None:
+        """
+        Regrava o textfile de forma atômica (arquivo temporário + rename), como o
+        coletor de textfile do node_exporter exige para não ler um arquivo pela metade.
+        """
+        diretorio = os.path.dirname(os.path.abspath(caminho))
+        os.makedirs(diretorio, exist_ok=True)
+        descritor, temporario = tempfile.mkstemp(dir=diretorio, prefix=".metricas_", suffix=".tmp")
+        try:
+            with os.fdopen(descritor, "w", encoding="utf-8") as f:
+                f.write(metricasJob.formatar_prometheus(resumo, rotulos_contadores))
+            os.replace(temporario, caminho)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(temporario)
+            raise
@@ -0,0 +1,82 @@
+import os
+import asyncio
+from metricas import metricasJob
+
+
+class montadorAudio:
+    """
+    Monta o arquivo final em ordem, à medida que as partes ficam prontas.
+    As partes podem terminar fora de ordem: elas aguardam num buffer de reordenação
+    e são anexadas ao arquivo assim que todas as anteriores foram gravadas, o que
+    dispensa arquivos temporários e a concatenação final, e permite ouvir o início
+    do áudio enquanto o restante ainda está sendo gerado.
+    """
+
+    def __init__(
+        self,
+        caminho_saida: str,
+        proxima: int = 1,
+        bytes_gravados: int = 0,
+        janela: int = 20,
+        ao_gravar=None,
+    ):
+        """
+        `proxima` é o índice (base 1) da próxima parte a ser gravada e `bytes_gravados`
+        o tamanho já confirmado do arquivo (usado na retomada; o excedente é truncado).
+        `janela` limita quantas partes podem estar à frente da próxima, mantendo o
+        buffer limitado. `ao_gravar(indice, offset, tamanho)` é chamado após cada gravação.
+        """
+        self.caminho_saida = caminho_saida
+        self.proxima = proxima
+        self.bytes_gravados = bytes_gravados
+        self.janela = janela
+        self.ao_gravar = ao_gravar
+        self.falhou = False
+        self._buffer = {}
+        self._condicao = asyncio.Condition()
+
+        modo = "r+b" if bytes_gravados and os.path.exists(caminho_saida) else "wb"
+        self._arquivo = open(caminho_saida, modo)
+        self._arquivo.truncate(bytes_gravados)
+        self._arquivo.seek(bytes_gravados)
+
+    async def aguardar_vez(self, indice: int) -> bool:
+        """
+        Aguarda até que a parte esteja dentro da janela de reordenação.
+        Retorna False se a montagem foi abortada por falha de uma parte anterior.
+        """
+        async with self._condicao:
+            await self._condicao.wait_for(
+                lambda: self.falhou or indice < self.proxima + self.janela
+            )
+            return not self.falhou
+
+    async def entregar(self, indice: int, dados: bytes) -> None:
+        """Recebe o áudio de uma parte e grava todas as partes consecutivas disponíveis."""
+        async with self._condicao:
+            self._buffer[indice] = dados
+            with metricasJob.etapa("montagem"):
+                self._gravar_consecutivas()
+            self._condicao.notify_all()
+
+    def _gravar_consecutivas(self) -> None:
+        while self.proxima in self._buffer:
+            bloco = self._buffer.pop(self.proxima)
+            offset = self.bytes_gravados
+            self._arquivo.write(bloco)
+            self._arquivo.flush()
+            self.bytes_gravados += len(bloco)
+            if self.ao_gravar is not None:
+                self.ao_gravar(self.proxima, offset, len(bloco))
+            self.proxima += 1
+
+    async def abortar(self) -> None:
+        """Interrompe a montagem após a falha definitiva de uma parte."""
+        async with self._condicao:
+            self.falhou = True
+            self._buffer.clear()
+            self._condicao.notify_all()
+
+    def fechar(self) -> None:
+        if not self._arquivo.closed:
+            self._arquivo.close()
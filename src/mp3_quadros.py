@@ -0,0 +1,463 @@
+import os
+import mmap
+from collections import namedtuple
+from configs import BUFFER_IO
+
+# Bitrates (kbps) por (MPEG-1?, camada), na ordem do índice do cabeçalho (0 = formato livre)
+_BITRATES = {
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+# Taxas de amostragem pelos bits de versão: 0 = MPEG-2.5, 2 = MPEG-2, 3 = MPEG-1
+_TAXAS = {0: (11025, 12000, 8000), 2: (22050, 24000, 16000), 3: (44100, 48000, 32000)}
+_TAMANHO_MAXIMO_QUADRO = 2881  # MPEG-1 Layer II/III, 320 kbps a 32 kHz, com padding
+
+cabecalhoMP3 = namedtuple(
+    "cabecalhoMP3", "versao camada bitrate taxa amostras tamanho canais"
+)
+
+
+class quadrosMP3:
+    """
+    Leitura da estrutura de arquivos MP3 sem decodificar o áudio: tags ID3v2/ID3v1,
+    cabeçalhos de quadro e os cabeçalhos Xing/Info (LAME) e VBRI, que informam o total
+    de quadros. Arquivos sem esses cabeçalhos (como o áudio do Edge TTS) têm a duração
+    calculada percorrendo os quadros, lendo só os 4 bytes do cabeçalho de cada um.
+    `dados` pode ser bytes, bytearray ou um mmap.
+    """
+
+    _cabecalhos = {}  # Cabeçalho (inteiro de 4 bytes) → cabecalhoMP3; poucos se repetem
+
+    @staticmethod
+    def cabecalho(valor: int):
+        """Interpreta os 4 bytes do cabeçalho de um quadro. Retorna None se não for válido."""
+        if valor in quadrosMP3._cabecalhos:
+            return quadrosMP3._cabecalhos[valor]
+        if valor >> 21 != 0x7FF:
+            return None
+        versao = (valor >> 19) & 3
+        camada = 4 - ((valor >> 17) & 3)
+        indice_bitrate = (valor >> 12) & 0xF
+        indice_taxa = (valor >> 10) & 3
+        if versao == 1 or camada == 4 or indice_bitrate in (0, 15) or indice_taxa == 3:
+            return None
+        mpeg1 = versao == 3
+        bitrate = _BITRATES[(mpeg1, camada)][indice_bitrate] * 1000
+        taxa = _TAXAS[versao][indice_taxa]
+        padding = (valor >> 9) & 1
+        if camada == 1:
+            amostras = 384
+            tamanho = (12 * bitrate // taxa + padding) * 4
+        else:
+            amostras = 1152 if mpeg1 or camada == 2 else 576
+            tamanho = amostras // 8 * bitrate // taxa + padding
+        canais = 1 if (valor >> 6) & 3 == 3 else 2
+        info = cabecalhoMP3(versao, camada, bitrate, taxa, amostras, tamanho, canais)
+        quadrosMP3._cabecalhos[valor] = info
+        return info
+
+    @staticmethod
+    def _ler_cabecalho(dados, pos: int):
+        if pos + 4 > len(dados):
+            return None
+        return quadrosMP3.cabecalho(int.from_bytes(dados[pos : pos + 4], "big"))
+
+    @staticmethod
+    def tamanho_id3(inicio: bytes) -> int:
+        """Tamanho total de uma tag ID3v2 a partir dos seus 10 primeiros bytes (0 se não houver)."""
+        if len(inicio) < 10 or inicio[:3] != b"ID3":
+            return 0
+        tamanho = 0
+        for byte in inicio[6:10]:  # Inteiro "syncsafe": 7 bits por byte
+            tamanho = (tamanho << 7) | (byte & 0x7F)
+        rodape = 10 if inicio[5] & 0x10 else 0
+        return 10 + tamanho + rodape
+
+    @staticmethod
+    def pular_id3(dados, pos: int = 0) -> int:
+        """Posição logo após as tags ID3v2 que começam em `pos`."""
+        while True:
+            tamanho = quadrosMP3.tamanho_id3(dados[pos : pos + 10])
+            if not tamanho:
+                return pos
+            pos += tamanho
+
+    @staticmethod
+    def fim_audio(dados) -> int:
+        """Fim dos quadros de áudio, antes de uma eventual tag ID3v1 no final."""
+        fim = len(dados)
+        if fim >= 128 and dados[fim - 128 : fim - 125] == b"TAG":
+            fim -= 128
+        return fim
+
+    @staticmethod
+    def sincronizar(dados, pos: int, fim: int):
+        """
+        Posição do próximo quadro a partir de `pos`. Um candidato só é aceito se o quadro
+        seguinte também começar com um cabeçalho compatível (ou se for o último).
+        """
+        while True:
+            pos = dados.find(b"\xff", pos, fim - 3)
+            if pos < 0:
+                return None
+            info = quadrosMP3._ler_cabecalho(dados, pos)
+            if info is not None:
+                seguinte = pos + info.tamanho
+                if seguinte == fim:
+                    return pos
+                proximo = quadrosMP3._ler_cabecalho(dados, seguinte)
+                if proximo is not None and (proximo.versao, proximo.camada, proximo.taxa) == (
+                    info.versao,
+                    info.camada,
+                    info.taxa,
+                ):
+                    return pos
+            pos += 1
+
+    @staticmethod
+    def _posicao_xing(pos: int, info: cabecalhoMP3) -> int:
+        """O cabeçalho Xing/Info fica logo após as informações laterais do quadro."""
+        if info.versao == 3:
+            lado = 17 if info.canais == 1 else 32
+        else:
+            lado = 9 if info.canais == 1 else 17
+        return pos + 4 + lado
+
+    @staticmethod
+    def quadros_declarados(dados, pos: int, info: cabecalhoMP3, fim: int = None):
+        """
+        Total de quadros informado por um cabeçalho Xing/Info ou VBRI no quadro em `pos`,
+        ou None se o quadro não tiver esse cabeçalho (ou se ele não trouxer o total).
+        Com `fim` (fim do áudio), o total só é aceito se o tamanho declarado conferir.
+        """
+        xing = quadrosMP3._posicao_xing(pos, info)
+        if dados[xing : xing + 4] in (b"Xing", b"Info"):
+            flags = int.from_bytes(dados[xing + 4 : xing + 8], "big")
+            if not flags & 1:
+                return None
+            if flags & 2 and fim is not None:
+                # Arquivos unidos sem refazer o cabeçalho mantêm o do primeiro: o total de
+                # bytes declarado não bate com o tamanho real, e os quadros são contados
+                declarados = int.from_bytes(dados[xing + 12 : xing + 16], "big")
+                if abs(declarados - (fim - pos)) > info.tamanho * 2:
+                    return None
+            return int.from_bytes(dados[xing + 8 : xing + 12], "big")
+        if dados[pos + 36 : pos + 40] == b"VBRI":
+            return int.from_bytes(dados[pos + 50 : pos + 54], "big")
+        return None
+
+    @staticmethod
+    def tem_cabecalho_informativo(dados, pos: int, info: cabecalhoMP3) -> bool:
+        """Indica se o quadro em `pos` é um cabeçalho Xing/Info/VBRI (sem áudio)."""
+        xing = quadrosMP3._posicao_xing(pos, info)
+        return dados[xing : xing + 4] in (b"Xing", b"Info") or dados[pos + 36 : pos + 40] == b"VBRI"
+
+    @staticmethod
+    def percorrer(dados, pos: int, fim: int) -> tuple:
+        """
+        Percorre os quadros completos de dados[pos:fim], ressincronizando após trechos
+        inválidos. Retorna (quadros, segundos, posição onde parou).
+        """
+        quadros = 0
+        segundos = 0.0
+        cabecalhos = quadrosMP3._cabecalhos
+        while pos + 4 <= fim:
+            valor = int.from_bytes(dados[pos : pos + 4], "big")
+            info = cabecalhos.get(valor) or quadrosMP3.cabecalho(valor)
+            if info is None:
+                proximo = quadrosMP3.sincronizar(dados, pos + 1, fim)
+                if proximo is None:
+                    break
+                pos = proximo
+                continue
+            if pos + info.tamanho > fim:
+                break
+            quadros += 1
+            segundos += info.amostras / info.taxa
+            pos += info.tamanho
+        return quadros, segundos, pos
+
+    @staticmethod
+    def primeiro_quadro(dados, pos: int = 0):
+        """(posição, cabeçalho) do primeiro quadro de áudio após as tags ID3v2, ou (None, None)."""
+        pos = quadrosMP3.pular_id3(dados, pos)
+        info = quadrosMP3._ler_cabecalho(dados, pos)
+        if info is None:
+            pos = quadrosMP3.sincronizar(dados, pos, quadrosMP3.fim_audio(dados))
+            if pos is None:
+                return None, None
+            info = quadrosMP3._ler_cabecalho(dados, pos)
+        return pos, info
+
+    @staticmethod
+    def duracao(dados) -> float:
+        """Duração em segundos do MP3 em `dados` (bytes, bytearray ou mmap)."""
+        pos, info = quadrosMP3.primeiro_quadro(dados)
+        if pos is None:
+            return 0.0
+        fim = quadrosMP3.fim_audio(dados)
+        total = quadrosMP3.quadros_declarados(dados, pos, info, fim)
+        if total is not None:
+            return total * info.amostras / info.taxa
+        if quadrosMP3.tem_cabecalho_informativo(dados, pos, info):
+            pos += info.tamanho
+        return quadrosMP3.percorrer(dados, pos, fim)[1]
+
+    @staticmethod
+    def duracao_arquivo(caminho: str) -> float:
+        """Duração de um arquivo MP3, lido por mmap (só as páginas tocadas vão para a memória)."""
+        if os.path.getsize(caminho) == 0:
+            return 0.0
+        with open(caminho, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+            return quadrosMP3.duracao(mapa)
+
+    @staticmethod
+    def duracao_stream(arquivo) -> float:
+        """Duração do MP3 lido de um objeto com read() (arquivo, pipe, socket), em blocos."""
+        inicio = arquivo.read(10)
+        while quadrosMP3.tamanho_id3(inicio):
+            arquivo.read(quadrosMP3.tamanho_id3(inicio) - 10)
+            inicio = arquivo.read(10)
+        contador = contadorMP3()
+        contador.alimentar(inicio)
+        for bloco in iter(lambda: arquivo.read(BUFFER_IO), b""):
+            contador.alimentar(bloco)
+        return contador.segundos
+
+
+class contadorMP3:
+    """
+    Soma a duração de um MP3 recebido aos pedaços (ex: blocos de um stream), sem
+    guardar mais que um quadro incompleto entre uma chamada e outra.
+    """
+
+    def __init__(self):
+        self.quadros = 0
+        self.segundos = 0.0
+        self._resto = b""
+        self._inicio = True
+        self._declarado = False
+
+    def alimentar(self, bloco: bytes) -> None:
+        if self._declarado:
+            return
+        dados = self._resto + bloco
+        pos = 0
+        if self._inicio:
+            pos, info = quadrosMP3.primeiro_quadro(dados)
+            if info is None or pos + info.tamanho > len(dados):
+                # Ainda não chegou um quadro inteiro: espera o próximo bloco
+                self._resto = dados[-_TAMANHO_MAXIMO_QUADRO * 2 :]
+                return
+            self._inicio = False
+            total = quadrosMP3.quadros_declarados(dados, pos, info)
+            if total is not None:
+                self.quadros = total
+                self.segundos = total * info.amostras / info.taxa
+                self._declarado = True
+                return
+            if quadrosMP3.tem_cabecalho_informativo(dados, pos, info):
+                pos += info.tamanho
+        quadros, segundos, pos = quadrosMP3.percorrer(dados, pos, len(dados))
+        self.quadros += quadros
+        self.segundos += segundos
+        # Sobra no máximo um quadro incompleto (ou lixo que ainda não deu para descartar)
+        self._resto = dados[pos:][-_TAMANHO_MAXIMO_QUADRO * 2 :]
+
+
+class concatenadorMP3:
+    """
+    Une arquivos MP3 sem decodificar nem recodificar: de cada entrada só os quadros de
+    áudio são copiados (sem as tags ID3 e os quadros Xing/Info/LAME próprios), e o
+    arquivo final recebe um único quadro Xing com o total de quadros, de bytes e a
+    tabela de busca (TOC) do conjunto. A cópia é feita pelo kernel (copy_file_range ou
+    sendfile), sem passar o áudio pela memória do processo; sem essas chamadas, por
+    fatias de um mmap. As entradas precisam ter a mesma versão MPEG, camada, taxa de
+    amostragem e número de canais.
+    """
+
+    _metodos_copia = None  # Formas de cópia disponíveis, na ordem de preferência
+
+    @staticmethod
+    def estrutura(caminho: str) -> tuple:
+        """(início, fim, cabeçalho, quadros, segundos) dos quadros de áudio de um arquivo."""
+        with open(caminho, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return None
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+                pos, info = quadrosMP3.primeiro_quadro(mapa)
+                if pos is None:
+                    return None
+                if quadrosMP3.tem_cabecalho_informativo(mapa, pos, info):
+                    pos += info.tamanho
+                    info = quadrosMP3._ler_cabecalho(mapa, pos)
+                    if info is None:
+                        return None
+                quadros, segundos, fim = quadrosMP3.percorrer(
+                    mapa, pos, quadrosMP3.fim_audio(mapa)
+                )
+                return pos, fim, info, quadros, segundos
+
+    @staticmethod
+    def quadro_xing(valor_cabecalho: int, quadros: int, total_bytes: int, toc: bytes) -> bytes:
+        """
+        Quadro Xing para o arquivo unido, no formato do primeiro quadro de áudio (sem CRC,
+        sem padding e com o menor bitrate em que o cabeçalho completo cabe).
+        """
+        base = (valor_cabecalho | 0x10000) & ~0xF200  # Sem CRC; bitrate e padding zerados
+        for indice in range(1, 15):
+            valor = base | (indice << 12)
+            info = quadrosMP3.cabecalho(valor)
+            xing = quadrosMP3._posicao_xing(0, info)
+            if info.tamanho >= xing + 116:
+                break
+        quadro = bytearray(info.tamanho)
+        quadro[0:4] = valor.to_bytes(4, "big")
+        quadro[xing : xing + 4] = b"Xing"
+        quadro[xing + 4 : xing + 8] = (0x7).to_bytes(4, "big")  # Quadros, bytes e TOC
+        quadro[xing + 8 : xing + 12] = quadros.to_bytes(4, "big")
+        quadro[xing + 12 : xing + 16] = (total_bytes + len(quadro)).to_bytes(4, "big")
+        quadro[xing + 16 : xing + 116] = toc
+        return bytes(quadro)
+
+    @staticmethod
+    def tabela_busca(trechos: list, total_segundos: float, total_bytes: int) -> bytes:
+        """
+        TOC do Xing: para cada 1% da duração, a posição no arquivo (em 1/256 do tamanho).
+        `trechos` traz (segundos, bytes) de cada entrada; dentro de uma entrada a posição
+        é interpolada linearmente.
+        """
+        toc = bytearray(100)
+        if not total_segundos or not total_bytes:
+            return bytes(toc)
+        i = 0
+        tempo = posicao = 0.0
+        for percentual in range(100):
+            alvo = total_segundos * percentual / 100
+            while i < len(trechos) - 1 and tempo + trechos[i][0] <= alvo:
+                tempo += trechos[i][0]
+                posicao += trechos[i][1]
+                i += 1
+            segundos, tamanho = trechos[i]
+            fracao = (alvo - tempo) / segundos if segundos else 0.0
+            toc[percentual] = min(255, int((posicao + fracao * tamanho) * 256 / total_bytes))
+        return bytes(toc)
+
+    @staticmethod
+    def _copiar(entrada, saida: int, inicio: int, tamanho: int) -> None:
+        """Copia `tamanho` bytes da entrada (a partir de `inicio`) para a posição atual da saída."""
+        if concatenadorMP3._metodos_copia is None:
+            metodos = []
+            if hasattr(os, "copy_file_range"):
+                metodos.append(
+                    lambda e, s, pos, n: os.copy_file_range(e.fileno(), s, n, offset_src=pos)
+                )
+            if hasattr(os, "sendfile"):
+                metodos.append(lambda e, s, pos, n: os.sendfile(s, e.fileno(), pos, n))
+            concatenadorMP3._metodos_copia = metodos
+
+        copiado = 0
+        for metodo in list(concatenadorMP3._metodos_copia):
+            try:
+                while copiado < tamanho:
+                    n = metodo(entrada, saida, inicio + copiado, tamanho - copiado)
+                    if n == 0:
+                        break
+                    copiado += n
+                if copiado == tamanho:
+                    return
+            except OSError:
+                # Chamada indisponível neste sistema ou entre estes sistemas de arquivos
+                concatenadorMP3._metodos_copia.remove(metodo)
+
+        with mmap.mmap(entrada.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+            while copiado < tamanho:
+                fim = inicio + copiado + min(BUFFER_IO * 32, tamanho - copiado)
+                copiado += os.write(saida, mapa[inicio + copiado : fim])
+
+    @staticmethod
+    def concatenar(entradas: list, saida: str, id3: bytes = b"") -> dict:
+        """
+        Une os MP3 de `entradas` em `saida` (gravada num temporário e renomeada).
+        `id3` é uma tag ID3v2 opcional gravada no início do arquivo. Retorna quadros,
+        segundos e bytes de áudio do resultado e os trechos (segundos, bytes) de cada entrada.
+        """
+        estruturas = []
+        formato = None
+        for caminho in entradas:
+            estrutura = concatenadorMP3.estrutura(caminho)
+            if estrutura is None:
+                raise ValueError(f"Nenhum quadro MP3 em {caminho}")
+            info = estrutura[2]
+            atual = (info.versao, info.camada, info.taxa, info.canais)
+            if formato is None:
+                formato = atual
+            elif atual != formato:
+                raise ValueError(f"Formato de {caminho} difere do primeiro arquivo: {atual} ≠ {formato}")
+            estruturas.append(estrutura)
+
+        with open(entradas[0], "rb") as f:
+            f.seek(estruturas[0][0])
+            valor_cabecalho = int.from_bytes(f.read(4), "big")
+
+        trechos = [(segundos, fim - inicio) for inicio, fim, _, _, segundos in estruturas]
+        quadros = sum(e[3] for e in estruturas)
+        segundos = sum(t[0] for t in trechos)
+        total_bytes = sum(t[1] for t in trechos)
+        xing = concatenadorMP3.quadro_xing(
+            valor_cabecalho,
+            quadros,
+            total_bytes,
+            concatenadorMP3.tabela_busca(trechos, segundos, total_bytes),
+        )
+
+        concatenadorMP3._gravar(
+            saida,
+            id3 + xing,
+            [(caminho, inicio, fim - inicio) for caminho, (inicio, fim, _, _, _) in zip(entradas, estruturas)],
+        )
+        return {"quadros": quadros, "segundos": segundos, "bytes": total_bytes, "trechos": trechos}
+
+    @staticmethod
+    def recortar(caminho: str, inicio: int, tamanho: int, saida: str, id3: bytes = b"") -> dict:
+        """
+        Grava em `saida` o trecho [inicio, inicio + tamanho) de um MP3 cujos limites
+        caem entre quadros (ex: partes gravadas em sequência por montadorAudio), com um
+        quadro Xing próprio e a tag `id3` opcional. Retorna quadros, segundos e bytes.
+        """
+        with open(caminho, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+            pos, info = quadrosMP3.primeiro_quadro(mapa, inicio)
+            if pos is None or pos >= inicio + tamanho:
+                raise ValueError(f"Nenhum quadro MP3 no trecho {inicio}-{inicio + tamanho} de {caminho}")
+            quadros, segundos, fim = quadrosMP3.percorrer(mapa, pos, inicio + tamanho)
+            valor_cabecalho = int.from_bytes(mapa[pos : pos + 4], "big")
+        xing = concatenadorMP3.quadro_xing(
+            valor_cabecalho,
+            quadros,
+            fim - pos,
+            concatenadorMP3.tabela_busca([(segundos, fim - pos)], segundos, fim - pos),
+        )
+        concatenadorMP3._gravar(saida, id3 + xing, [(caminho, pos, fim - pos)])
+        return {"quadros": quadros, "segundos": segundos, "bytes": fim - pos}
+
+    @staticmethod
+    def _gravar(saida: str, cabecalho: bytes, trechos: list) -> None:
+        """Grava `cabecalho` e os trechos (caminho, início, tamanho) num temporário e o renomeia."""
+        temporario = f"{saida}.tmp"
+        descritor = os.open(temporario, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            while cabecalho:
+                cabecalho = cabecalho[os.write(descritor, cabecalho) :]
+            for caminho, inicio, tamanho in trechos:
+                with open(caminho, "rb") as entrada:
+                    concatenadorMP3._copiar(entrada, descritor, inicio, tamanho)
+        except BaseException:
+            os.close(descritor)
+            os.remove(temporario)
+            raise
+        os.close(descritor)
+        os.replace(temporario, saida)
@@ -0,0 +1,158 @@
+import re
+from functools import lru_cache
+from num2words import num2words
+from configs import LIMITE_DIGITOS_EXTENSO, TAMANHO_CACHE_NUMEROS
+
+DIGITOS = ["zero", "um", "dois", "três", "quatro", "cinco", "seis", "sete", "oito", "nove"]
+MESES = [
+    "janeiro", "fevereiro", "março", "abril", "maio", "junho",
+    "julho", "agosto", "setembro", "outubro", "novembro", "dezembro",
+]
+
+_NUMERO = r"\d{1,3}(?:\.\d{3})+(?!\d)|\d+"
+
+# Uma única varredura reconhece todos os formatos; a ordem das alternativas define a prioridade.
+# O "(?=\d)" comum descarta de uma vez as posições sem dígito, em vez de testar cada formato.
+PADRAO_NUMEROS = re.compile(
+    rf"""
+      R\$\s*(?P<reais>{_NUMERO})(?:,(?P<centavos>\d{{1,2}}))?(?!\d)
+    | \b(?=\d)(?:
+          (?P<dia>\d{{1,2}})/(?P<mes>\d{{1,2}})/(?P<ano>\d{{4}}|\d{{2}})\b
+        | (?P<hora>[01]?\d|2[0-3])(?::|h)(?P<minuto>[0-5]\d)\b
+        | (?P<hora_cheia>[01]?\d|2[0-3])h\b
+        | (?P<inicio>{_NUMERO})\s*[-–]\s*(?P<fim>{_NUMERO})\b
+        | (?P<ordinal>\d+)\s?(?P<genero>[ºª])
+        | (?P<percentual>{_NUMERO})(?:,(?P<percentual_decimal>\d+))?\s?%
+        | (?P<inteiro>{_NUMERO})(?:,(?P<decimal>\d+))?\b
+      )
+    """,
+    re.VERBOSE,
+)
+_ROMANO = re.compile(r"M{0,3}(?:CM|CD|D?C{0,3})(?:XC|XL|L?X{0,3})(?:IX|IV|V?I{0,3})")
+_VALORES_ROMANOS = {"I": 1, "V": 5, "X": 10, "L": 50, "C": 100, "D": 500, "M": 1000}
+_FEMININO = {"um": "uma", "dois": "duas"}
+_PALAVRA_FEMININA = re.compile(r"\b(um|dois)\b|(?<=\w)(entos)\b")
+
+
+class verbalizadorNumeros:
+    """
+    Converte números para texto por extenso em uma única passada sobre o texto:
+    inteiros (com separador de milhar), decimais, valores em reais, intervalos,
+    porcentagens, ordinais, datas e horários. Conversões repetidas (números de
+    página, anos) saem de um cache LRU; números muito longos são lidos dígito a dígito.
+    """
+
+    @staticmethod
+    @lru_cache(maxsize=TAMANHO_CACHE_NUMEROS)
+    def por_extenso(digitos: str) -> str:
+        """Cardinal de uma sequência de dígitos (sem separadores)."""
+        if len(digitos) > LIMITE_DIGITOS_EXTENSO:
+            return verbalizadorNumeros.digito_a_digito(digitos)
+        try:
+            return num2words(int(digitos), lang="pt_BR")
+        except (NotImplementedError, OverflowError, ValueError):
+            return verbalizadorNumeros.digito_a_digito(digitos)
+
+    @staticmethod
+    @lru_cache(maxsize=TAMANHO_CACHE_NUMEROS)
+    def ordinal(digitos: str, feminino: bool = False) -> str:
+        if len(digitos) > LIMITE_DIGITOS_EXTENSO:
+            return verbalizadorNumeros.digito_a_digito(digitos)
+        try:
+            texto = num2words(int(digitos), lang="pt_BR", to="ordinal")
+        except (NotImplementedError, OverflowError, ValueError):
+            return verbalizadorNumeros.digito_a_digito(digitos)
+        if feminino:
+            texto = re.sub(r"o\b", "a", texto)
+        return texto
+
+    @staticmethod
+    def digito_a_digito(digitos: str) -> str:
+        return " ".join(DIGITOS[int(d)] for d in digitos)
+
+    @staticmethod
+    def romano_para_inteiro(romano: str):
+        """Valor de um numeral romano válido (até 3999), ou None."""
+        romano = romano.upper()
+        if not romano or not _ROMANO.fullmatch(romano):
+            return None
+        total = 0
+        for atual, seguinte in zip(romano, romano[1:] + " "):
+            valor = _VALORES_ROMANOS[atual]
+            total += -valor if _VALORES_ROMANOS.get(seguinte, 0) > valor else valor
+        return total
+
+    @staticmethod
+    def feminino(texto: str) -> str:
+        """Concorda o cardinal com substantivos femininos (uma hora, duzentas páginas)."""
+        return _PALAVRA_FEMININA.sub(
+            lambda m: _FEMININO[m.group(1)] if m.group(1) else "entas", texto
+        )
+
+    @staticmethod
+    def _inteiro(numero: str) -> str:
+        return verbalizadorNumeros.por_extenso(numero.replace(".", ""))
+
+    @staticmethod
+    def _decimal(inteiro: str, decimal: str) -> str:
+        texto = verbalizadorNumeros._inteiro(inteiro)
+        if not decimal:
+            return texto
+        # Zeros à esquerda da parte decimal são lidos: 0,05 → "zero vírgula zero cinco"
+        significativos = decimal.lstrip("0")
+        palavras = ["zero"] * (len(decimal) - len(significativos))
+        if significativos:
+            palavras.append(verbalizadorNumeros.por_extenso(significativos))
+        return f"{texto} vírgula {' '.join(palavras)}"
+
+    @staticmethod
+    def substituir(match: re.Match) -> str:
+        """Forma por extenso de um match de PADRAO_NUMEROS."""
+        g = match.group
+        v = verbalizadorNumeros
+
+        if g("reais") is not None:
+            reais = g("reais").replace(".", "")
+            centavos = int(g("centavos").ljust(2, "0")) if g("centavos") else 0
+            partes = []
+            if int(reais) or not centavos:
+                partes.append(
+                    f"{v.por_extenso(reais)} {'real' if int(reais) == 1 else 'reais'}"
+                )
+            if centavos:
+                partes.append(
+                    f"{v.por_extenso(str(centavos))} {'centavo' if centavos == 1 else 'centavos'}"
+                )
+            return " e ".join(partes)
+
+        if g("dia") is not None:
+            dia, mes = int(g("dia")), int(g("mes"))
+            if not (1 <= dia <= 31 and 1 <= mes <= 12):
+                return " barra ".join(v.por_extenso(g(k)) for k in ("dia", "mes", "ano"))
+            texto_dia = "primeiro" if dia == 1 else v.por_extenso(g("dia"))
+            return f"{texto_dia} de {MESES[mes - 1]} de {v.por_extenso(g('ano'))}"
+
+        if g("hora") is not None or g("hora_cheia") is not None:
+            hora = g("hora") or g("hora_cheia")
+            texto = v.feminino(v.por_extenso(hora))
+            texto += " hora" if int(hora) == 1 else " horas"
+            minuto = int(g("minuto") or 0)
+            if minuto:
+                texto += f" e {v.por_extenso(str(minuto))} {'minuto' if minuto == 1 else 'minutos'}"
+            return texto
+
+        if g("inicio") is not None:
+            return f"{v._inteiro(g('inicio'))} a {v._inteiro(g('fim'))}"
+
+        if g("ordinal") is not None:
+            return v.ordinal(g("ordinal"), g("genero") == "ª")
+
+        if g("percentual") is not None:
+            return f"{v._decimal(g('percentual'), g('percentual_decimal'))} por cento"
+
+        return v._decimal(g("inteiro"), g("decimal"))
+
+    @staticmethod
+    def verbalizar(texto: str) -> str:
+        """Substitui todos os números do texto pela forma por extenso."""
+        return PADRAO_NUMEROS.sub(verbalizadorNumeros.substituir, texto)
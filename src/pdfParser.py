@@ -1,6 +1,13 @@
 import os
+import re
+import mmap
+import time
+import codecs
 import subprocess
 import chardet
+from itertools import islice
+from collections import deque, Counter
+from concurrent.futures import ProcessPoolExecutor
 from configs import *
 import os
 import subprocess
@@ -9,13 +16,151 @@ import aioconsole
 from configs import *
 from formatText import textFormat
 from menu import Menu
+from pdf_cache import cachePDF
+from metricas import metricasJob
 import fitz
 
+_documento_trabalhador = None  # PDF aberto uma vez em cada processo da extração paralela
+_DIGITOS = re.compile(r"\d+")
+
+
 class pdfCoverter:
 
     @staticmethod
-    def converter_pdf(path_pdf: str, path_txt: str) -> bool:
-        """Converte PDF para TXT utilizando o módulo fitz."""
+    def _iniciar_trabalhador(path_pdf: str) -> None:
+        global _documento_trabalhador
+        _documento_trabalhador = fitz.open(path_pdf)
+
+    @staticmethod
+    def blocos_pagina(pagina) -> list:
+        """
+        Blocos de texto de uma página do fitz, como pares [texto, chave], na mesma
+        ordem do get_text(). Blocos inteiramente nas margens superior ou inferior
+        recebem uma chave normalizada (minúsculas, números trocados por "#") usada
+        para reconhecer cabeçalhos e rodapés; os demais têm chave None.
+        """
+        area = pagina.rect
+        topo = area.y0 + area.height * PDF_MARGEM_CABECALHO
+        base = area.y1 - area.height * PDF_MARGEM_RODAPE
+        blocos = []
+        for _, y0, _, y1, texto, _, tipo in pagina.get_text("blocks"):
+            if tipo != 0:  # Imagens
+                continue
+            chave = None
+            if y1 <= topo or y0 >= base:
+                chave = _DIGITOS.sub("#", " ".join(texto.lower().split()))
+            blocos.append([texto, chave])
+        return blocos
+
+    @staticmethod
+    def remover_margens_repetidas(
+        paginas,
+        janela: int = PDF_JANELA_CABECALHO,
+        limiar: float = PDF_LIMIAR_CABECALHO,
+    ):
+        """
+        Recebe os blocos de cada página, em ordem, e gera o texto de cada página sem
+        cabeçalhos e rodapés: blocos de margem cuja chave se repete na margem de pelo
+        menos `limiar` das páginas vizinhas (até `janela` antes e depois). Números de
+        página isolados são sempre removidos. Funciona para qualquer diagramação,
+        sem expressões específicas de uma editora.
+        """
+        paginas = iter(paginas)
+        chaves_janela = deque()  # Chaves de margem das páginas da janela atual
+        pendentes = deque()  # Blocos da página atual e das seguintes já lidas
+        contagem = Counter()
+
+        def entrar(blocos):
+            chaves = {chave for _, chave in blocos if chave}
+            chaves_janela.append(chaves)
+            contagem.update(chaves)
+            pendentes.append(blocos)
+
+        for blocos in islice(paginas, janela + 1):
+            entrar(blocos)
+
+        posicao = 0  # Posição da página atual dentro de chaves_janela
+        while pendentes:
+            blocos = pendentes.popleft()
+            vizinhas = len(chaves_janela) - 1
+            texto = []
+            for trecho, chave in blocos:
+                if chave is not None and (
+                    not chave.strip("# ")
+                    or (vizinhas and (contagem[chave] - 1) / vizinhas >= limiar)
+                ):
+                    continue
+                texto.append(trecho)
+            yield "".join(texto)
+
+            proxima = next(paginas, None)
+            if proxima is not None:
+                entrar(proxima)
+            posicao += 1
+            if posicao > janela:
+                contagem.subtract(chaves_janela.popleft())
+                posicao -= 1
+
+    @staticmethod
+    def _extrair_lote(indices: list) -> list:
+        """Extrai os blocos das páginas indicadas no processo trabalhador."""
+        return [pdfCoverter.blocos_pagina(_documento_trabalhador[i]) for i in indices]
+
+    @staticmethod
+    def extrair_paginas(
+        path_pdf: str, trabalhadores: int = PDF_TRABALHADORES, paginas: list = None
+    ):
+        """
+        Gera os blocos (ver blocos_pagina) das páginas do PDF, todas ou só os índices
+        em `paginas`, em ordem.
+        Com mais de um trabalhador, lotes disjuntos de até PDF_PAGINAS_POR_LOTE páginas
+        são extraídos em paralelo por processos que abrem o documento uma única vez;
+        só alguns lotes ficam à frente do que já foi entregue, limitando a memória.
+        """
+        with fitz.open(path_pdf) as documento:
+            if paginas is None:
+                paginas = range(documento.page_count)
+            lotes = [
+                list(paginas[inicio : inicio + PDF_PAGINAS_POR_LOTE])
+                for inicio in range(0, len(paginas), PDF_PAGINAS_POR_LOTE)
+            ]
+            trabalhadores = max(1, min(trabalhadores, len(lotes)))
+            if trabalhadores == 1:
+                for indice in paginas:
+                    yield pdfCoverter.blocos_pagina(documento[indice])
+                return
+
+        with ProcessPoolExecutor(
+            max_workers=trabalhadores,
+            initializer=pdfCoverter._iniciar_trabalhador,
+            initargs=(path_pdf,),
+        ) as executor:
+            restantes = iter(lotes)
+            em_andamento = deque()
+            for lote in restantes:
+                em_andamento.append(executor.submit(pdfCoverter._extrair_lote, lote))
+                if len(em_andamento) >= 2 * trabalhadores:
+                    break
+            while em_andamento:
+                blocos = em_andamento.popleft().result()
+                lote = next(restantes, None)
+                if lote is not None:
+                    em_andamento.append(executor.submit(pdfCoverter._extrair_lote, lote))
+                yield from blocos
+
+    @staticmethod
+    def converter_pdf(
+        path_pdf: str,
+        path_txt: str,
+        trabalhadores: int = PDF_TRABALHADORES,
+        cache: cachePDF = None,
+    ) -> bool:
+        """
+        Converte PDF para TXT utilizando o módulo fitz. As páginas são gravadas
+        no TXT em ordem, à medida que são extraídas por `trabalhadores` processos,
+        já sem cabeçalhos, rodapés e números de página (remover_margens_repetidas).
+        Com `cache`, só as páginas cujo conteúdo não está no cache são extraídas.
+        """
         
         try:
             path_pdf = os.path.abspath(path_pdf)
@@ -41,42 +186,214 @@ class pdfCoverter:
                 raise Exception(f"❌ Erro ao criar diretório de saída: {str(e)}")
 
         try:
-            file = fitz.open(path_pdf)
-            text = ""
-            for pages in file:
-                page = pages.get_text()
-                text += page
+            with metricasJob.etapa("extracao_pdf"):
+                total_paginas = pdfCoverter._extrair_para_txt(
+                    path_pdf, path_txt, trabalhadores, cache
+                )
+        except Exception as e:
+            raise Exception(f"❌ Erro ao converter o PDF: {e}")
+
+        metricasJob.contar("paginas_pdf_extraidas", total_paginas)
+        return True
 
-            with open(path_txt, 'w') as fl:
-                fl.write(text)
+    @staticmethod
+    def _extrair_para_txt(path_pdf: str, path_txt: str, trabalhadores: int, cache: cachePDF) -> int:
+        """Grava o TXT e retorna o número de páginas efetivamente extraídas."""
+        inicio = time.perf_counter()
+        hashes = []
+        em_cache = {}
+        if cache is not None:
+            with fitz.open(path_pdf) as documento:
+                hashes = [cachePDF.hash_pagina(pagina) for pagina in documento]
+            em_cache = cache.obter_paginas(hashes)
+            faltando = [i for i, h in enumerate(hashes) if h not in em_cache]
+            if em_cache:
+                print(
+                    f"♻️ {len(hashes) - len(faltando)} de {len(hashes)} página(s) reaproveitada(s) do cache"
+                )
+        else:
+            faltando = None
 
+        extraidas = pdfCoverter.extrair_paginas(path_pdf, trabalhadores, faltando)
+        novas = []
 
-        except Exception as e:
-            raise Exception(f"❌ Erro ao converter o PDF: {e}")
+        def blocos_em_ordem():
+            if cache is None:
+                yield from extraidas
+                return
+            # Cada índice de `faltando` tem exatamente uma página extraída, na mesma ordem
+            extraidas_por_indice = zip(faltando, extraidas)
+            for indice, hash_pagina in enumerate(hashes):
+                blocos = em_cache.get(hash_pagina)
+                if blocos is None:
+                    indice_extraido, blocos = next(extraidas_por_indice)
+                    if indice_extraido != indice:
+                        raise Exception(f"❌ Página {indice_extraido} extraída fora de ordem (esperada {indice})")
+                    novas.append((hash_pagina, blocos))
+                yield blocos
+
+        total_paginas = 0
+        with open(path_txt, "w", encoding="utf-8") as fl:
+            for texto_pagina in pdfCoverter.remover_margens_repetidas(
+                blocos_em_ordem()
+            ):
+                fl.write(texto_pagina)
+                total_paginas += 1
+        if cache is not None:
+            metricasJob.contar("paginas_pdf_cache", len(hashes) - len(novas))
+            total_paginas = len(novas)
+        if novas:
+            cache.guardar_paginas(novas)
+        duracao = max(time.perf_counter() - inicio, 1e-6)
+        print(
+            f"📄 {total_paginas} página(s) extraída(s) em {duracao:.1f}s "
+            f"({total_paginas / duracao:.1f} páginas/s)"
+        )
+        return total_paginas
+
+    _encodings_detectados = {}  # (caminho, tamanho, mtime) → encoding
+
+    @staticmethod
+    def _amostra_encoding(mapa) -> list:
+        """
+        Trechos usados na detecção: o início do arquivo e JANELAS_ENCODING janelas
+        espalhadas pelo restante, para não depender só do prefixo sem ler o arquivo todo.
+        """
+        tamanho = len(mapa)
+        trechos = [mapa[:AMOSTRA_ENCODING_BYTES]]
+        if tamanho <= AMOSTRA_ENCODING_BYTES:
+            return trechos
+        passo = (tamanho - AMOSTRA_ENCODING_BYTES) // (JANELAS_ENCODING + 1)
+        for n in range(1, JANELAS_ENCODING + 1):
+            inicio = AMOSTRA_ENCODING_BYTES + n * passo
+            trechos.append(mapa[inicio : inicio + TAMANHO_JANELA_ENCODING])
+        return trechos
 
+    @staticmethod
+    def _utf8_valido(trechos: list, arquivo_inteiro: bool) -> bool:
+        """Valida os trechos como UTF-8, tolerando caracteres cortados nas bordas das janelas."""
+        for n, trecho in enumerate(trechos):
+            if n:
+                # A janela pode começar no meio de um caractere multibyte
+                descartar = 0
+                while descartar < 3 and descartar < len(trecho) and 0x80 <= trecho[descartar] < 0xC0:
+                    descartar += 1
+                trecho = trecho[descartar:]
+            decodificador = codecs.getincrementaldecoder("utf-8")()
+            try:
+                decodificador.decode(trecho, final=arquivo_inteiro and n == 0)
+            except UnicodeDecodeError:
+                return False
         return True
 
     @staticmethod
-    def detectar_encoding(caminho_arquivo: str) -> str:
-        """Detecta o encoding de um arquivo de texto."""
+    def detectar_encoding(caminho_arquivo: str, mapa=None) -> str:
+        """
+        Detecta o encoding de um arquivo de texto a partir de uma amostra limitada,
+        sem carregar o arquivo inteiro. `mapa` permite reaproveitar um mmap já aberto
+        pelo chamador. O resultado fica em cache por (caminho, tamanho, mtime).
+        """
         try:
-            with open(caminho_arquivo, "rb") as f:
-                resultado = chardet.detect(f.read())
-            encoding_detectado = resultado["encoding"]
-            if not encoding_detectado:
-                for enc in ENCODINGS_TENTATIVAS:
-                    try:
-                        with open(caminho_arquivo, "r", encoding=enc) as f:
-                            f.read(100)
-                        return enc
-                    except UnicodeDecodeError:
-                        continue
+            estado = os.stat(caminho_arquivo)
+            chave = (os.path.abspath(caminho_arquivo), estado.st_size, estado.st_mtime_ns)
+            if chave in pdfCoverter._encodings_detectados:
+                return pdfCoverter._encodings_detectados[chave]
+            if estado.st_size == 0:
                 return "utf-8"
-            return encoding_detectado
+
+            with metricasJob.etapa("deteccao_encoding"):
+                if mapa is None:
+                    with open(caminho_arquivo, "rb") as f, mmap.mmap(
+                        f.fileno(), 0, access=mmap.ACCESS_READ
+                    ) as mapa_local:
+                        encoding = pdfCoverter._detectar_no_mapa(mapa_local)
+                else:
+                    encoding = pdfCoverter._detectar_no_mapa(mapa)
+            metricasJob.anotar("encoding", encoding)
+            pdfCoverter._encodings_detectados[chave] = encoding
+            return encoding
         except Exception as e:
             print(f"\n⚠️ Erro ao detectar encoding: {str(e)}")
             return "utf-8"
 
+    @staticmethod
+    def _detectar_no_mapa(mapa) -> str:
+        inicio = mapa[:4]
+        if inicio.startswith((codecs.BOM_UTF32_LE, codecs.BOM_UTF32_BE)):
+            return "utf-32"
+        if inicio.startswith(codecs.BOM_UTF8):
+            return "utf-8-sig"
+        if inicio.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+            return "utf-16"
+
+        trechos = pdfCoverter._amostra_encoding(mapa)
+        if pdfCoverter._utf8_valido(trechos, len(mapa) <= AMOSTRA_ENCODING_BYTES):
+            return "utf-8"
+
+        amostra = b"".join(trechos)
+        encoding_detectado = chardet.detect(amostra)["encoding"]
+        if encoding_detectado:
+            return encoding_detectado
+        for enc in ENCODINGS_TENTATIVAS:
+            try:
+                amostra[:AMOSTRA_ENCODING_BYTES].decode(enc)
+                return enc
+            except UnicodeDecodeError:
+                continue
+        return "utf-8"
+
+    @staticmethod
+    def preparar_pdf(caminho_pdf: str, trabalhadores: int = PDF_TRABALHADORES) -> str:
+
+        from files_utils import filesUtils
+
+        """
+        Converte o PDF para TXT e o corrige, retornando o caminho do '_formatado.txt'.
+        Se o mesmo PDF (pelo hash do conteúdo) já foi preparado antes, o texto corrigido
+        sai do cache sem extração nem correção, e um '_formatado.txt' já existente
+        (talvez editado pelo usuário) é mantido; se só algumas páginas mudaram,
+        apenas elas são extraídas de novo.
+        """
+        caminho_txt = os.path.splitext(caminho_pdf)[0] + ".txt"
+        caminho_formatado = os.path.splitext(caminho_pdf)[0] + "_formatado.txt"
+        cache = cachePDF()
+        try:
+            hash_documento = cache.hash_documento(caminho_pdf)
+            tamanho = cache.tamanho_documento(hash_documento)
+            if tamanho is not None:
+                print("♻️ PDF sem alterações: usando o texto já extraído e corrigido")
+                # Um TXT já existente pode ter sido editado pelo usuário: não é sobrescrito
+                if not os.path.exists(caminho_formatado):
+                    with open(caminho_formatado, "w", encoding="utf-8", newline="") as f:
+                        f.write(cache.obter_documento(hash_documento))
+                return caminho_formatado
+
+            pdfCoverter.converter_pdf(caminho_pdf, caminho_txt, trabalhadores, cache)
+            caminho_corrigido = filesUtils.verificar_e_corrigir_arquivo(caminho_txt)
+            if caminho_corrigido != caminho_txt:
+                with open(caminho_corrigido, "r", encoding="utf-8", newline="") as f:
+                    cache.guardar_documento(hash_documento, f.read())
+            return caminho_corrigido
+        finally:
+            cache.fechar()
+
+    @staticmethod
+    def preparar_arquivo(caminho: str, trabalhadores_pdf: int = PDF_TRABALHADORES) -> str:
+
+        from files_utils import filesUtils
+
+        """
+        Prepara um arquivo para conversão sem interação com o usuário.
+        PDFs são convertidos para TXT e TXTs sem o sufixo '_formatado' são corrigidos.
+        Retorna o caminho do TXT pronto para conversão.
+        """
+        ext = os.path.splitext(caminho)[1].lower()
+        if ext == ".pdf":
+            return pdfCoverter.preparar_pdf(caminho, trabalhadores_pdf)
+        if ext == ".txt":
+            return filesUtils.verificar_e_corrigir_arquivo(caminho)
+        raise Exception(f"❌ Formato não suportado: {ext}")
+
     @staticmethod
     async def selecionar_arquivo() -> str:
 
@@ -136,25 +453,13 @@ class pdfCoverter:
 
                 ext = os.path.splitext(caminho)[1].lower()
                 if ext == ".pdf":
-                    caminho_txt = os.path.splitext(caminho)[0] + ".txt"
-                    if not pdfCoverter.converter_pdf(caminho, caminho_txt):
-                        print("\n⚠️ Falha na conversão do PDF. Tente outro arquivo.")
-                        await asyncio.sleep(1)
-                        continue
-                    # Após converter, verifica se o TXT já foi corrigido
+                    # Converte e corrige o TXT, reaproveitando o cache se o PDF não mudou
                     try:
-                        with open(caminho_txt, "r", encoding="utf-8") as f:
-                            texto_original = f.read()
-                        texto_formatado = textFormat.apply_format(texto_original)
-                        caminho_txt = (
-                            os.path.splitext(caminho_txt)[0] + "_formatado.txt"
-                        )
-                        with open(caminho_txt, "w", encoding="utf-8") as f:
-                            f.write(texto_formatado)
-                        print(f"✅ Formatação aplicada e salva em: {caminho_txt}")
+                        caminho_txt = pdfCoverter.preparar_pdf(caminho)
                     except Exception as e:
-                        print(f"❌ Erro ao aplicar formatação: {e}")
-                    caminho_txt = filesUtils.verificar_e_corrigir_arquivo(caminho_txt)
+                        print(f"\n⚠️ Falha na conversão do PDF: {e}. Tente outro arquivo.")
+                        await asyncio.sleep(1)
+                        continue
                     editar = (
                         (
                             await aioconsole.ainput(
@@ -218,15 +523,8 @@ class pdfCoverter:
                     caminho_completo = os.path.join(dir_atual, arquivo_selecionado)
                     ext = os.path.splitext(arquivo_selecionado)[1].lower()
                     if ext == ".pdf":
-                        caminho_txt = os.path.splitext(caminho_completo)[0] + ".txt"
-                        if not pdfCoverter.converter_pdf(caminho_completo, caminho_txt):
-                            print("\n⚠️ Falha na conversão do PDF. Tente outro arquivo.")
-                            await asyncio.sleep(1)
-                            continue
-                        # Corrige o TXT gerado, se necessário
-                        caminho_txt = filesUtils.verificar_e_corrigir_arquivo(
-                            caminho_txt
-                        )
+                        # Converte e corrige o TXT, reaproveitando o cache se o PDF não mudou
+                        caminho_txt = pdfCoverter.preparar_pdf(caminho_completo)
                         editar = (
                             (
                                 await aioconsole.ainput(
@@ -0,0 +1,151 @@
+import os
+import json
+import zlib
+import sqlite3
+import hashlib
+from configs import *
+
+
+class cachePDF:
+    """
+    Cache persistente (SQLite) do texto extraído de PDFs.
+    Cada página é endereçada pelo hash do seu conteúdo (fluxo de desenho, tamanho e
+    fontes) e da sua posição no documento, e guarda os blocos de texto com suas
+    chaves de margem, então um PDF reexportado com uma página corrigida só tem essa
+    página extraída de novo, e páginas iguais (ex: em branco) não se confundem.
+    O texto já corrigido de cada documento também é guardado, pelo hash do arquivo,
+    e um PDF sem alterações é carregado sem extração nenhuma.
+    """
+
+    VERSAO = 4  # Muda quando o formato extraído ou a limpeza mudam, invalidando o cache
+    LOTE_CONSULTA = 500  # Hashes por consulta "IN (...)"
+
+    def __init__(self, caminho: str = None):
+        if caminho is None:
+            caminho = os.path.join(DIRETORIO_CACHE, "pdf.sqlite3")
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        self.caminho = caminho
+        self._conexao = sqlite3.connect(caminho)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS paginas (
+                hash TEXT PRIMARY KEY,
+                texto BLOB NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS documentos (
+                hash TEXT PRIMARY KEY,
+                texto BLOB NOT NULL,
+                tamanho INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS arquivos (
+                caminho TEXT PRIMARY KEY,
+                tamanho INTEGER NOT NULL,
+                mtime INTEGER NOT NULL,
+                hash TEXT NOT NULL
+            );
+            """
+        )
+
+    @staticmethod
+    def _comprimir(texto: str) -> bytes:
+        return zlib.compress(texto.encode("utf-8"))
+
+    @staticmethod
+    def _descomprimir(dados: bytes) -> str:
+        return zlib.decompress(dados).decode("utf-8")
+
+    @staticmethod
+    def hash_pagina(pagina) -> str:
+        """
+        Hash do conteúdo e do índice de uma página do fitz. Os xrefs mudam a cada
+        exportação, então as fontes entram só pelo nome (sem o prefixo de subconjunto)
+        e tipo.
+        """
+        h = hashlib.sha256(f"v{cachePDF.VERSAO}|{pagina.number}".encode())
+        h.update(pagina.read_contents())
+        h.update(repr(tuple(pagina.rect)).encode())
+        for fonte in pagina.get_fonts():
+            h.update(f"{fonte[3].split('+')[-1]}|{fonte[2]}|{fonte[5]}".encode())
+        return h.hexdigest()
+
+    def hash_documento(self, caminho_pdf: str) -> str:
+        """
+        SHA-256 do arquivo. O resultado é memorizado por (caminho, tamanho, mtime),
+        então um PDF que não mudou não é lido de novo só para a verificação.
+        """
+        caminho_pdf = os.path.abspath(caminho_pdf)
+        estado = os.stat(caminho_pdf)
+        linha = self._conexao.execute(
+            "SELECT hash FROM arquivos WHERE caminho = ? AND tamanho = ? AND mtime = ?",
+            (caminho_pdf, estado.st_size, estado.st_mtime_ns),
+        ).fetchone()
+        if linha:
+            return linha[0]
+
+        h = hashlib.sha256()
+        with open(caminho_pdf, "rb") as f:
+            for bloco in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(bloco)
+        with self._conexao:
+            self._conexao.execute(
+                "INSERT OR REPLACE INTO arquivos VALUES (?, ?, ?, ?)",
+                (caminho_pdf, estado.st_size, estado.st_mtime_ns, h.hexdigest()),
+            )
+        return h.hexdigest()
+
+    def obter_paginas(self, hashes: list) -> dict:
+        """Retorna {hash: blocos} para as páginas presentes no cache."""
+        encontradas = {}
+        unicos = list(dict.fromkeys(hashes))
+        for inicio in range(0, len(unicos), self.LOTE_CONSULTA):
+            lote = unicos[inicio : inicio + self.LOTE_CONSULTA]
+            marcadores = ",".join("?" * len(lote))
+            for hash_pagina, dados in self._conexao.execute(
+                f"SELECT hash, texto FROM paginas WHERE hash IN ({marcadores})", lote
+            ):
+                encontradas[hash_pagina] = json.loads(self._descomprimir(dados))
+        return encontradas
+
+    def guardar_paginas(self, paginas: list) -> None:
+        """Grava uma lista de (hash, blocos) numa única transação."""
+        with self._conexao:
+            self._conexao.executemany(
+                "INSERT OR REPLACE INTO paginas VALUES (?, ?)",
+                (
+                    (h, self._comprimir(json.dumps(blocos, ensure_ascii=False)))
+                    for h, blocos in paginas
+                ),
+            )
+
+    def _chave_documento(self, hash_documento: str) -> str:
+        return f"v{self.VERSAO}:{hash_documento}"
+
+    def tamanho_documento(self, hash_documento: str):
+        """Tamanho em bytes (UTF-8) do texto corrigido guardado, ou None."""
+        linha = self._conexao.execute(
+            "SELECT tamanho FROM documentos WHERE hash = ?",
+            (self._chave_documento(hash_documento),),
+        ).fetchone()
+        return linha[0] if linha else None
+
+    def obter_documento(self, hash_documento: str):
+        linha = self._conexao.execute(
+            "SELECT texto FROM documentos WHERE hash = ?",
+            (self._chave_documento(hash_documento),),
+        ).fetchone()
+        return self._descomprimir(linha[0]) if linha else None
+
+    def guardar_documento(self, hash_documento: str, texto: str) -> None:
+        with self._conexao:
+            self._conexao.execute(
+                "INSERT OR REPLACE INTO documentos VALUES (?, ?, ?)",
+                (
+                    self._chave_documento(hash_documento),
+                    self._comprimir(texto),
+                    len(texto.encode("utf-8")),
+                ),
+            )
+
+    def fechar(self) -> None:
+        self._conexao.close()
@@ -1,3 +1,4 @@
+import sys
 import asyncio
 from configs import *
 from voiceTester import testVoice
@@ -6,6 +7,7 @@ from menu import Menu
 from audio import Audio
 import traceback
 from textParser import ParserTxt
+from cli import CLI
 
 
 async def main() -> None:
@@ -17,7 +19,7 @@ async def main() -> None:
             await ParserTxt.iniciar_conversao()
         elif opcao == "2":
             while True:
-                voz_escolhida = await Audio.menu_vozes()
+                voz_escolhida = await Menu.menu_vozes()
                 if voz_escolhida is None:
                     break
                 print(f"\n🎙️ Testando voz: {voz_escolhida}")
@@ -35,6 +37,10 @@ async def main() -> None:
 1
 if __name__ == "__main__":
 
+    # Com argumentos, executa a linha de comando não interativa (ex: convert livro.pdf)
+    if len(sys.argv) > 1:
+        sys.exit(CLI.main(sys.argv[1:]))
+
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
@@ -0,0 +1,190 @@
+import time
+import random
+import asyncio
+from collections import deque
+from configs import *
+
+TRANSITORIO = "transitorio"  # Rede, timeout, throttling: vale tentar de novo
+AUDIO_VAZIO = "audio_vazio"  # O serviço respondeu sem áudio: poucas novas tentativas
+PERMANENTE = "permanente"  # Voz inválida, requisição recusada: não adianta repetir
+
+
+class audioVazioErro(Exception):
+    """O TTS concluiu a requisição sem retornar áudio utilizável."""
+
+
+class politicaRetentativa:
+    """
+    Política de novas tentativas por parte, com backoff exponencial e jitter completo.
+    Os erros são classificados (transitório, áudio vazio, permanente) e todas as partes
+    de um job compartilham um orçamento de novas tentativas, para que um serviço
+    instável não transforme o job em milhares de repetições.
+    """
+
+    def __init__(
+        self,
+        max_tentativas: int = MAX_TENTATIVAS,
+        espera_base: float = ESPERA_BASE_RETENTATIVA,
+        espera_maxima: float = ESPERA_MAXIMA_RETENTATIVA,
+        orcamento: int = ORCAMENTO_RETENTATIVAS_MINIMO,
+        max_tentativas_audio_vazio: int = MAX_TENTATIVAS_AUDIO_VAZIO,
+    ):
+        self.max_tentativas = max_tentativas
+        self.espera_base = espera_base
+        self.espera_maxima = espera_maxima
+        self.orcamento_restante = orcamento
+        self.max_tentativas_audio_vazio = max_tentativas_audio_vazio
+        self.retentativas = {TRANSITORIO: 0, AUDIO_VAZIO: 0, PERMANENTE: 0}
+
+    @staticmethod
+    def orcamento_para(total_partes: int) -> int:
+        """Orçamento de novas tentativas proporcional ao tamanho do job."""
+        return max(
+            ORCAMENTO_RETENTATIVAS_MINIMO,
+            int(total_partes * ORCAMENTO_RETENTATIVAS_FRACAO),
+        )
+
+    @staticmethod
+    def classificar(erro: Exception) -> str:
+        """Classifica o erro de síntese em TRANSITORIO, AUDIO_VAZIO ou PERMANENTE."""
+        if isinstance(erro, audioVazioErro) or type(erro).__name__ == "NoAudioReceived":
+            return AUDIO_VAZIO
+        # Respostas HTTP/handshake do aiohttp trazem o código de status
+        status = getattr(erro, "status", None)
+        if isinstance(status, int):
+            if status in (408, 425, 429) or status >= 500:
+                return TRANSITORIO
+            return PERMANENTE
+        if isinstance(erro, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+            return TRANSITORIO
+        if type(erro).__module__.startswith(("aiohttp", "edge_tts")):
+            return TRANSITORIO
+        if isinstance(erro, OSError):
+            return TRANSITORIO
+        return PERMANENTE
+
+    def pode_tentar(self, classe: str, tentativa: int) -> bool:
+        """
+        Indica se a parte pode ser tentada novamente após `tentativa` falhas,
+        consumindo uma unidade do orçamento do job em caso afirmativo.
+        """
+        if classe == PERMANENTE:
+            return False
+        limite = (
+            self.max_tentativas_audio_vazio
+            if classe == AUDIO_VAZIO
+            else self.max_tentativas
+        )
+        if tentativa >= limite or self.orcamento_restante <= 0:
+            return False
+        self.orcamento_restante -= 1
+        self.retentativas[classe] += 1
+        return True
+
+    def espera(self, tentativa: int) -> float:
+        """Backoff exponencial com jitter completo: uniforme em [0, base * 2^(n-1)]."""
+        teto = min(self.espera_maxima, self.espera_base * 2 ** (tentativa - 1))
+        return random.uniform(0, teto)
+
+    def estado(self) -> dict:
+        return {
+            "retentativas": dict(self.retentativas),
+            "orcamento_restante": self.orcamento_restante,
+        }
+
+
+class disjuntorCircuito:
+    """
+    Disjuntor (circuit breaker) compartilhado pelas tarefas de um job.
+    Quando a taxa de falhas transitórias nas últimas requisições passa do limiar,
+    o circuito abre e todas as tarefas aguardam em vez de insistir num serviço com
+    problemas. Após a espera, uma única requisição de sonda é liberada: se der certo
+    o circuito fecha; se falhar, abre de novo com espera dobrada. A sonda recebe um
+    número de `aguardar`, e com o circuito aberto só o resultado dela é considerado:
+    respostas atrasadas de requisições anteriores à abertura são ignoradas.
+    """
+
+    FECHADO = "fechado"
+    ABERTO = "aberto"
+    SEMI_ABERTO = "semi_aberto"
+
+    def __init__(
+        self,
+        janela: int = DISJUNTOR_JANELA,
+        limiar: float = DISJUNTOR_LIMIAR,
+        minimo: int = DISJUNTOR_MINIMO,
+        espera: float = DISJUNTOR_ESPERA,
+        espera_maxima: float = DISJUNTOR_ESPERA_MAXIMA,
+    ):
+        self.limiar = limiar
+        self.minimo = minimo
+        self.espera_inicial = espera
+        self.espera_maxima = espera_maxima
+        self.estado = self.FECHADO
+        self.aberturas = 0
+        self._resultados = deque(maxlen=janela)
+        self._espera = espera
+        self._reabrir_em = 0.0
+        self._sonda = None  # Número da sonda em andamento
+        self._sondas = 0
+
+    def _abrir(self) -> None:
+        self.estado = self.ABERTO
+        self.aberturas += 1
+        self._reabrir_em = time.monotonic() + self._espera
+        self._sonda = None
+        print(
+            f"⛔ Muitas falhas no serviço de TTS; pausando as requisições por {self._espera:.0f}s"
+        )
+
+    async def aguardar(self, desistir=None):
+        """
+        Bloqueia enquanto o circuito estiver aberto ou com a sonda em andamento.
+        Retorna o número da sonda quando a requisição liberada é a sonda, ou None.
+        `desistir()`, se informado, é consultado periodicamente para encerrar a espera
+        (ex: quando o job já foi abortado).
+        """
+        while True:
+            if self.estado == self.FECHADO or (desistir is not None and desistir()):
+                return None
+            agora = time.monotonic()
+            if self.estado == self.ABERTO:
+                if agora < self._reabrir_em:
+                    await asyncio.sleep(min(self._reabrir_em - agora, 1.0))
+                    continue
+                self.estado = self.SEMI_ABERTO
+            if self._sonda is None:
+                self._sondas += 1
+                self._sonda = self._sondas
+                return self._sonda
+            await asyncio.sleep(0.25)
+
+    def liberar_sonda(self, sonda) -> None:
+        """Devolve a vaga de sonda quando a tarefa desiste sem concluir a requisição."""
+        if sonda is not None and sonda == self._sonda:
+            self._sonda = None
+
+    def registrar(self, sucesso: bool, sonda=None) -> None:
+        """
+        Registra o resultado de uma requisição; `sucesso` é False só para falhas
+        transitórias e `sonda` é o número recebido de `aguardar`.
+        """
+        if self.estado != self.FECHADO:
+            if sonda is None or sonda != self._sonda:
+                return  # Requisição anterior à abertura do circuito
+            self._sonda = None
+            if sucesso:
+                self.estado = self.FECHADO
+                self._espera = self.espera_inicial
+                self._resultados.clear()
+            else:
+                self._espera = min(self.espera_maxima, self._espera * 2)
+                self._abrir()
+            return
+
+        self._resultados.append(sucesso)
+        if len(self._resultados) < self.minimo:
+            return
+        falhas = self._resultados.count(False)
+        if falhas / len(self._resultados) >= self.limiar:
+            self._abrir()
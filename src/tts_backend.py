@@ -0,0 +1,368 @@
+import json
+import math
+import uuid
+import random
+import struct
+import asyncio
+import argparse
+import hashlib
+from configs import *
+
+
+class erroServicoTTS(ConnectionError):
+    """Erro devolvido pelo serviço de TTS simulado, com o código de status HTTP equivalente."""
+
+    def __init__(self, mensagem: str, status: int = 503):
+        super().__init__(mensagem)
+        self.status = status
+
+
+class backendTTS:
+    """
+    Interface dos mecanismos de síntese usados por todo o pipeline.
+    `stream()` produz mensagens no mesmo formato do edge_tts:
+    {"type": "audio", "data": bytes} e {"type": "WordBoundary", "offset", "duration", "text"}.
+    """
+
+    nome = "base"
+
+    def stream(self, texto: str, voz: str, velocidade: str, tom: str):
+        raise NotImplementedError
+
+    async def sintetizar(
+        self, texto: str, voz: str, velocidade: str = VELOCIDADE_TTS, tom: str = TOM_TTS
+    ) -> bytes:
+        """Consome o stream e retorna o áudio completo (MP3)."""
+        blocos = []
+        async for mensagem in self.stream(texto, voz, velocidade, tom):
+            if mensagem["type"] == "audio":
+                blocos.append(mensagem["data"])
+        return b"".join(blocos)
+
+    @staticmethod
+    def criar(nome: str = None, **opcoes) -> "backendTTS":
+        """
+        Cria um backend pelo nome: "edge" (serviço da Microsoft), "local" (simulador
+        em processo) ou "servidor" (simulador rodando em outro processo, ver `servidorTTSLocal`).
+        """
+        nome = nome or BACKEND_TTS
+        if nome == "edge":
+            return backendEdge()
+        if nome == "local":
+            return backendLocal(**opcoes)
+        if nome == "servidor":
+            return backendServidorLocal(**opcoes)
+        raise ValueError(f"Backend de TTS desconhecido: {nome}")
+
+    @staticmethod
+    def padrao() -> "backendTTS":
+        """Backend usado quando nenhum é informado explicitamente."""
+        global _backend_padrao
+        if _backend_padrao is None:
+            _backend_padrao = backendTTS.criar()
+        return _backend_padrao
+
+    @staticmethod
+    def definir_padrao(backend: "backendTTS") -> None:
+        global _backend_padrao
+        _backend_padrao = backend
+
+
+_backend_padrao = None
+
+
+class backendEdge(backendTTS):
+    """Síntese pelo serviço Edge TTS da Microsoft."""
+
+    nome = "edge"
+
+    async def stream(self, texto: str, voz: str, velocidade: str, tom: str):
+        import edge_tts
+
+        communicate = edge_tts.Communicate(texto, voz, rate=velocidade, pitch=tom)
+        async for mensagem in communicate.stream():
+            yield mensagem
+
+
+class simuladorTTS:
+    """
+    Simula o comportamento do Edge TTS sem rede: latência até o primeiro byte com
+    distribuição log-normal, áudio entregue em blocos ao longo do tempo, marcações de
+    palavras, limite de requisições simultâneas (HTTP 429) e injeção de erros.
+    O áudio são quadros MP3 válidos (MPEG-2 Layer III, 24 kHz, 48 kbps, mono, o mesmo
+    formato do Edge) contendo silêncio, gerados de forma determinística a partir do texto.
+    """
+
+    # Cabeçalho MPEG-2 Layer III, sem CRC, 48 kbps, 24 kHz, mono
+    CABECALHO_QUADRO = bytes([0xFF, 0xF3, 0x64, 0xC0])
+    TAMANHO_QUADRO = 144  # 72 * 48000 / 24000
+    DURACAO_QUADRO = 576 / 24000  # segundos
+    QUADROS_POR_BLOCO = 20  # O Edge envia o áudio em mensagens de ~3 KB
+
+    def __init__(
+        self,
+        latencia_media: float = SIMULADOR_LATENCIA_MEDIA,
+        latencia_desvio: float = SIMULADOR_LATENCIA_DESVIO,
+        segundos_por_caractere: float = SIMULADOR_SEGUNDOS_POR_CARACTERE,
+        fator_tempo_real: float = SIMULADOR_FATOR_TEMPO_REAL,
+        max_simultaneas: int = SIMULADOR_MAX_SIMULTANEAS,
+        taxa_erro: float = SIMULADOR_TAXA_ERRO,
+        taxa_audio_vazio: float = SIMULADOR_TAXA_AUDIO_VAZIO,
+        semente: int = None,
+    ):
+        """
+        `latencia_media`/`latencia_desvio`: segundos até o primeiro byte (log-normal).
+        `fator_tempo_real`: fração da duração do áudio gasta para transmiti-lo (0 = instantâneo).
+        `max_simultaneas`: acima disso as requisições recebem HTTP 429 (0 = sem limite).
+        """
+        self.latencia_media = latencia_media
+        self.latencia_desvio = latencia_desvio
+        self.segundos_por_caractere = segundos_por_caractere
+        self.fator_tempo_real = fator_tempo_real
+        self.max_simultaneas = max_simultaneas
+        self.taxa_erro = taxa_erro
+        self.taxa_audio_vazio = taxa_audio_vazio
+        self.aleatorio = random.Random(semente)
+        self.em_andamento = 0
+        self.requisicoes = 0
+
+    @staticmethod
+    def velocidade_relativa(velocidade: str) -> float:
+        """Converte o parâmetro de velocidade do Edge ("+25%") em fator multiplicativo."""
+        try:
+            return max(0.1, 1 + float(velocidade.strip().rstrip("%")) / 100)
+        except ValueError:
+            return 1.0
+
+    def quadros(self, texto: str, velocidade: str = VELOCIDADE_TTS) -> bytes:
+        """Gera os quadros MP3 correspondentes ao texto, sempre iguais para o mesmo texto."""
+        duracao = len(texto) * self.segundos_por_caractere
+        duracao /= self.velocidade_relativa(velocidade)
+        total = max(1, math.ceil(duracao / self.DURACAO_QUADRO))
+        # Os dados auxiliares do quadro carregam um resumo do texto (ignorado pelos decodificadores)
+        resumo = hashlib.sha256(texto.encode("utf-8")).digest()[:8]
+        quadro = (
+            self.CABECALHO_QUADRO
+            + bytes(self.TAMANHO_QUADRO - 4 - len(resumo))
+            + resumo
+        )
+        return quadro * total
+
+    def _latencia(self) -> float:
+        if self.latencia_media <= 0:
+            return 0.0
+        sigma = math.sqrt(math.log(1 + (self.latencia_desvio / self.latencia_media) ** 2))
+        mu = math.log(self.latencia_media) - sigma**2 / 2
+        return self.aleatorio.lognormvariate(mu, sigma)
+
+    async def gerar(
+        self, texto: str, voz: str, velocidade: str = VELOCIDADE_TTS, tom: str = TOM_TTS
+    ):
+        """Produz as mensagens de uma síntese simulada, no formato do edge_tts."""
+        self.requisicoes += 1
+        if self.max_simultaneas and self.em_andamento >= self.max_simultaneas:
+            raise erroServicoTTS("Too Many Requests (simulado)", status=429)
+        self.em_andamento += 1
+        try:
+            await asyncio.sleep(self._latencia())
+            sorteio = self.aleatorio.random()
+            if sorteio < self.taxa_erro:
+                raise erroServicoTTS("Conexão encerrada pelo servidor (simulado)")
+            if sorteio < self.taxa_erro + self.taxa_audio_vazio:
+                return
+
+            audio = self.quadros(texto, velocidade)
+            tamanho_bloco = self.QUADROS_POR_BLOCO * self.TAMANHO_QUADRO
+            duracao_bloco = self.QUADROS_POR_BLOCO * self.DURACAO_QUADRO
+            palavras = texto.split()
+            ticks_por_palavra = int(
+                len(audio) / self.TAMANHO_QUADRO * self.DURACAO_QUADRO * 1e7
+            ) // max(len(palavras), 1)
+            for i, palavra in enumerate(palavras):
+                yield {
+                    "type": "WordBoundary",
+                    "offset": i * ticks_por_palavra,
+                    "duration": ticks_por_palavra,
+                    "text": palavra,
+                }
+            for inicio in range(0, len(audio), tamanho_bloco):
+                if self.fator_tempo_real:
+                    await asyncio.sleep(duracao_bloco * self.fator_tempo_real)
+                yield {"type": "audio", "data": audio[inicio : inicio + tamanho_bloco]}
+        finally:
+            self.em_andamento -= 1
+
+
+class backendLocal(backendTTS):
+    """Backend offline que usa o `simuladorTTS` no próprio processo."""
+
+    nome = "local"
+
+    def __init__(self, **opcoes):
+        self.simulador = simuladorTTS(**opcoes)
+
+    async def stream(self, texto: str, voz: str, velocidade: str, tom: str):
+        async for mensagem in self.simulador.gerar(texto, voz, velocidade, tom):
+            yield mensagem
+
+
+class protocoloLocal:
+    """
+    Enquadramento das mensagens trocadas com o `servidorTTSLocal`, imitando o do Edge TTS:
+    cada mensagem tem 1 byte de tipo (1 = texto, 2 = binário, como os opcodes de WebSocket)
+    e 4 bytes de tamanho. Mensagens de texto são cabeçalhos "Chave:valor" seguidos de uma
+    linha em branco e do corpo JSON; mensagens binárias começam com 2 bytes indicando o
+    tamanho dos cabeçalhos, seguidos dos cabeçalhos ("Path:audio") e do áudio.
+    """
+
+    TEXTO = 1
+    BINARIO = 2
+
+    @staticmethod
+    def mensagem_texto(caminho: str, id_requisicao: str, corpo: dict) -> bytes:
+        conteudo = (
+            f"X-RequestId:{id_requisicao}\r\n"
+            f"Content-Type:application/json; charset=utf-8\r\n"
+            f"Path:{caminho}\r\n\r\n" + json.dumps(corpo, ensure_ascii=False)
+        ).encode("utf-8")
+        return struct.pack(">BI", protocoloLocal.TEXTO, len(conteudo)) + conteudo
+
+    @staticmethod
+    def mensagem_audio(id_requisicao: str, audio: bytes) -> bytes:
+        cabecalhos = (
+            f"X-RequestId:{id_requisicao}\r\nContent-Type:audio/mpeg\r\nPath:audio\r\n"
+        ).encode("utf-8")
+        conteudo = struct.pack(">H", len(cabecalhos)) + cabecalhos + audio
+        return struct.pack(">BI", protocoloLocal.BINARIO, len(conteudo)) + conteudo
+
+    @staticmethod
+    async def ler(leitor: asyncio.StreamReader):
+        """Lê uma mensagem e retorna (caminho, corpo), com o corpo em dict ou bytes."""
+        try:
+            tipo, tamanho = struct.unpack(">BI", await leitor.readexactly(5))
+            conteudo = await leitor.readexactly(tamanho)
+        except asyncio.IncompleteReadError:
+            raise ConnectionResetError("Conexão encerrada no meio da mensagem")
+        if tipo == protocoloLocal.BINARIO:
+            (tamanho_cabecalhos,) = struct.unpack(">H", conteudo[:2])
+            cabecalhos = conteudo[2 : 2 + tamanho_cabecalhos].decode("utf-8")
+            caminho = cabecalhos.split("Path:", 1)[1].split("\r\n", 1)[0]
+            return caminho, conteudo[2 + tamanho_cabecalhos :]
+        cabecalhos, corpo = conteudo.decode("utf-8").split("\r\n\r\n", 1)
+        caminho = cabecalhos.split("Path:", 1)[1].split("\r\n", 1)[0]
+        return caminho, json.loads(corpo) if corpo else {}
+
+
+class servidorTTSLocal:
+    """
+    Servidor TCP que imita o Edge TTS para testes de carga e benchmarks sem internet.
+    Cada conexão recebe uma requisição ("Path:ssml") e responde com "turn.start",
+    "audio.metadata", mensagens de áudio e "turn.end", como o serviço real.
+    Erros simulados são enviados como "Path:erro" com o status HTTP equivalente.
+
+    Uso: python tts_backend.py --porta 8765 --taxa-erro 0.05 --max-simultaneas 8
+    """
+
+    def __init__(self, simulador: simuladorTTS = None):
+        self.simulador = simulador or simuladorTTS()
+
+    async def atender(self, leitor, escritor) -> None:
+        try:
+            _, pedido = await protocoloLocal.ler(leitor)
+            id_requisicao = uuid.uuid4().hex
+            escritor.write(protocoloLocal.mensagem_texto("turn.start", id_requisicao, {}))
+            try:
+                async for mensagem in self.simulador.gerar(
+                    pedido["texto"], pedido["voz"], pedido["velocidade"], pedido["tom"]
+                ):
+                    if mensagem["type"] == "audio":
+                        escritor.write(
+                            protocoloLocal.mensagem_audio(id_requisicao, mensagem["data"])
+                        )
+                    else:
+                        escritor.write(
+                            protocoloLocal.mensagem_texto(
+                                "audio.metadata", id_requisicao, mensagem
+                            )
+                        )
+                    await escritor.drain()
+            except erroServicoTTS as e:
+                escritor.write(
+                    protocoloLocal.mensagem_texto(
+                        "erro", id_requisicao, {"status": e.status, "mensagem": str(e)}
+                    )
+                )
+            else:
+                escritor.write(protocoloLocal.mensagem_texto("turn.end", id_requisicao, {}))
+            await escritor.drain()
+        except (ConnectionError, ValueError, KeyError):
+            pass
+        finally:
+            escritor.close()
+
+    async def executar(self, host: str = "127.0.0.1", porta: int = 8765) -> None:
+        servidor = await asyncio.start_server(self.atender, host, porta)
+        print(f"🛰️ Servidor TTS local em {host}:{porta}")
+        async with servidor:
+            await servidor.serve_forever()
+
+
+class backendServidorLocal(backendTTS):
+    """Backend que conversa com um `servidorTTSLocal` (uma conexão por requisição, como o Edge)."""
+
+    nome = "servidor"
+
+    def __init__(self, host: str = "127.0.0.1", porta: int = 8765):
+        self.host = host
+        self.porta = porta
+
+    async def stream(self, texto: str, voz: str, velocidade: str, tom: str):
+        leitor, escritor = await asyncio.open_connection(self.host, self.porta)
+        try:
+            escritor.write(
+                protocoloLocal.mensagem_texto(
+                    "ssml",
+                    uuid.uuid4().hex,
+                    {"texto": texto, "voz": voz, "velocidade": velocidade, "tom": tom},
+                )
+            )
+            await escritor.drain()
+            while True:
+                caminho, corpo = await protocoloLocal.ler(leitor)
+                if caminho == "audio":
+                    yield {"type": "audio", "data": corpo}
+                elif caminho == "audio.metadata":
+                    yield corpo
+                elif caminho == "erro":
+                    raise erroServicoTTS(corpo["mensagem"], status=corpo["status"])
+                elif caminho == "turn.end":
+                    return
+        finally:
+            escritor.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor local que simula o Edge TTS")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--latencia", type=float, default=SIMULADOR_LATENCIA_MEDIA)
+    parser.add_argument("--desvio", type=float, default=SIMULADOR_LATENCIA_DESVIO)
+    parser.add_argument("--tempo-real", type=float, default=SIMULADOR_FATOR_TEMPO_REAL)
+    parser.add_argument("--max-simultaneas", type=int, default=SIMULADOR_MAX_SIMULTANEAS)
+    parser.add_argument("--taxa-erro", type=float, default=SIMULADOR_TAXA_ERRO)
+    parser.add_argument("--taxa-vazio", type=float, default=SIMULADOR_TAXA_AUDIO_VAZIO)
+    parser.add_argument("--semente", type=int, default=None)
+    args = parser.parse_args()
+    simulador = simuladorTTS(
+        latencia_media=args.latencia,
+        latencia_desvio=args.desvio,
+        fator_tempo_real=args.tempo_real,
+        max_simultaneas=args.max_simultaneas,
+        taxa_erro=args.taxa_erro,
+        taxa_audio_vazio=args.taxa_vazio,
+        semente=args.semente,
+    )
+    try:
+        asyncio.run(servidorTTSLocal(simulador).executar(args.host, args.porta))
+    except KeyboardInterrupt:
+        pass
@@ -1,5 +1,5 @@
-import edge_tts
 import asyncio
+from tts_backend import backendTTS
 
 
 class testVoice:
@@ -11,12 +11,13 @@ class testVoice:
         em uma pasta na pasta Download do Android. Após a geração, retorna automaticamente.
         """
         texto_teste = "Apenas um teste simples"
-        communicate = edge_tts.Communicate(texto_teste, voz)
 
         file_path = "teste_voz.mp3"
 
         try:
-            await communicate.save(file_path)
+            dados = await backendTTS.padrao().sintetizar(texto_teste, voz)
+            with open(file_path, "wb") as f:
+                f.write(dados)
             print(f"\n✅ Arquivo de teste gerado: {file_path}")
             await asyncio.sleep(1)
         except Exception as e:
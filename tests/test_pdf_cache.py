@@ -0,0 +1,46 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import fitz
+from pdfParser import pdfCoverter
+from pdf_cache import cachePDF
+
+
+def criar_pdf(caminho, textos):
+    documento = fitz.open()
+    for texto in textos:
+        pagina = documento.new_page()
+        if texto:
+            pagina.insert_text((72, 72), texto)
+    documento.save(caminho)
+    documento.close()
+
+
+def extrair(tmp_path, caminho_pdf, cache):
+    caminho_txt = str(tmp_path / "saida.txt")
+    pdfCoverter._extrair_para_txt(caminho_pdf, caminho_txt, 1, cache)
+    with open(caminho_txt, encoding="utf-8") as f:
+        return f.read()
+
+
+def test_paginas_em_branco_repetidas_nao_deslocam_o_texto(tmp_path):
+    caminho_pdf = str(tmp_path / "livro.pdf")
+    criar_pdf(caminho_pdf, ["Pagina um texto.", "", "", "Pagina quatro texto.", "Pagina cinco texto."])
+    esperado = extrair(tmp_path, caminho_pdf, None)
+    assert "Pagina cinco texto." in esperado
+
+    cache = cachePDF(str(tmp_path / "pdf.sqlite3"))
+    try:
+        assert extrair(tmp_path, caminho_pdf, cache) == esperado  # Cache vazio
+        assert extrair(tmp_path, caminho_pdf, cache) == esperado  # Tudo do cache
+    finally:
+        cache.fechar()
+
+
+def test_chave_da_pagina_inclui_o_indice(tmp_path):
+    caminho_pdf = str(tmp_path / "branco.pdf")
+    criar_pdf(caminho_pdf, ["", ""])
+    with fitz.open(caminho_pdf) as documento:
+        assert cachePDF.hash_pagina(documento[0]) != cachePDF.hash_pagina(documento[1])